@@ -0,0 +1,81 @@
+"""Compara memoria y tiempo de construcción de 100.000 liquidaciones.
+
+Mide la clase anterior (atributos en __dict__ y construcción por __init__) contra
+el modelo actual (__slots__ y construcción directa desde la fila). No necesita
+base de datos: las filas se generan en memoria con el mismo formato que devuelve
+psycopg2.
+
+    python benchmarks/memoria_modelos.py [filas]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.models import Liquidacion
+
+class LiquidacionConDict:
+    """Réplica de Liquidacion antes de usar __slots__, para comparar"""
+
+    def __init__(self, empleado_id, salario_base, horas_diurnas, horas_nocturnas,
+                 bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina,
+                 fecha_liquidacion=None, id=None):
+        self.id = id
+        self.empleado_id = empleado_id
+        self.fecha_liquidacion = fecha_liquidacion or date.today()
+        self.salario_base = salario_base
+        self.horas_diurnas = horas_diurnas
+        self.horas_nocturnas = horas_nocturnas
+        self.bonos_extra = bonos_extra
+        self.deduccion_adicional = deduccion_adicional
+        self.auxilio_transporte = auxilio_transporte
+        self.total_nomina = total_nomina
+
+    @classmethod
+    def _desde_fila(cls, row):
+        (id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas,
+         horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina) = row
+        return cls(
+            empleado_id, salario_base, horas_diurnas, horas_nocturnas,
+            bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina,
+            fecha_liquidacion, id
+        )
+
+def generar_filas(cantidad):
+    """Filas con los tipos que entrega psycopg2 para la tabla liquidaciones"""
+    inicio = date(2025, 1, 1)
+    return [
+        (i, i % 500 + 1, inicio + timedelta(days=i % 365), 1500000.0 + i, i % 10, i % 5,
+         50000.0, 10000.0, 162000.0, 1700000.0 + i)
+        for i in range(1, cantidad + 1)
+    ]
+
+def medir(clase, filas):
+    """Devuelve (bytes por fila, microsegundos por fila) al construir todas las filas"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    objetos = [clase._desde_fila(fila) for fila in filas]
+    duracion = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # La lista que guarda los objetos pesa igual en ambos casos
+    memoria -= sys.getsizeof(objetos)
+    return memoria / len(filas), duracion * 1e6 / len(filas)
+
+if __name__ == "__main__":
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    filas = generar_filas(cantidad)
+
+    print(f"{cantidad:,} liquidaciones")
+    print("{:<25} {:>15} {:>15}".format("Modelo", "Bytes/fila", "µs/fila"))
+    print("-" * 57)
+    resultados = {}
+    for nombre, clase in (("Antes (__dict__)", LiquidacionConDict), ("Ahora (__slots__)", Liquidacion)):
+        resultados[nombre] = medir(clase, filas)
+        print("{:<25} {:>15,.0f} {:>15.2f}".format(nombre, *resultados[nombre]))
+
+    antes, ahora = resultados.values()
+    print(f"\nMemoria: {1 - ahora[0] / antes[0]:.0%} menos; tiempo: {1 - ahora[1] / antes[1]:.0%} menos")
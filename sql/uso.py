@@ -68,6 +68,20 @@ try:
     ON CONFLICT (nombre_parametro) DO NOTHING
     ''')
     
+    # Índices para las consultas frecuentes de liquidaciones y empleados
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_liquidaciones_empleado_fecha
+    ON liquidaciones (empleado_id, fecha_liquidacion DESC, id DESC)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_liquidaciones_fecha
+    ON liquidaciones (fecha_liquidacion DESC, id DESC)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_empleados_nombre
+    ON empleados (nombre, id)
+    ''')
+    
     # Confirmar los cambios
     conn.commit()
     print("Tablas creadas exitosamente")
@@ -1,7 +1,8 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from model.models import Configuracion
+from model.models import Configuracion, ErrorDuplicado
+from model.calculo_total import ParametrosNomina
 from datetime import date
 
 class ConfiguracionController:
@@ -62,10 +63,6 @@ class ConfiguracionController:
             return None, errors
         
         try:
-            # Verificar si ya existe un parámetro con el mismo nombre
-            if cls.get_by_nombre(data['nombre_parametro']):
-                return None, {"nombre_parametro": "Ya existe un parámetro con este nombre"}
-            
             # Crear el parámetro
             configuracion = Configuracion(
                 nombre_parametro=data['nombre_parametro'],
@@ -73,59 +70,45 @@ class ConfiguracionController:
                 descripcion=data.get('descripcion', '')
             )
             
-            # Guardar en la base de datos
-            if configuracion.save():
+            # Guardar en la base de datos; la restricción única detecta el nombre repetido
+            if configuracion.insertar():
                 return configuracion, {}
             else:
                 return None, {"db_error": "No se pudo guardar el parámetro en la base de datos"}
         
+        except ErrorDuplicado:
+            return None, {"nombre_parametro": "Ya existe un parámetro con este nombre"}
         except Exception as e:
             return None, {"error": str(e)}
     
     @classmethod
     def update(cls, id, data):
-        """Actualiza un parámetro de configuración existente"""
-        # Obtener el parámetro
-        configuracion = None
-        if isinstance(id, int) or (isinstance(id, str) and id.isdigit()):
-            configuracion = cls.get_by_id(id)
-        else:
-            configuracion = cls.get_by_nombre(id)
-        
-        if not configuracion:
-            return None, {"error": "Parámetro de configuración no encontrado"}
-        
-        # Validar datos
-        validation_data = data.copy()
-        if 'nombre_parametro' not in validation_data:
-            validation_data['nombre_parametro'] = configuracion.nombre_parametro
-        if 'valor' not in validation_data:
-            validation_data['valor'] = configuracion.valor
-            
-        errors = cls.validate_input(validation_data)
+        """Actualiza un parámetro de configuración existente con una sola sentencia UPDATE"""
+        # Validar solo los datos que se van a cambiar
+        errors = {campo: error for campo, error in cls.validate_input(data).items() if campo in data}
         if errors:
             return None, errors
         
+        cambios = {campo: data[campo] for campo in ('nombre_parametro', 'valor', 'descripcion') if campo in data}
+        if 'valor' in cambios:
+            cambios['valor'] = float(cambios['valor'])
+        
         try:
-            # Verificar si el nombre ya está en uso por otro parámetro
-            if 'nombre_parametro' in data and data['nombre_parametro'] != configuracion.nombre_parametro:
-                existing = cls.get_by_nombre(data['nombre_parametro'])
-                if existing and existing.id != configuracion.id:
-                    return None, {"nombre_parametro": "Este nombre ya está asociado a otro parámetro"}
-            
-            # Actualizar los datos
-            configuracion.nombre_parametro = data.get('nombre_parametro', configuracion.nombre_parametro)
-            configuracion.valor = float(data.get('valor', configuracion.valor))
-            
-            if 'descripcion' in data:
-                configuracion.descripcion = data['descripcion']
+            # El parámetro se identifica por ID o por nombre
+            if isinstance(id, int) or (isinstance(id, str) and id.isdigit()):
+                configuracion = Configuracion.actualizar_parcial(id=int(id), **cambios)
+            else:
+                configuracion = Configuracion.actualizar_parcial(nombre_parametro=id, **cambios)
             
-            # Guardar los cambios
-            if configuracion.save():
+            if configuracion is None:
+                return None, {"error": "Parámetro de configuración no encontrado"}
+            if configuracion:
                 return configuracion, {}
             else:
                 return None, {"db_error": "No se pudo actualizar el parámetro en la base de datos"}
             
+        except ErrorDuplicado:
+            return None, {"nombre_parametro": "Este nombre ya está asociado a otro parámetro"}
         except Exception as e:
             return None, {"error": str(e)}
     
@@ -147,36 +130,5 @@ class ConfiguracionController:
     @classmethod
     def get_configuracion_calculo(cls):
         """Obtiene todos los parámetros necesarios para el cálculo de nómina"""
-        params = [
-            'valor_hora_extra',
-            'porcentaje_hora_diurna',
-            'porcentaje_hora_nocturna',
-            'limite_smmlv_auxilio',
-            'salario_minimo',
-            'auxilio_transporte',
-            'porcentaje_deducciones',
-            'limite_horas_extra',
-            'porcentaje_maximo_deducciones'
-        ]
-        
-        result = {}
-        for param_name in params:
-            param = cls.get_by_nombre(param_name)
-            if param:
-                result[param_name] = param.valor
-            else:
-                # Valores por defecto si no existen en la base de datos
-                default_values = {
-                    'valor_hora_extra': 6189,
-                    'porcentaje_hora_diurna': 0.25,
-                    'porcentaje_hora_nocturna': 0.75,
-                    'limite_smmlv_auxilio': 2,
-                    'salario_minimo': 1300000,
-                    'auxilio_transporte': 162000,
-                    'porcentaje_deducciones': 0.08,
-                    'limite_horas_extra': 90,
-                    'porcentaje_maximo_deducciones': 0.4
-                }
-                result[param_name] = default_values.get(param_name)
-        
-        return result
\ No newline at end of file
+        # Una sola lectura de la caché de configuración, con valores por defecto si faltan
+        return ParametrosNomina.cargar().como_dict()
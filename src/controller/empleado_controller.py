@@ -1,7 +1,8 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from model.models import Empleado, Liquidacion, Configuracion
+from model.models import (Empleado, Liquidacion, Configuracion, TAMANO_PAGINA, ErrorDuplicado,
+                          unidad_de_trabajo, TransaccionRevertida)
 from datetime import date
 
 class Controller:
@@ -86,6 +87,11 @@ class EmpleadoController(Controller):
         """Obtiene todos los empleados"""
         return Empleado.get_all()
     
+    @classmethod
+    def get_pagina(cls, despues_de=None, limite=TAMANO_PAGINA):
+        """Obtiene una página de empleados y la clave de la siguiente"""
+        return Empleado.get_pagina(despues_de, limite)
+    
     @classmethod
     def get_by_id(cls, id):
         """Obtiene un empleado por su ID"""
@@ -100,6 +106,13 @@ class EmpleadoController(Controller):
         """Obtiene un empleado por su documento"""
         return Empleado.get_by_documento(documento)
     
+    @classmethod
+    def search(cls, texto, limit=20):
+        """Busca empleados por nombre, sin distinguir mayúsculas ni tildes"""
+        if not texto or not texto.strip():
+            return []
+        return Empleado.search(texto.strip(), limit)
+    
     @classmethod
     def create(cls, data):
         """Crea un nuevo empleado"""
@@ -108,10 +121,6 @@ class EmpleadoController(Controller):
             return None, errors
         
         try:
-            # Verificar si ya existe un empleado con el mismo documento
-            if cls.get_by_documento(data['documento']):
-                return None, {"documento": "Ya existe un empleado con este documento"}
-            
             # Crear el empleado
             empleado = Empleado(
                 nombre=data['nombre'],
@@ -120,21 +129,47 @@ class EmpleadoController(Controller):
                 fecha_ingreso=data['fecha_ingreso']
             )
             
-            # Guardar en la base de datos
-            if empleado.save():
+            # Guardar en la base de datos; la restricción única detecta el documento repetido
+            if empleado.insertar():
                 return empleado, {}
             else:
                 return None, {"db_error": "No se pudo guardar el empleado en la base de datos"}
         
+        except ErrorDuplicado:
+            return None, {"documento": "Ya existe un empleado con este documento"}
         except Exception as e:
             return None, {"error": str(e)}
     
+    @classmethod
+    def create_con_liquidacion(cls, data, data_liquidacion):
+        """Crea un empleado y su primera liquidación con un solo commit.
+
+        Si cualquiera de los dos falla no se guarda ninguno. Devuelve
+        (empleado, liquidacion, errores).
+        """
+        # Importado aquí: el paquete controller importa este módulo antes que liquidacion_controller
+        from controller.liquidacion_controller import LiquidacionController
+        errors = {}
+        try:
+            with unidad_de_trabajo():
+                empleado, errors = cls.create(data)
+                if not errors:
+                    liquidacion, errors = LiquidacionController.create(
+                        dict(data_liquidacion, empleado_id=empleado.id))
+                if errors:
+                    raise TransaccionRevertida("Datos inválidos")
+            return empleado, liquidacion, {}
+        except TransaccionRevertida as e:
+            return None, None, errors or {"db_error": str(e)}
+        except Exception as e:
+            return None, None, {"error": str(e)}
+    
     @classmethod
     def update(cls, id, data):
-        """Actualiza un empleado existente"""
-        # Obtener el empleado
-        empleado = cls.get_by_id(id)
-        if not empleado:
+        """Actualiza un empleado existente con una sola sentencia UPDATE"""
+        try:
+            id_num = int(id)
+        except (ValueError, TypeError):
             return None, {"error": "Empleado no encontrado"}
         
         # Validar los datos
@@ -143,26 +178,25 @@ class EmpleadoController(Controller):
             return None, errors
         
         try:
-            # Verificar si el documento ya está en uso por otro empleado
-            if 'documento' in data and data['documento'] != empleado.documento:
-                existing = cls.get_by_documento(data['documento'])
-                if existing and existing.id != empleado.id:
-                    return None, {"documento": "Este documento ya está asociado a otro empleado"}
-            
-            # Actualizar los datos
-            empleado.nombre = data.get('nombre', empleado.nombre)
-            empleado.documento = data.get('documento', empleado.documento)
-            empleado.salario_base = float(data.get('salario_base', empleado.salario_base))
-            
-            if 'fecha_ingreso' in data:
-                empleado.fecha_ingreso = data['fecha_ingreso']
+            empleado = Empleado(
+                nombre=data['nombre'],
+                documento=data['documento'],
+                salario_base=float(data['salario_base']),
+                fecha_ingreso=data['fecha_ingreso'],
+                id=id_num
+            )
             
-            # Guardar los cambios
-            if empleado.save():
+            # Guardar los cambios; el UPDATE indica si el empleado existe
+            resultado = empleado.actualizar()
+            if resultado is None:
+                return None, {"error": "Empleado no encontrado"}
+            if resultado:
                 return empleado, {}
             else:
                 return None, {"db_error": "No se pudo actualizar el empleado en la base de datos"}
             
+        except ErrorDuplicado:
+            return None, {"documento": "Este documento ya está asociado a otro empleado"}
         except Exception as e:
             return None, {"error": str(e)}
     
@@ -0,0 +1,171 @@
+import sys
+import os
+import csv
+import hashlib
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import openpyxl
+except ImportError:  # openpyxl solo es necesario para importar archivos de Excel
+    openpyxl = None
+from model.models import Empleado
+from model.neon_db import iterar_consulta, transaccion, TransaccionRevertida, TAMANO_LOTE_INSERCION
+from controller.empleado_controller import EmpleadoController
+from datetime import date, datetime
+
+class ImportacionController:
+    """Controlador para sincronizar los empleados con el archivo de nómina de RR. HH.
+
+    El archivo trae la nómina completa, pero solo se escriben los empleados nuevos o
+    con datos distintos: cada fila se compara por su huella con la del empleado
+    guardado con el mismo documento.
+    """
+
+    COLUMNAS = ('nombre', 'documento', 'salario_base', 'fecha_ingreso')
+
+    @staticmethod
+    def huella(nombre, documento, salario_base, fecha_ingreso):
+        """Resumen de los datos de un empleado, igual si los datos son iguales"""
+        texto = "\x1f".join((
+            " ".join(str(nombre).split()),
+            str(documento).strip(),
+            f"{float(salario_base):.2f}",
+            fecha_ingreso.isoformat() if isinstance(fecha_ingreso, date) else str(fecha_ingreso).strip()
+        ))
+        return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+    @classmethod
+    def huellas_guardadas(cls):
+        """Huellas de los empleados de la base de datos indexadas por documento"""
+        return {
+            documento: cls.huella(nombre, documento, salario_base, fecha_ingreso)
+            for nombre, documento, salario_base, fecha_ingreso in iterar_consulta(
+                "SELECT nombre, documento, salario_base, fecha_ingreso FROM empleados"
+            )
+        }
+
+    @classmethod
+    def leer_archivo(cls, ruta):
+        """Recorre las filas de un archivo CSV o XLSX como (línea, datos) sin cargarlo completo.
+
+        La primera fila debe traer los nombres de las columnas (COLUMNAS, sin
+        importar mayúsculas ni el orden); las demás columnas se ignoran.
+        """
+        extension = os.path.splitext(ruta)[1].lower()
+        if extension == '.csv':
+            filas = cls._filas_csv(ruta)
+        elif extension == '.xlsx':
+            filas = cls._filas_xlsx(ruta)
+        else:
+            raise ValueError(f"Formato no soportado: {extension} (use .csv o .xlsx)")
+
+        encabezados = [str(c).strip().lower() if c is not None else '' for c in next(filas, [])]
+        faltantes = [columna for columna in cls.COLUMNAS if columna not in encabezados]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+        posiciones = {columna: encabezados.index(columna) for columna in cls.COLUMNAS}
+
+        for linea, fila in enumerate(filas, start=2):
+            if not any(valor not in (None, '') for valor in fila):
+                continue
+            datos = {columna: fila[posicion] if posicion < len(fila) else None
+                     for columna, posicion in posiciones.items()}
+            yield linea, cls._normalizar(datos)
+
+    @staticmethod
+    def _filas_csv(ruta):
+        with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+            yield from csv.reader(archivo)
+
+    @staticmethod
+    def _filas_xlsx(ruta):
+        if openpyxl is None:
+            raise ImportError("La importación desde Excel requiere openpyxl (pip install openpyxl)")
+        libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            yield from libro.worksheets[0].iter_rows(values_only=True)
+        finally:
+            libro.close()
+
+    @staticmethod
+    def _normalizar(datos):
+        """Lleva los valores leídos a los tipos que espera EmpleadoController.validate_input"""
+        for columna in ('nombre', 'documento'):
+            valor = datos[columna]
+            # Excel puede guardar un documento como número
+            if isinstance(valor, float) and valor.is_integer():
+                valor = int(valor)
+            datos[columna] = " ".join(str(valor).split()) if valor is not None else ''
+        if isinstance(datos['salario_base'], str):
+            datos['salario_base'] = datos['salario_base'].strip().replace(',', '.')
+        fecha = datos['fecha_ingreso']
+        if isinstance(fecha, datetime):
+            datos['fecha_ingreso'] = fecha.date()
+        elif isinstance(fecha, str):
+            datos['fecha_ingreso'] = fecha.strip()
+        return datos
+
+    @classmethod
+    def importar(cls, ruta, tamano_lote=TAMANO_LOTE_INSERCION):
+        """Importa un archivo de nómina completo en una sola transacción.
+
+        Devuelve (resumen, errores). El resumen cuenta insertados, actualizados,
+        sin_cambios, invalidos y repetidos (filas reemplazadas por una posterior con
+        el mismo documento), además de los segundos; errores tiene los errores de
+        validación de cada línea inválida, que no impiden importar las demás. Si el
+        archivo no se puede leer o falla la base de datos no se guarda nada y el
+        resumen es None.
+        """
+        inicio = time.perf_counter()
+        resumen = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0, 'invalidos': 0, 'repetidos': 0}
+        errores = {}
+
+        try:
+            guardadas = cls.huellas_guardadas()
+            with transaccion():
+                lote = {}
+                for linea, datos in cls.leer_archivo(ruta):
+                    errores_fila = EmpleadoController.validate_input(datos)
+                    if errores_fila:
+                        resumen['invalidos'] += 1
+                        errores[linea] = errores_fila
+                        continue
+
+                    empleado = Empleado(datos['nombre'], datos['documento'],
+                                        float(datos['salario_base']), datos['fecha_ingreso'])
+                    huella = cls.huella(empleado.nombre, empleado.documento,
+                                        empleado.salario_base, empleado.fecha_ingreso)
+                    if guardadas.get(empleado.documento) == huella:
+                        resumen['sin_cambios'] += 1
+                        continue
+                    # Si el documento se repite en el archivo queda la última fila
+                    guardadas[empleado.documento] = huella
+                    if empleado.documento in lote:
+                        resumen['repetidos'] += 1
+                    lote[empleado.documento] = empleado
+                    if len(lote) >= tamano_lote:
+                        cls._guardar_lote(lote.values(), resumen)
+                        lote = {}
+                cls._guardar_lote(lote.values(), resumen)
+        except (ValueError, ImportError, OSError) as e:
+            return None, {"archivo": str(e)}
+        except TransaccionRevertida as e:
+            return None, {"db_error": str(e)}
+        except Exception as e:
+            return None, {"error": str(e)}
+
+        resumen['segundos'] = time.perf_counter() - inicio
+        return resumen, errores
+
+    @staticmethod
+    def _guardar_lote(empleados, resumen):
+        empleados = list(empleados)
+        if not empleados:
+            return
+        resultado = Empleado.upsert_many(empleados)
+        if resultado is None:
+            raise TransaccionRevertida("No se pudieron guardar los empleados en la base de datos")
+        insertados, actualizados = resultado
+        resumen['insertados'] += insertados
+        resumen['actualizados'] += actualizados
+        resumen['sin_cambios'] += len(empleados) - insertados - actualizados
@@ -1,8 +1,9 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from model.models import Liquidacion, Empleado
-from model.calculo_total import calculo_total, ErrorSalarioN, ErrorDeduccionesM, ErrorHorasExtra, ErrorHorasNegativas, ErrorBonosNegativos, ErrorDeduccionNegativa
+from model.models import Liquidacion, Empleado, TAMANO_PAGINA
+from model.liquidacion_periodo import liquidar_periodo, nueva_corrida, ejecutar_corrida
+from model.calculo_total import calculo_desglose, ErrorSalarioN, ErrorDeduccionesM, ErrorHorasExtra, ErrorHorasNegativas, ErrorBonosNegativos, ErrorDeduccionNegativa
 from datetime import date
 
 class LiquidacionController:
@@ -83,28 +84,37 @@ class LiquidacionController:
         return errors
     
     @classmethod
-    def get_all(cls):
-        """Obtiene todas las liquidaciones"""
-        return Liquidacion.get_all()
+    def get_all(cls, incluir_empleado=False):
+        """Obtiene todas las liquidaciones, opcionalmente con su empleado en la misma consulta"""
+        return Liquidacion.get_all(incluir_empleado)
     
     @classmethod
-    def get_by_id(cls, id):
+    def get_by_id(cls, id, incluir_empleado=False):
         """Obtiene una liquidación por su ID"""
         try:
             id_num = int(id)
-            return Liquidacion.get_by_id(id_num)
+            return Liquidacion.get_by_id(id_num, incluir_empleado)
         except (ValueError, TypeError):
             return None
     
     @classmethod
-    def get_by_empleado(cls, empleado_id):
+    def get_by_empleado(cls, empleado_id, incluir_empleado=False):
         """Obtiene las liquidaciones de un empleado"""
         try:
             id_num = int(empleado_id)
-            return Liquidacion.get_by_empleado(id_num)
+            return Liquidacion.get_by_empleado(id_num, incluir_empleado)
         except (ValueError, TypeError):
             return []
     
+    @classmethod
+    def get_pagina(cls, despues_de=None, limite=TAMANO_PAGINA, empleado_id=None, incluir_empleado=False):
+        """Obtiene una página de liquidaciones y la clave de la siguiente"""
+        try:
+            id_num = int(empleado_id) if empleado_id is not None else None
+            return Liquidacion.get_pagina(despues_de, limite, id_num, incluir_empleado)
+        except (ValueError, TypeError):
+            return [], None
+    
     @classmethod
     def create(cls, data):
         """Crea una nueva liquidación"""
@@ -121,9 +131,9 @@ class LiquidacionController:
             bonos_extra = float(data['bonos_extra'])
             deduccion_adicional = float(data['deduccion_adicional'])
             
-            # Calcular el total de la nómina
+            # Calcular la nómina una sola vez con todos sus componentes
             try:
-                total_nomina = calculo_total(
+                desglose = calculo_desglose(
                     salario_base, 
                     horas_diurnas, 
                     horas_nocturnas, 
@@ -131,13 +141,6 @@ class LiquidacionController:
                     deduccion_adicional
                 )
                 
-                # Determinar auxilio de transporte (reutilizando lógica de calculo_total)
-                from src.model.calculo_total import obtener_parametros_configuracion
-                config = obtener_parametros_configuracion()
-                auxilio_transporte = 0
-                if salario_base < (config['salario_minimo'] * config['limite_smmlv_auxilio']):
-                    auxilio_transporte = config['auxilio_transporte']
-                
                 # Crear la liquidación
                 liquidacion = Liquidacion(
                     empleado_id=empleado_id,
@@ -146,8 +149,8 @@ class LiquidacionController:
                     horas_nocturnas=horas_nocturnas,
                     bonos_extra=bonos_extra,
                     deduccion_adicional=deduccion_adicional,
-                    auxilio_transporte=auxilio_transporte,
-                    total_nomina=total_nomina
+                    auxilio_transporte=desglose.auxilio_transporte,
+                    total_nomina=desglose.total_nomina
                 )
                 
                 # Guardar en la base de datos
@@ -187,7 +190,7 @@ class LiquidacionController:
             
             # Recalcular el total de la nómina
             try:
-                total_nomina = calculo_total(
+                desglose = calculo_desglose(
                     liquidacion.salario_base, 
                     liquidacion.horas_diurnas, 
                     liquidacion.horas_nocturnas, 
@@ -195,15 +198,8 @@ class LiquidacionController:
                     liquidacion.deduccion_adicional
                 )
                 
-                # Determinar auxilio de transporte
-                from src.model.calculo_total import obtener_parametros_configuracion
-                config = obtener_parametros_configuracion()
-                auxilio_transporte = 0
-                if liquidacion.salario_base < (config['salario_minimo'] * config['limite_smmlv_auxilio']):
-                    auxilio_transporte = config['auxilio_transporte']
-                
-                liquidacion.auxilio_transporte = auxilio_transporte
-                liquidacion.total_nomina = total_nomina
+                liquidacion.auxilio_transporte = desglose.auxilio_transporte
+                liquidacion.total_nomina = desglose.total_nomina
                 
                 # Guardar los cambios
                 if liquidacion.save():
@@ -231,4 +227,35 @@ class LiquidacionController:
             else:
                 return False, {"db_error": "No se pudo eliminar la liquidación"}
         except Exception as e:
-            return False, {"error": str(e)}
\ No newline at end of file
+            return False, {"error": str(e)}
+    
+    @classmethod
+    def liquidar_periodo(cls, fecha=None, workers=None, novedades=None):
+        """Liquida la nómina de todos los empleados repartiendo el cálculo entre varios procesos.
+
+        Devuelve (resumen, errores); los empleados que no pasan las validaciones
+        quedan en resumen['errores'] sin impedir que se liquiden los demás.
+        """
+        try:
+            return liquidar_periodo(fecha, workers, novedades), {}
+        except Exception as e:
+            return None, {"error": str(e)}
+
+    @classmethod
+    def crear_corrida(cls, fecha=None):
+        """Registra una corrida de nómina reanudable. Devuelve (corrida_id, errores)"""
+        try:
+            return nueva_corrida(fecha), {}
+        except Exception as e:
+            return None, {"error": str(e)}
+
+    @classmethod
+    def ejecutar_corrida(cls, corrida_id, workers=None, novedades=None):
+        """Ejecuta o reanuda una corrida de nómina desde su último punto de control.
+
+        Devuelve (resumen, errores), como liquidar_periodo.
+        """
+        try:
+            return ejecutar_corrida(corrida_id, workers, novedades), {}
+        except Exception as e:
+            return None, {"error": str(e)}
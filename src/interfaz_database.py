@@ -5,12 +5,22 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import re
+import threading
 from datetime import date, datetime
 import traceback
 
 # Importar los módulos de conexión a la base de datos y los modelos
 from model.neon_db import inicializar_pool, cerrar_pool
-from model.models import Empleado, Liquidacion, Configuracion, inicializar_tablas
+from model.models import Empleado, Liquidacion, Configuracion, CorridaNomina, inicializar_tablas, sesion
+from model.exportacion import exportar
+from controller.importacion_controller import ImportacionController
+from controller.liquidacion_controller import LiquidacionController
+from model.calculo_total import (calculo_desglose, ErrorSalarioN, ErrorDeduccionesM, ErrorHorasExtra,
+                                 ErrorHorasNegativas, ErrorBonosNegativos, ErrorDeduccionNegativa)
+
+# Errores de validación que puede lanzar el cálculo de nómina
+ERRORES_CALCULO = (ErrorSalarioN, ErrorDeduccionesM, ErrorHorasExtra,
+                   ErrorHorasNegativas, ErrorBonosNegativos, ErrorDeduccionNegativa)
 
 class InterfazSimple:
     """Interfaz de consola simplificada para gestión de datos con Neon DB"""
@@ -27,6 +37,9 @@ class InterfazSimple:
             inicializar_tablas()
             
             print("¡Conexión establecida correctamente!")
+
+            # Corridas de nómina que se ejecutan en segundo plano, por ID
+            self.corridas_en_curso = {}
         except Exception as e:
             print(f"Error al inicializar la conexión a la base de datos: {e}")
             print(traceback.format_exc())
@@ -158,20 +171,52 @@ class InterfazSimple:
             print("2. Modificar empleado")
             print("3. Buscar empleado")
             print("4. Listar todos los empleados")
+            print("5. Importar nómina desde archivo (CSV o Excel)")
             print("0. Volver al menú principal")
             
-            opcion = self.obtener_opcion(0, 4)
+            opcion = self.obtener_opcion(0, 5)
             
             if opcion == 0:
                 return
-            elif opcion == 1:
-                self.registrar_empleado()
-            elif opcion == 2:
-                self.modificar_empleado()
-            elif opcion == 3:
-                self.buscar_empleado()
-            elif opcion == 4:
-                self.listar_empleados()
+            
+            # Cada acción es una unidad de trabajo: un empleado se consulta una sola vez
+            with sesion():
+                if opcion == 1:
+                    self.registrar_empleado()
+                elif opcion == 2:
+                    self.modificar_empleado()
+                elif opcion == 3:
+                    self.buscar_empleado()
+                elif opcion == 4:
+                    self.listar_empleados()
+                elif opcion == 5:
+                    self.importar_empleados()
+    
+    def importar_empleados(self):
+        """Función para sincronizar los empleados con un archivo de nómina"""
+        self.limpiar_pantalla()
+        print("=" * 50)
+        print("IMPORTAR NÓMINA DE EMPLEADOS".center(50))
+        print("=" * 50)
+        print("\nEl archivo debe tener las columnas nombre, documento, salario_base y fecha_ingreso.")
+        
+        ruta = self.obtener_texto("Archivo a importar (.csv o .xlsx): ")
+        resumen, errores = ImportacionController.importar(ruta)
+        if resumen is None:
+            print(f"\n¡Error al importar! {'; '.join(errores.values())}")
+        else:
+            print(f"\nInsertados: {resumen['insertados']}")
+            print(f"Actualizados: {resumen['actualizados']}")
+            print(f"Sin cambios: {resumen['sin_cambios']}")
+            print(f"Repetidos en el archivo: {resumen['repetidos']}")
+            print(f"Inválidos: {resumen['invalidos']}")
+            for linea, errores_fila in list(errores.items())[:10]:
+                print(f"  Línea {linea}: {'; '.join(errores_fila.values())}")
+            if len(errores) > 10:
+                print(f"  ... y {len(errores) - 10} líneas más con errores")
+            print(f"\nImportación terminada en {resumen['segundos']:.2f} s")
+        
+        self.pausa()
     
     def registrar_empleado(self):
         """Función para registrar un nuevo empleado"""
@@ -296,10 +341,9 @@ class InterfazSimple:
                 if empleado:
                     empleados = [empleado]
             elif opcion == 3:
-                nombre_parcial = self.obtener_texto("Nombre del empleado (puede ser parcial): ").lower()
-                todos_empleados = Empleado.get_all()
-                # Filtrar los empleados cuyo nombre contiene la búsqueda
-                empleados = [e for e in todos_empleados if nombre_parcial in e.nombre.lower()]
+                nombre_parcial = self.obtener_texto("Nombre del empleado (puede ser parcial): ")
+                # La búsqueda ignora mayúsculas y tildes y ordena por parecido
+                empleados = Empleado.search(nombre_parcial)
             
             # Mostrar resultados
             if empleados:
@@ -321,10 +365,7 @@ class InterfazSimple:
         print("=" * 50)
         
         try:
-            empleados = Empleado.get_all()
-            if empleados:
-                self.mostrar_empleados(empleados)
-            else:
+            if not self.recorrer_paginas(Empleado.get_pagina, self.mostrar_empleados):
                 print("\nNo hay empleados registrados en el sistema.")
                 
         except Exception as e:
@@ -333,6 +374,25 @@ class InterfazSimple:
         
         self.pausa()
     
+    def recorrer_paginas(self, obtener_pagina, mostrar):
+        """Muestra registros página por página mientras el usuario pida más.
+
+        obtener_pagina recibe la clave de la página anterior y devuelve (registros, siguiente).
+        Devuelve False si no había ningún registro.
+        """
+        registros, siguiente = obtener_pagina(None)
+        if not registros:
+            return False
+        while True:
+            mostrar(registros)
+            if siguiente is None:
+                return True
+            if input("\nPresione Enter para ver más o 'q' para terminar: ").strip().lower() == 'q':
+                return True
+            registros, siguiente = obtener_pagina(siguiente)
+            if not registros:
+                return True
+    
     def mostrar_empleados(self, empleados):
         """Muestra una lista de empleados en formato tabular"""
         print("\n{:<5} {:<30} {:<15} {:<15} {:<12}".format("ID", "Nombre", "Documento", "Salario Base", "Fecha Ingreso"))
@@ -354,26 +414,45 @@ class InterfazSimple:
             print("1. Ver lista de empleados")
             print("2. Buscar por ID")
             print("3. Buscar por documento")
+            print("4. Buscar por inicio del nombre o documento")
             print("0. Cancelar")
             
-            opcion = self.obtener_opcion(0, 3)
+            opcion = self.obtener_opcion(0, 4)
             
             if opcion == 0:
                 return None
             
+            # Índice en memoria: evita una consulta a la base de datos por cada búsqueda
+            indice = Empleado.indice()
+            
             if opcion == 1:
-                # Mostrar lista de empleados
-                empleados = Empleado.get_all()
+                # Mostrar lista de empleados, una página a la vez
+                empleados, siguiente = Empleado.get_pagina()
                 if not empleados:
                     print("\nNo hay empleados registrados en el sistema.")
                     self.pausa()
                     continue
                 
                 self.mostrar_empleados(empleados)
-                id_empleado = self.obtener_entero("\nIngrese el ID del empleado (0 para cancelar): ")
+                while True:
+                    if siguiente is not None:
+                        respuesta = input("\nIngrese el ID del empleado (Enter para ver más, 0 para cancelar): ").strip()
+                        if not respuesta:
+                            empleados, siguiente = Empleado.get_pagina(siguiente)
+                            if empleados:
+                                self.mostrar_empleados(empleados)
+                            continue
+                    else:
+                        respuesta = input("\nIngrese el ID del empleado (0 para cancelar): ").strip()
+                    try:
+                        id_empleado = int(respuesta)
+                        break
+                    except ValueError:
+                        print("¡Error! Ingrese un número entero válido")
                 if id_empleado == 0:
                     continue
                 
+                # Dentro de una sesión, un empleado de las páginas mostradas no se vuelve a consultar
                 empleado = Empleado.get_by_id(id_empleado)
                 if empleado:
                     return empleado
@@ -384,7 +463,7 @@ class InterfazSimple:
             elif opcion == 2:
                 # Buscar por ID
                 id_empleado = self.obtener_entero("ID del empleado: ")
-                empleado = Empleado.get_by_id(id_empleado)
+                empleado = (indice and indice.por_id(id_empleado)) or Empleado.get_by_id(id_empleado)
                 if empleado:
                     return empleado
                 else:
@@ -394,12 +473,37 @@ class InterfazSimple:
             elif opcion == 3:
                 # Buscar por documento
                 documento = self.obtener_texto("Documento del empleado: ")
-                empleado = Empleado.get_by_documento(documento)
+                empleado = (indice and indice.por_documento(documento)) or Empleado.get_by_documento(documento)
                 if empleado:
                     return empleado
                 else:
                     print(f"\nNo se encontró un empleado con documento {documento}")
                     self.pausa()
+            
+            elif opcion == 4:
+                # Autocompletar con el índice en memoria
+                if indice is None:
+                    print("\nNo se pudo cargar la lista de empleados.")
+                    self.pausa()
+                    continue
+                texto = self.obtener_texto("Inicio del nombre, apellido o documento: ")
+                empleados = indice.buscar(texto)
+                if not empleados:
+                    print(f"\nNo se encontraron empleados que empiecen por '{texto}'")
+                    self.pausa()
+                    continue
+                if len(empleados) == 1:
+                    return empleados[0]
+                
+                self.mostrar_empleados(empleados)
+                id_empleado = self.obtener_entero("\nIngrese el ID del empleado (0 para cancelar): ")
+                if id_empleado == 0:
+                    continue
+                empleado = indice.por_id(id_empleado) or Empleado.get_by_id(id_empleado)
+                if empleado:
+                    return empleado
+                print(f"\nNo se encontró un empleado con ID {id_empleado}")
+                self.pausa()
     
     #=========================================================================
     # Menú y funciones para Liquidaciones
@@ -417,20 +521,118 @@ class InterfazSimple:
             print("2. Modificar liquidación")
             print("3. Buscar liquidación")
             print("4. Ver liquidaciones por empleado")
+            print("5. Exportar liquidaciones (CSV o Excel)")
+            print("6. Corridas de nómina")
             print("0. Volver al menú principal")
             
-            opcion = self.obtener_opcion(0, 4)
+            opcion = self.obtener_opcion(0, 6)
             
             if opcion == 0:
                 return
-            elif opcion == 1:
-                self.crear_liquidacion()
+            
+            # Cada acción es una unidad de trabajo: un registro se consulta una sola vez
+            with sesion():
+                if opcion == 1:
+                    self.crear_liquidacion()
+                elif opcion == 2:
+                    self.modificar_liquidacion()
+                elif opcion == 3:
+                    self.buscar_liquidacion()
+                elif opcion == 4:
+                    self.listar_liquidaciones_empleado()
+                elif opcion == 5:
+                    self.exportar_liquidaciones()
+                elif opcion == 6:
+                    self.menu_corridas()
+    
+    def menu_corridas(self):
+        """Muestra el avance de las corridas de nómina y permite iniciarlas o reanudarlas"""
+        while True:
+            self.limpiar_pantalla()
+            print("=" * 50)
+            print("CORRIDAS DE NÓMINA".center(50))
+            print("=" * 50)
+            
+            corridas = CorridaNomina.get_all()
+            if corridas:
+                print(f"\n{'ID':<5} {'Fecha':<12} {'Estado':<12} {'Avance':>8} {'Liquidados':>11} {'Errores':>8}")
+                print("-" * 60)
+                for corrida in corridas:
+                    print(f"{corrida.id:<5} {corrida.fecha_liquidacion.strftime('%Y-%m-%d'):<12} {corrida.estado:<12} "
+                          f"{corrida.progreso:>7.1f}% {corrida.liquidados:>11} {corrida.errores:>8}")
+                    if corrida.mensaje:
+                        print(f"      {corrida.mensaje}")
+            else:
+                print("\nNo hay corridas registradas.")
+            
+            print("\n1. Actualizar avance")
+            print("2. Iniciar nueva corrida")
+            print("3. Reanudar corrida")
+            print("0. Volver")
+            
+            opcion = self.obtener_opcion(0, 3)
+            if opcion == 0:
+                return
             elif opcion == 2:
-                self.modificar_liquidacion()
+                fecha = self.obtener_fecha("Fecha de la liquidación (YYYY-MM-DD): ")
+                corrida_id, errores = LiquidacionController.crear_corrida(fecha)
+                if errores:
+                    print(f"\n¡Error al crear la corrida! {errores['error']}")
+                    self.pausa()
+                    continue
+                self.ejecutar_corrida(corrida_id)
             elif opcion == 3:
-                self.buscar_liquidacion()
-            elif opcion == 4:
-                self.listar_liquidaciones_empleado()
+                corrida_id = self.obtener_entero("ID de la corrida a reanudar: ")
+                self.ejecutar_corrida(corrida_id)
+    
+    def ejecutar_corrida(self, corrida_id):
+        """Ejecuta una corrida en un hilo para poder seguir su avance desde el menú"""
+        hilo = self.corridas_en_curso.get(corrida_id)
+        if hilo and hilo.is_alive():
+            print(f"\nLa corrida {corrida_id} ya se está ejecutando.")
+            self.pausa()
+            return
+        
+        def ejecutar():
+            resumen, errores = LiquidacionController.ejecutar_corrida(corrida_id)
+            self.corridas_en_curso.pop(corrida_id, None)
+            if errores:
+                print(f"\n¡La corrida {corrida_id} se detuvo! {errores['error']}")
+        
+        # Si el programa se cierra a mitad de la corrida, se reanuda después desde este menú
+        hilo = threading.Thread(target=ejecutar, name=f"corrida-{corrida_id}", daemon=True)
+        self.corridas_en_curso[corrida_id] = hilo
+        hilo.start()
+        print(f"\nCorrida {corrida_id} en ejecución. Use 'Actualizar avance' para seguirla.")
+        self.pausa()
+    
+    def exportar_liquidaciones(self):
+        """Función para exportar liquidaciones a un archivo CSV o Excel"""
+        self.limpiar_pantalla()
+        print("=" * 50)
+        print("EXPORTAR LIQUIDACIONES".center(50))
+        print("=" * 50)
+        
+        try:
+            ruta = self.obtener_texto("Archivo de salida (.csv o .xlsx): ")
+            desde = hasta = None
+            if input("¿Filtrar por rango de fechas? (s/n): ").strip().lower() == 's':
+                desde = self.obtener_fecha("Fecha inicial (YYYY-MM-DD): ")
+                hasta = self.obtener_fecha("Fecha final (YYYY-MM-DD): ")
+            empleado_id = None
+            if input("¿Solo las de un empleado? (s/n): ").strip().lower() == 's':
+                empleado = self.seleccionar_empleado("Seleccione el empleado a exportar")
+                if not empleado:
+                    return
+                empleado_id = empleado.id
+            
+            resumen = exportar(ruta, desde=desde, hasta=hasta, empleado_id=empleado_id)
+            print(f"\n¡{resumen['filas']} liquidaciones exportadas a {ruta} "
+                  f"({resumen['filas_por_segundo']:.0f} filas/s)!")
+        except Exception as e:
+            print(f"\n¡Error al exportar liquidaciones: {e}")
+        
+        self.pausa()
     
     def crear_liquidacion(self):
         """Función para crear una nueva liquidación"""
@@ -454,45 +656,27 @@ class InterfazSimple:
             bonos_extra = self.obtener_float("Bonificaciones adicionales: ")
             deduccion_adicional = self.obtener_float("Deducciones adicionales: ")
             
-            # Calcular auxilios y valores según la configuración
-            salario_minimo = Configuracion.get_by_nombre('salario_minimo').valor
-            limite_auxilio = Configuracion.get_by_nombre('limite_smmlv_auxilio').valor
-            auxilio_transporte = Configuracion.get_by_nombre('auxilio_transporte').valor if empleado.salario_base <= (salario_minimo * limite_auxilio) else 0
-            
-            # Calcular total de nómina (simplificado)
-            valor_hora_extra = Configuracion.get_by_nombre('valor_hora_extra').valor
-            porcentaje_hora_diurna = Configuracion.get_by_nombre('porcentaje_hora_diurna').valor
-            porcentaje_hora_nocturna = Configuracion.get_by_nombre('porcentaje_hora_nocturna').valor
-            porcentaje_deducciones = Configuracion.get_by_nombre('porcentaje_deducciones').valor
-            
-            # Cálculo de horas extras
-            valor_horas_diurnas = horas_diurnas * valor_hora_extra * (1 + porcentaje_hora_diurna)
-            valor_horas_nocturnas = horas_nocturnas * valor_hora_extra * (1 + porcentaje_hora_nocturna)
-            
-            # Deducciones básicas (salud y pensión)
-            deducciones_base = empleado.salario_base * porcentaje_deducciones
-            
-            # Total de la nómina
-            total_nomina = (empleado.salario_base + valor_horas_diurnas + valor_horas_nocturnas + 
-                           bonos_extra + auxilio_transporte - deducciones_base - deduccion_adicional)
+            # Calcular la nómina con el mismo motor que usan los controladores
+            desglose = calculo_desglose(
+                empleado.salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional
+            )
             
             # Mostrar resumen de la liquidación
             print("\n--- Resumen de la Liquidación ---")
             print(f"Salario base: ${empleado.salario_base:,.0f}")
-            print(f"Valor horas extras diurnas: ${valor_horas_diurnas:,.0f}")
-            print(f"Valor horas extras nocturnas: ${valor_horas_nocturnas:,.0f}")
+            print(f"Valor horas extras: ${desglose.horas_extra:,.0f}")
             print(f"Bonificaciones: ${bonos_extra:,.0f}")
-            print(f"Auxilio de transporte: ${auxilio_transporte:,.0f}")
-            print(f"Deducciones base: ${deducciones_base:,.0f}")
+            print(f"Auxilio de transporte: ${desglose.auxilio_transporte:,.0f}")
+            print(f"Deducciones base: ${desglose.deducciones - deduccion_adicional:,.0f}")
             print(f"Deducciones adicionales: ${deduccion_adicional:,.0f}")
-            print(f"Total nómina: ${total_nomina:,.0f}")
+            print(f"Total nómina: ${desglose.total_nomina:,.0f}")
             
             confirmar = input("\n¿Desea guardar esta liquidación? (s/n): ").strip().lower()
             if confirmar == 's':
                 # Crear y guardar la liquidación
                 liquidacion = Liquidacion(
                     empleado.id, empleado.salario_base, horas_diurnas, horas_nocturnas,
-                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina
+                    bonos_extra, deduccion_adicional, desglose.auxilio_transporte, desglose.total_nomina
                 )
                 
                 if liquidacion.save():
@@ -502,6 +686,8 @@ class InterfazSimple:
             else:
                 print("\nOperación cancelada.")
                 
+        except ERRORES_CALCULO as e:
+            print(f"\n{e}")
         except Exception as e:
             print(f"\n¡Error al crear liquidación: {e}")
             print(traceback.format_exc())
@@ -520,7 +706,7 @@ class InterfazSimple:
         if liquidacion_id == 0:
             return
         
-        liquidacion = Liquidacion.get_by_id(liquidacion_id)
+        liquidacion = Liquidacion.get_by_id(liquidacion_id, incluir_empleado=True)
         if not liquidacion:
             print(f"\nNo se encontró una liquidación con ID {liquidacion_id}")
             self.pausa()
@@ -528,7 +714,7 @@ class InterfazSimple:
         
         try:
             # Mostrar información actual
-            empleado = Empleado.get_by_id(liquidacion.empleado_id)
+            empleado = liquidacion.empleado
             print(f"\nModificando liquidación ID {liquidacion.id} del empleado {empleado.nombre}")
             print(f"Fecha: {liquidacion.fecha_liquidacion}")
             print(f"Salario base: ${liquidacion.salario_base:,.0f}")
@@ -562,18 +748,12 @@ class InterfazSimple:
                 liquidacion.deduccion_adicional = self.obtener_float("Nuevas deducciones adicionales: ")
             
             # Recalcular el total de la nómina
-            valor_hora_extra = Configuracion.get_by_nombre('valor_hora_extra').valor
-            porcentaje_hora_diurna = Configuracion.get_by_nombre('porcentaje_hora_diurna').valor
-            porcentaje_hora_nocturna = Configuracion.get_by_nombre('porcentaje_hora_nocturna').valor
-            porcentaje_deducciones = Configuracion.get_by_nombre('porcentaje_deducciones').valor
-            
-            valor_horas_diurnas = liquidacion.horas_diurnas * valor_hora_extra * (1 + porcentaje_hora_diurna)
-            valor_horas_nocturnas = liquidacion.horas_nocturnas * valor_hora_extra * (1 + porcentaje_hora_nocturna)
-            deducciones_base = liquidacion.salario_base * porcentaje_deducciones
-            
-            liquidacion.total_nomina = (liquidacion.salario_base + valor_horas_diurnas + valor_horas_nocturnas + 
-                                       liquidacion.bonos_extra + liquidacion.auxilio_transporte - 
-                                       deducciones_base - liquidacion.deduccion_adicional)
+            desglose = calculo_desglose(
+                liquidacion.salario_base, liquidacion.horas_diurnas, liquidacion.horas_nocturnas,
+                liquidacion.bonos_extra, liquidacion.deduccion_adicional
+            )
+            liquidacion.auxilio_transporte = desglose.auxilio_transporte
+            liquidacion.total_nomina = desglose.total_nomina
             
             # Mostrar resumen actualizado
             print("\n--- Resumen Actualizado ---")
@@ -593,6 +773,8 @@ class InterfazSimple:
             else:
                 print("\nOperación cancelada.")
                 
+        except ERRORES_CALCULO as e:
+            print(f"\n{e}")
         except Exception as e:
             print(f"\n¡Error al modificar liquidación: {e}")
             print(traceback.format_exc())
@@ -611,9 +793,10 @@ class InterfazSimple:
             return
         
         try:
-            liquidacion = Liquidacion.get_by_id(liquidacion_id)
+            # La liquidación y su empleado se leen en una sola consulta
+            liquidacion = Liquidacion.get_by_id(liquidacion_id, incluir_empleado=True)
             if liquidacion:
-                empleado = Empleado.get_by_id(liquidacion.empleado_id)
+                empleado = liquidacion.empleado
                 
                 print("\n--- Información de la Liquidación ---")
                 print(f"ID: {liquidacion.id}")
@@ -649,24 +832,12 @@ class InterfazSimple:
             return
         
         try:
-            liquidaciones = Liquidacion.get_by_empleado(empleado.id)
-            if liquidaciones:
-                print(f"\nLiquidaciones del empleado: {empleado.nombre} (ID: {empleado.id})")
-                print("\n{:<5} {:<12} {:<15} {:<15} {:<15}".format(
-                    "ID", "Fecha", "Horas Extras", "Bonos", "Total"
-                ))
-                print("-" * 65)
-                
-                for liq in liquidaciones:
-                    horas_totales = liq.horas_diurnas + liq.horas_nocturnas
-                    print("{:<5} {:<12} {:<15} ${:<14,.0f} ${:<14,.0f}".format(
-                        liq.id,
-                        liq.fecha_liquidacion.strftime("%Y-%m-%d"),
-                        horas_totales,
-                        liq.bonos_extra,
-                        liq.total_nomina
-                    ))
-            else:
+            print(f"\nLiquidaciones del empleado: {empleado.nombre} (ID: {empleado.id})")
+            hay_liquidaciones = self.recorrer_paginas(
+                lambda despues_de: Liquidacion.get_pagina(despues_de, empleado_id=empleado.id),
+                self.mostrar_liquidaciones
+            )
+            if not hay_liquidaciones:
                 print(f"\nEl empleado {empleado.nombre} no tiene liquidaciones registradas.")
                 
         except Exception as e:
@@ -675,6 +846,23 @@ class InterfazSimple:
         
         self.pausa()
     
+    def mostrar_liquidaciones(self, liquidaciones):
+        """Muestra una lista de liquidaciones en formato tabular"""
+        print("\n{:<5} {:<12} {:<15} {:<15} {:<15}".format(
+            "ID", "Fecha", "Horas Extras", "Bonos", "Total"
+        ))
+        print("-" * 65)
+        
+        for liq in liquidaciones:
+            horas_totales = liq.horas_diurnas + liq.horas_nocturnas
+            print("{:<5} {:<12} {:<15} ${:<14,.0f} ${:<14,.0f}".format(
+                liq.id,
+                liq.fecha_liquidacion.strftime("%Y-%m-%d"),
+                horas_totales,
+                liq.bonos_extra,
+                liq.total_nomina
+            ))
+    
     #=========================================================================
     # Menú y funciones para Configuración
     #=========================================================================
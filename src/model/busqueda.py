@@ -0,0 +1,210 @@
+import copy
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+# Similitud mínima (0 a 1) para aceptar una coincidencia aproximada, igual que pg_trgm
+UMBRAL_SIMILITUD = 0.3
+
+def normalizar_texto(texto):
+    """Pasa el texto a minúsculas, sin tildes y con los espacios colapsados"""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.lower().split())
+
+def trigramas(texto):
+    """Obtiene el conjunto de trigramas del texto normalizado, con el mismo relleno que pg_trgm"""
+    resultado = set()
+    for palabra in normalizar_texto(texto).split():
+        palabra = f"  {palabra} "
+        for i in range(len(palabra) - 2):
+            resultado.add(palabra[i:i + 3])
+    return resultado
+
+def similitud(trigramas_a, trigramas_b):
+    """Proporción de trigramas compartidos entre dos conjuntos"""
+    if not trigramas_a or not trigramas_b:
+        return 0.0
+    comunes = len(trigramas_a & trigramas_b)
+    return comunes / (len(trigramas_a) + len(trigramas_b) - comunes)
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas para buscar nombres sin la base de datos.
+
+    Reproduce la búsqueda de Empleado.search cuando PostgreSQL no tiene unaccent
+    o pg_trgm: acepta nombres que contienen el texto buscado o que se le parecen,
+    sin importar mayúsculas ni tildes, y los ordena por similitud.
+    """
+
+    def __init__(self, elementos=()):
+        self._nombres = {}
+        self._trigramas = {}
+        self._indice = defaultdict(set)
+        for clave, nombre in elementos:
+            self.agregar(clave, nombre)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def agregar(self, clave, nombre):
+        """Agrega o reemplaza el nombre asociado a una clave"""
+        self.quitar(clave)
+        tri = trigramas(nombre)
+        self._nombres[clave] = normalizar_texto(nombre)
+        self._trigramas[clave] = tri
+        for t in tri:
+            self._indice[t].add(clave)
+
+    def quitar(self, clave):
+        """Quita una clave del índice si existe"""
+        tri = self._trigramas.pop(clave, None)
+        if tri is None:
+            return
+        del self._nombres[clave]
+        for t in tri:
+            claves = self._indice[t]
+            claves.discard(clave)
+            if not claves:
+                del self._indice[t]
+
+    def buscar(self, texto, limite=20):
+        """Devuelve hasta limite claves ordenadas de la más a la menos parecida al texto"""
+        buscado = normalizar_texto(texto)
+        if not buscado:
+            return []
+        tri_buscado = trigramas(buscado)
+
+        # Los candidatos comparten al menos un trigrama; con textos de menos de
+        # tres letras puede no haber ninguno y se revisan todos los nombres
+        candidatos = set()
+        for t in tri_buscado:
+            candidatos |= self._indice.get(t, set())
+        if len(buscado) < 3:
+            candidatos = self._nombres.keys()
+
+        puntuados = []
+        for clave in candidatos:
+            puntaje = similitud(tri_buscado, self._trigramas[clave])
+            if buscado in self._nombres[clave] or puntaje >= UMBRAL_SIMILITUD:
+                puntuados.append((-puntaje, self._nombres[clave], clave))
+        puntuados.sort(key=lambda p: (p[0], p[1]))
+        return [clave for _, _, clave in puntuados[:limite]]
+
+class IndiceEmpleados:
+    """Índice en memoria de los empleados para autocompletar por nombre o documento.
+
+    Los nombres normalizados (a partir de cada una de sus palabras, para que "perez"
+    encuentre a "Juan Pérez") y los documentos se guardan en listas ordenadas que se
+    consultan por prefijo con bisect; el acceso por id y por documento es un diccionario.
+    Los nombres también se indexan por trigramas para la búsqueda por similitud.
+    Guarda su propia copia de cada empleado y entrega copias en las consultas: los
+    objetos que se le pasan o que devuelve pueden modificarse sin desordenar el
+    índice hasta que se vuelvan a agregar.
+    """
+
+    def __init__(self, empleados=()):
+        self._lock = threading.Lock()
+        self._por_id = {}
+        self._por_documento = {}
+        self._claves = {}       # id -> (documento, claves de nombre) con que se indexó
+        self._nombres = []      # (nombre normalizado desde una palabra, id), ordenada
+        self._documentos = []   # (documento, id), ordenada
+        self._similares = IndiceTrigramas()
+        for empleado in empleados:
+            empleado = copy.copy(empleado)
+            claves_nombre = self._claves_nombre(empleado)
+            self._por_id[empleado.id] = empleado
+            self._por_documento[empleado.documento] = empleado
+            self._claves[empleado.id] = (empleado.documento, claves_nombre)
+            self._nombres.extend((clave, empleado.id) for clave in claves_nombre)
+            self._documentos.append((empleado.documento, empleado.id))
+            self._similares.agregar(empleado.id, empleado.nombre)
+        # Ordenar una sola vez es más rápido que insertar ordenado fila por fila
+        self._nombres.sort()
+        self._documentos.sort()
+
+    def __len__(self):
+        return len(self._por_id)
+
+    @staticmethod
+    def _claves_nombre(empleado):
+        palabras = normalizar_texto(empleado.nombre).split()
+        return [' '.join(palabras[i:]) for i in range(len(palabras))]
+
+    @staticmethod
+    def _quitar_de_lista(lista, elemento):
+        posicion = bisect_left(lista, elemento)
+        if posicion < len(lista) and lista[posicion] == elemento:
+            del lista[posicion]
+
+    def _quitar(self, id):
+        empleado = self._por_id.pop(id, None)
+        if empleado is None:
+            return
+        # Las claves guardadas al indexar, no los campos actuales del objeto
+        documento, claves_nombre = self._claves.pop(id)
+        if self._por_documento.get(documento) is empleado:
+            del self._por_documento[documento]
+        for clave in claves_nombre:
+            self._quitar_de_lista(self._nombres, (clave, id))
+        self._quitar_de_lista(self._documentos, (documento, id))
+        self._similares.quitar(id)
+
+    def agregar(self, empleado):
+        """Agrega un empleado o reemplaza la versión que ya estaba indexada"""
+        empleado = copy.copy(empleado)
+        with self._lock:
+            self._quitar(empleado.id)
+            claves_nombre = self._claves_nombre(empleado)
+            self._por_id[empleado.id] = empleado
+            self._por_documento[empleado.documento] = empleado
+            self._claves[empleado.id] = (empleado.documento, claves_nombre)
+            for clave in claves_nombre:
+                insort(self._nombres, (clave, empleado.id))
+            insort(self._documentos, (empleado.documento, empleado.id))
+            self._similares.agregar(empleado.id, empleado.nombre)
+
+    def quitar(self, id):
+        """Quita un empleado del índice si existe"""
+        with self._lock:
+            self._quitar(id)
+
+    def por_id(self, id):
+        """Devuelve una copia del empleado con ese ID o None"""
+        empleado = self._por_id.get(id)
+        return copy.copy(empleado) if empleado is not None else None
+
+    def por_documento(self, documento):
+        """Devuelve una copia del empleado con ese documento o None"""
+        empleado = self._por_documento.get(documento)
+        return copy.copy(empleado) if empleado is not None else None
+
+    @staticmethod
+    def _con_prefijo(lista, prefijo):
+        posicion = bisect_left(lista, (prefijo,))
+        while posicion < len(lista) and lista[posicion][0].startswith(prefijo):
+            yield lista[posicion][1]
+            posicion += 1
+
+    def buscar(self, texto, limite=10):
+        """Devuelve hasta limite empleados cuyo documento o alguna palabra del nombre empieza por texto"""
+        prefijo = normalizar_texto(texto)
+        if not prefijo:
+            return []
+        resultados = []
+        vistos = set()
+        with self._lock:
+            for lista, buscado in ((self._documentos, texto.strip()), (self._nombres, prefijo)):
+                for id in self._con_prefijo(lista, buscado):
+                    if id not in vistos:
+                        vistos.add(id)
+                        resultados.append(copy.copy(self._por_id[id]))
+                        if len(resultados) >= limite:
+                            return resultados
+        return resultados
+
+    def buscar_similares(self, texto, limite=20):
+        """Devuelve hasta limite empleados cuyo nombre contiene el texto o se le parece (ver IndiceTrigramas)"""
+        with self._lock:
+            return [copy.copy(self._por_id[id]) for id in self._similares.buscar(texto, limite)]
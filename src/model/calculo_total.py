@@ -1,6 +1,13 @@
 import sys
+import os
+import threading
+from collections import OrderedDict
 sys.path.append("src")
-from model.neon_db import obtener_configuracion, registrar_liquidacion
+try:
+    import numpy as np
+except ImportError:  # NumPy solo es necesario para el cálculo por lotes
+    np = None
+from model.neon_db import obtener_configuraciones, registrar_liquidacion, version_configuracion
 
 class ErrorSalarioN(Exception):
     """¡Error salario negativo! Ingresaste el dato del salario base negativo, por favor ingreselo correctamente"""
@@ -20,75 +27,211 @@ class ErrorBonosNegativos(Exception):
 class ErrorDeduccionNegativa(Exception):
     """¡Error deducción adicional negativa! El valor de la deducción adicional no puede ser negativo."""
 
+# Códigos de error por fila del validador por lotes (0 = fila válida).
+# El orden sigue la prioridad con que calculo_total lanza las excepciones.
+ERROR_NINGUNO = 0
+ERROR_BONOS_NEGATIVOS = 1
+ERROR_HORAS_NEGATIVAS = 2
+ERROR_HORAS_EXTRA = 3
+ERROR_SALARIO_NEGATIVO = 4
+ERROR_DEDUCCION_NEGATIVA = 5
+ERROR_DEDUCCIONES_MAXIMAS = 6
+
+# Excepción equivalente a cada código de error
+EXCEPCIONES_POR_CODIGO = {
+    ERROR_BONOS_NEGATIVOS: ErrorBonosNegativos,
+    ERROR_HORAS_NEGATIVAS: ErrorHorasNegativas,
+    ERROR_HORAS_EXTRA: ErrorHorasExtra,
+    ERROR_SALARIO_NEGATIVO: ErrorSalarioN,
+    ERROR_DEDUCCION_NEGATIVA: ErrorDeduccionNegativa,
+    ERROR_DEDUCCIONES_MAXIMAS: ErrorDeduccionesM
+}
+
+# Valores por defecto cuando un parámetro no existe en la base de datos
+PARAMETROS_POR_DEFECTO = {
+    'valor_hora_extra': 6189,
+    'porcentaje_hora_diurna': 0.25,
+    'porcentaje_hora_nocturna': 0.75,
+    'limite_smmlv_auxilio': 2,
+    'salario_minimo': 1300000,
+    'auxilio_transporte': 162000,
+    'porcentaje_deducciones': 0.08,
+    'limite_horas_extra': 90,
+    'porcentaje_maximo_deducciones': 0.4
+}
+
+# Desgloses que recuerda calculo_desglose (0 desactiva la memoria)
+TAMANO_MEMO_CALCULO = int(os.environ.get('NOMINA_MEMO_CALCULO', 4096))
+
+class ParametrosNomina:
+    """Instantánea inmutable de los parámetros de configuración usados en el cálculo.
+
+    Dos instantáneas con los mismos valores son iguales y tienen el mismo hash.
+    """
+
+    __slots__ = tuple(PARAMETROS_POR_DEFECTO) + ('_valores',)
+
+    def __init__(self, **valores):
+        for nombre, valor_defecto in PARAMETROS_POR_DEFECTO.items():
+            valor = valores.get(nombre)
+            object.__setattr__(self, nombre, valor_defecto if valor is None else valor)
+        object.__setattr__(self, '_valores', tuple(getattr(self, nombre) for nombre in PARAMETROS_POR_DEFECTO))
+
+    def __eq__(self, otro):
+        if not isinstance(otro, ParametrosNomina):
+            return NotImplemented
+        return self._valores == otro._valores
+
+    def __hash__(self):
+        return hash(self._valores)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("Los parámetros de nómina no se pueden modificar")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("Los parámetros de nómina no se pueden modificar")
+
+    def __repr__(self):
+        return f"ParametrosNomina({self.como_dict()})"
+
+    # Necesarios para enviar la instantánea a otros procesos con pickle: el
+    # mecanismo por defecto restaura los atributos con setattr, que está bloqueado
+    def __getstate__(self):
+        return self.como_dict()
+
+    def __setstate__(self, estado):
+        self.__init__(**estado)
+
+    @classmethod
+    def cargar(cls):
+        """Carga todos los parámetros desde la base de datos con una sola consulta"""
+        try:
+            return cls(**obtener_configuraciones())
+        except Exception as e:
+            print(f"Error obteniendo configuración: {e}")
+            # Si hay error, usar valores por defecto
+            return cls()
+
+    def como_dict(self):
+        """Devuelve los parámetros como diccionario"""
+        return dict(zip(PARAMETROS_POR_DEFECTO, self._valores))
+
 def obtener_parametros_configuracion():
     """Obtiene los parámetros de configuración desde la base de datos"""
-    try:
-        valor_hora_extra = obtener_configuracion('valor_hora_extra')
-        porcentaje_hora_diurna = obtener_configuracion('porcentaje_hora_diurna')
-        porcentaje_hora_nocturna = obtener_configuracion('porcentaje_hora_nocturna')
-        limite_smmlv_auxilio = obtener_configuracion('limite_smmlv_auxilio')
-        salario_minimo = obtener_configuracion('salario_minimo')
-        auxilio_transporte = obtener_configuracion('auxilio_transporte')
-        porcentaje_deducciones = obtener_configuracion('porcentaje_deducciones')
-        limite_horas_extra = obtener_configuracion('limite_horas_extra')
-        porcentaje_maximo_deducciones = obtener_configuracion('porcentaje_maximo_deducciones')
-        
-        # Si algún valor no existe en la base de datos, usar valores por defecto
-        if valor_hora_extra is None:
-            valor_hora_extra = 6189
-        if porcentaje_hora_diurna is None:
-            porcentaje_hora_diurna = 0.25
-        if porcentaje_hora_nocturna is None:
-            porcentaje_hora_nocturna = 0.75
-        if limite_smmlv_auxilio is None:
-            limite_smmlv_auxilio = 2
-        if salario_minimo is None:
-            salario_minimo = 1300000
-        if auxilio_transporte is None:
-            auxilio_transporte = 162000
-        if porcentaje_deducciones is None:
-            porcentaje_deducciones = 0.08
-        if limite_horas_extra is None:
-            limite_horas_extra = 90
-        if porcentaje_maximo_deducciones is None:
-            porcentaje_maximo_deducciones = 0.4
-            
-        return {
-            'valor_hora_extra': valor_hora_extra,
-            'porcentaje_hora_diurna': porcentaje_hora_diurna,
-            'porcentaje_hora_nocturna': porcentaje_hora_nocturna,
-            'limite_smmlv_auxilio': limite_smmlv_auxilio,
-            'salario_minimo': salario_minimo,
-            'auxilio_transporte': auxilio_transporte,
-            'porcentaje_deducciones': porcentaje_deducciones,
-            'limite_horas_extra': limite_horas_extra,
-            'porcentaje_maximo_deducciones': porcentaje_maximo_deducciones
-        }
-    except Exception as e:
-        print(f"Error obteniendo configuración: {e}")
-        # Si hay error, usar valores por defecto
-        return {
-            'valor_hora_extra': 6189,
-            'porcentaje_hora_diurna': 0.25,
-            'porcentaje_hora_nocturna': 0.75,
-            'limite_smmlv_auxilio': 2,
-            'salario_minimo': 1300000,
-            'auxilio_transporte': 162000,
-            'porcentaje_deducciones': 0.08,
-            'limite_horas_extra': 90,
-            'porcentaje_maximo_deducciones': 0.4
-        }
-
-def validaciones(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional):
-    """Realiza las validaciones necesarias para el cálculo de nómina"""
-    config = obtener_parametros_configuracion()
-    
+    return ParametrosNomina.cargar().como_dict()
+
+class DesgloseNomina:
+    """Resultado inmutable de un cálculo de nómina con cada uno de sus componentes"""
+
+    __slots__ = ('horas_extra', 'auxilio_transporte', 'bonos', 'deducciones', 'total_nomina')
+
+    def __init__(self, horas_extra, auxilio_transporte, bonos, deducciones, total_nomina):
+        object.__setattr__(self, 'horas_extra', horas_extra)
+        object.__setattr__(self, 'auxilio_transporte', auxilio_transporte)
+        object.__setattr__(self, 'bonos', bonos)
+        object.__setattr__(self, 'deducciones', deducciones)
+        object.__setattr__(self, 'total_nomina', total_nomina)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("El desglose de nómina no se puede modificar")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("El desglose de nómina no se puede modificar")
+
+    def __repr__(self):
+        return (f"DesgloseNomina(horas_extra={self.horas_extra}, auxilio_transporte={self.auxilio_transporte}, "
+                f"bonos={self.bonos}, deducciones={self.deducciones}, total_nomina={self.total_nomina})")
+
+class _MemoCalculo:
+    """Memoria LRU de desgloses indexada por las cinco entradas y los parámetros.
+
+    Como los parámetros son parte de la llave, un cambio de configuración nunca
+    devuelve un desglose viejo; además la memoria se vacía cuando cambia la
+    versión de la configuración para no guardar entradas que ya no se usarán.
+    """
+
+    def __init__(self, tamano):
+        self.tamano = tamano
+        self._desgloses = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = version_configuracion()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _revisar_version(self):
+        version = version_configuracion()
+        if version != self._version:
+            self._desgloses.clear()
+            self._version = version
+
+    def obtener(self, llave):
+        with self._lock:
+            self._revisar_version()
+            desglose = self._desgloses.get(llave)
+            if desglose is None:
+                self.fallos += 1
+                return None
+            self._desgloses.move_to_end(llave)
+            self.aciertos += 1
+            return desglose
+
+    def guardar(self, llave, desglose):
+        if self.tamano <= 0:
+            return
+        with self._lock:
+            self._revisar_version()
+            self._desgloses[llave] = desglose
+            self._desgloses.move_to_end(llave)
+            if len(self._desgloses) > self.tamano:
+                self._desgloses.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._desgloses.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+                'entradas': len(self._desgloses),
+                'tamano': self.tamano
+            }
+
+_memo_calculo = _MemoCalculo(TAMANO_MEMO_CALCULO)
+
+def _reiniciar_memo_en_hijo():
+    """Tras un fork el hijo empieza con una memoria vacía y su propio lock.
+
+    Si otro hilo del padre tenía tomado el lock al momento del fork, en el hijo
+    quedaría tomado para siempre, como el _pool_lock de neon_db.
+    """
+    global _memo_calculo
+    _memo_calculo = _MemoCalculo(_memo_calculo.tamano)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_memo_en_hijo)
+
+def estadisticas_memo_calculo():
+    """Devuelve aciertos, fallos, tasa de aciertos y ocupación de la memoria de cálculos"""
+    return _memo_calculo.estadisticas()
+
+def limpiar_memo_calculo():
+    """Vacía la memoria de cálculos y reinicia sus contadores"""
+    _memo_calculo.limpiar()
+
+def _validar_entradas(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional, parametros):
+    """Valida los datos de entrada que no dependen de valores calculados"""
     # Validar horas extra
     if horas_diurnas < 0 or horas_nocturnas < 0:
         raise ErrorHorasNegativas("¡Error horas negativas! No puede ingresar una cantidad de horas extra negativa.")
     
-    if horas_diurnas + horas_nocturnas >= config['limite_horas_extra']:
-        raise ErrorHorasExtra(f"¡Error horas extra superior o igual a {config['limite_horas_extra']}! Sus horas extras son mayores o iguales a {config['limite_horas_extra']}, lo cual no está permitido. Por favor verifique y corrija.")
+    if horas_diurnas + horas_nocturnas >= parametros.limite_horas_extra:
+        raise ErrorHorasExtra(f"¡Error horas extra superior o igual a {parametros.limite_horas_extra}! Sus horas extras son mayores o iguales a {parametros.limite_horas_extra}, lo cual no está permitido. Por favor verifique y corrija.")
 
     # Validar salario base
     if salario_base < 0:
@@ -98,25 +241,38 @@ def validaciones(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicion
     if deduccion_adicional < 0:
         raise ErrorDeduccionNegativa("¡Error deducción adicional negativa! El valor de la deducción adicional no puede ser negativo.")
 
-    # Calcular valores para verificar deducciones
-    horas_extra = ((horas_diurnas * config['valor_hora_extra']) * config['porcentaje_hora_diurna']) + \
-                 ((horas_nocturnas * config['valor_hora_extra']) * config['porcentaje_hora_nocturna'])
-    
-    # Calcular auxilio de transporte
-    auxilio_transporte = 0
-    if salario_base < (config['salario_minimo'] * config['limite_smmlv_auxilio']):
-        auxilio_transporte = config['auxilio_transporte']
-    
-    bonos = auxilio_transporte + 0  # Suposición de que bonos_extra es 0 por ahora
-    deducciones = ((salario_base + horas_extra + bonos) * config['porcentaje_deducciones']) + deduccion_adicional
+def _calcular_horas_extra(horas_diurnas, horas_nocturnas, parametros):
+    """Calcula el valor de las horas extra diurnas y nocturnas"""
+    return ((horas_diurnas * parametros.valor_hora_extra) * parametros.porcentaje_hora_diurna) + \
+           ((horas_nocturnas * parametros.valor_hora_extra) * parametros.porcentaje_hora_nocturna)
+
+def _calcular_auxilio_transporte(salario_base, parametros):
+    """Calcula el auxilio de transporte según el límite en salarios mínimos"""
+    if salario_base < (parametros.salario_minimo * parametros.limite_smmlv_auxilio):
+        return parametros.auxilio_transporte
+    return 0
+
+def _validar_deducciones(salario_base, horas_extra, auxilio_transporte, deduccion_adicional, parametros):
+    """Verifica que las deducciones no superen el porcentaje máximo del salario base"""
+    # La validación no incluye los bonos extra, solo el auxilio de transporte
+    deducciones = ((salario_base + horas_extra + auxilio_transporte) * parametros.porcentaje_deducciones) + deduccion_adicional
     
-    # Las deducciones no pueden ser mayor al porcentaje máximo del salario base
-    if deducciones > (salario_base * config['porcentaje_maximo_deducciones']):
-        raise ErrorDeduccionesM(f"¡Error deducciones mayores al {config['porcentaje_maximo_deducciones']*100}%! Sus deducciones son mayores al {config['porcentaje_maximo_deducciones']*100}% del salario, por favor verifique y corrija.")
+    if deducciones > (salario_base * parametros.porcentaje_maximo_deducciones):
+        raise ErrorDeduccionesM(f"¡Error deducciones mayores al {parametros.porcentaje_maximo_deducciones*100}%! Sus deducciones son mayores al {parametros.porcentaje_maximo_deducciones*100}% del salario, por favor verifique y corrija.")
 
-def calculo_total(salario_base: float, horas_diurnas: int, horas_nocturnas: int, bonos_extra: float, deduccion_adicional: float, empleado_id=None):
+def validaciones(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional, parametros=None):
+    """Realiza las validaciones necesarias para el cálculo de nómina"""
+    if parametros is None:
+        parametros = ParametrosNomina.cargar()
+
+    _validar_entradas(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional, parametros)
+    horas_extra = _calcular_horas_extra(horas_diurnas, horas_nocturnas, parametros)
+    auxilio_transporte = _calcular_auxilio_transporte(salario_base, parametros)
+    _validar_deducciones(salario_base, horas_extra, auxilio_transporte, deduccion_adicional, parametros)
+
+def calculo_desglose(salario_base: float, horas_diurnas: int, horas_nocturnas: int, bonos_extra: float, deduccion_adicional: float, parametros=None):
     """
-    Calcula el total de la nómina
+    Valida y calcula la nómina devolviendo todos sus componentes
     
     Args:
         salario_base: Salario base del empleado
@@ -124,32 +280,60 @@ def calculo_total(salario_base: float, horas_diurnas: int, horas_nocturnas: int,
         horas_nocturnas: Número de horas extras nocturnas
         bonos_extra: Bonificaciones adicionales
         deduccion_adicional: Deducciones adicionales
-        empleado_id: ID del empleado en la base de datos (opcional)
+        parametros: Instantánea ParametrosNomina a usar (opcional, se carga si no se indica)
         
     Returns:
-        float: El valor total de la nómina
+        DesgloseNomina: horas extra, auxilio de transporte, bonos, deducciones y total.
+        Los desgloses se recuerdan por entradas y parámetros (ver estadisticas_memo_calculo).
     """
     if bonos_extra < 0:
         raise ErrorBonosNegativos("¡Error bonos negativos! El valor de los bonos adicionales no puede ser negativo.")
 
-    validaciones(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional)
-    
-    # Obtener parámetros de configuración
-    config = obtener_parametros_configuracion()
+    # Obtener parámetros de configuración una sola vez para todo el cálculo
+    if parametros is None:
+        parametros = ParametrosNomina.cargar()
 
-    # Si pasa la validación, realizamos el cálculo
-    horas_extra = ((horas_diurnas * config['valor_hora_extra']) * config['porcentaje_hora_diurna']) + \
-                 ((horas_nocturnas * config['valor_hora_extra']) * config['porcentaje_hora_nocturna'])
-    
-    # Calcular auxilio de transporte
-    auxilio_transporte = 0
-    if salario_base < (config['salario_minimo'] * config['limite_smmlv_auxilio']):
-        auxilio_transporte = config['auxilio_transporte']
+    # Muchos empleados comparten las mismas entradas, y las vistas previas repiten cálculos
+    llave = (salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional, parametros)
+    desglose = _memo_calculo.obtener(llave)
+    if desglose is None:
+        desglose = _calcular_desglose(salario_base, horas_diurnas, horas_nocturnas, bonos_extra,
+                                      deduccion_adicional, parametros)
+        _memo_calculo.guardar(llave, desglose)
+    return desglose
+
+def _calcular_desglose(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional, parametros):
+    """Calcula el desglose sin pasar por la memoria; los errores de validación no se recuerdan"""
+    # Las validaciones reutilizan los valores calculados en lugar de repetirlos
+    _validar_entradas(salario_base, horas_diurnas, horas_nocturnas, deduccion_adicional, parametros)
+    horas_extra = _calcular_horas_extra(horas_diurnas, horas_nocturnas, parametros)
+    auxilio_transporte = _calcular_auxilio_transporte(salario_base, parametros)
+    _validar_deducciones(salario_base, horas_extra, auxilio_transporte, deduccion_adicional, parametros)
 
     bonos = auxilio_transporte + bonos_extra
-    deducciones = ((salario_base + horas_extra + bonos) * config['porcentaje_deducciones']) + deduccion_adicional
+    deducciones = ((salario_base + horas_extra + bonos) * parametros.porcentaje_deducciones) + deduccion_adicional
     
     total_nomina = salario_base + horas_extra + bonos - deducciones
+
+    return DesgloseNomina(horas_extra, auxilio_transporte, bonos, deducciones, total_nomina)
+
+def calculo_total(salario_base: float, horas_diurnas: int, horas_nocturnas: int, bonos_extra: float, deduccion_adicional: float, empleado_id=None, parametros=None):
+    """
+    Calcula el total de la nómina
+    
+    Args:
+        salario_base: Salario base del empleado
+        horas_diurnas: Número de horas extras diurnas
+        horas_nocturnas: Número de horas extras nocturnas
+        bonos_extra: Bonificaciones adicionales
+        deduccion_adicional: Deducciones adicionales
+        empleado_id: ID del empleado en la base de datos (opcional)
+        parametros: Instantánea ParametrosNomina a usar (opcional, se carga si no se indica)
+        
+    Returns:
+        float: El valor total de la nómina
+    """
+    desglose = calculo_desglose(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional, parametros)
     
     # Si se proporciona el ID del empleado, registrar la liquidación en la base de datos
     if empleado_id:
@@ -161,10 +345,112 @@ def calculo_total(salario_base: float, horas_diurnas: int, horas_nocturnas: int,
                 horas_nocturnas=horas_nocturnas,
                 bonos_extra=bonos_extra,
                 deduccion_adicional=deduccion_adicional,
-                auxilio_transporte=auxilio_transporte,
-                total_nomina=total_nomina
+                auxilio_transporte=desglose.auxilio_transporte,
+                total_nomina=desglose.total_nomina
             )
         except Exception as e:
             print(f"Error al registrar la liquidación en la base de datos: {e}")
     
-    return total_nomina
\ No newline at end of file
+    return desglose.total_nomina
+
+def mensaje_error_lote(codigo):
+    """Devuelve el mensaje de error correspondiente a un código del validador por lotes"""
+    excepcion = EXCEPCIONES_POR_CODIGO.get(int(codigo))
+    return excepcion.__doc__ if excepcion else ""
+
+def _preparar_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional):
+    """Convierte las columnas de entrada en arreglos float64 de igual tamaño"""
+    if np is None:
+        raise ImportError("El cálculo por lotes requiere NumPy (pip install numpy)")
+    return np.broadcast_arrays(
+        *(np.asarray(columna, dtype=np.float64) for columna in
+          (salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional))
+    )
+
+def _horas_extra_y_auxilio_lote(salario_base, horas_diurnas, horas_nocturnas, parametros):
+    """Calcula el valor de las horas extra y el auxilio de transporte de un lote"""
+    # Mismo orden de operaciones que calculo_total para obtener resultados idénticos
+    horas_extra = ((horas_diurnas * parametros.valor_hora_extra) * parametros.porcentaje_hora_diurna) + \
+                  ((horas_nocturnas * parametros.valor_hora_extra) * parametros.porcentaje_hora_nocturna)
+
+    limite_auxilio = parametros.salario_minimo * parametros.limite_smmlv_auxilio
+    auxilio_transporte = np.where(salario_base < limite_auxilio, float(parametros.auxilio_transporte), 0.0)
+    return horas_extra, auxilio_transporte
+
+def _codigos_error_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional,
+                        horas_extra, auxilio_transporte, parametros):
+    """Evalúa las reglas de validaciones sobre todo el lote y devuelve un código por fila"""
+    deducciones = ((salario_base + horas_extra + auxilio_transporte) * parametros.porcentaje_deducciones) + deduccion_adicional
+    reglas = [
+        (ERROR_BONOS_NEGATIVOS, bonos_extra < 0),
+        (ERROR_HORAS_NEGATIVAS, (horas_diurnas < 0) | (horas_nocturnas < 0)),
+        (ERROR_HORAS_EXTRA, horas_diurnas + horas_nocturnas >= parametros.limite_horas_extra),
+        (ERROR_SALARIO_NEGATIVO, salario_base < 0),
+        (ERROR_DEDUCCION_NEGATIVA, deduccion_adicional < 0),
+        (ERROR_DEDUCCIONES_MAXIMAS, deducciones > salario_base * parametros.porcentaje_maximo_deducciones)
+    ]
+    # np.select toma la primera regla que se cumple, igual que el orden de las excepciones
+    return np.select([condicion for _, condicion in reglas],
+                     [codigo for codigo, _ in reglas],
+                     default=ERROR_NINGUNO).astype(np.int8)
+
+def validar_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional, parametros=None):
+    """
+    Valida un lote completo sin lanzar excepciones
+    
+    Aplica las mismas reglas que validaciones y calculo_total (horas negativas, límite de
+    horas extra, salario negativo, deducciones mayores al máximo, etc.) a todas las filas.
+    
+    Returns:
+        numpy.ndarray: Un código int8 por fila (ERROR_NINGUNO si la fila es válida).
+        mensaje_error_lote traduce cada código a su mensaje.
+    """
+    columnas = _preparar_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
+    if parametros is None:
+        parametros = ParametrosNomina.cargar()
+
+    salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional = columnas
+    horas_extra, auxilio_transporte = _horas_extra_y_auxilio_lote(salario_base, horas_diurnas, horas_nocturnas, parametros)
+    return _codigos_error_lote(*columnas, horas_extra, auxilio_transporte, parametros)
+
+def calculo_total_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional, parametros=None):
+    """
+    Calcula la nómina de un lote de empleados de forma vectorizada
+    
+    Args:
+        salario_base: Arreglo con el salario base de cada empleado
+        horas_diurnas: Arreglo con las horas extras diurnas
+        horas_nocturnas: Arreglo con las horas extras nocturnas
+        bonos_extra: Arreglo con las bonificaciones adicionales
+        deduccion_adicional: Arreglo con las deducciones adicionales
+        parametros: Instantánea ParametrosNomina para todo el lote (opcional, se carga una vez)
+        
+    Returns:
+        tuple: (resultados, errores). resultados es un diccionario de arreglos con
+        horas_extra, auxilio_transporte, bonos, deducciones, total_nomina y codigo_error;
+        errores es una máscara booleana con True en las filas que no pasan las
+        validaciones de calculo_total. El total_nomina de esas filas es NaN.
+    """
+    columnas = _preparar_lote(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
+    if parametros is None:
+        parametros = ParametrosNomina.cargar()
+
+    salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional = columnas
+    horas_extra, auxilio_transporte = _horas_extra_y_auxilio_lote(salario_base, horas_diurnas, horas_nocturnas, parametros)
+
+    bonos = auxilio_transporte + bonos_extra
+    deducciones = ((salario_base + horas_extra + bonos) * parametros.porcentaje_deducciones) + deduccion_adicional
+    total_nomina = salario_base + horas_extra + bonos - deducciones
+
+    codigos_error = _codigos_error_lote(*columnas, horas_extra, auxilio_transporte, parametros)
+    errores = codigos_error != ERROR_NINGUNO
+
+    resultados = {
+        'horas_extra': horas_extra,
+        'auxilio_transporte': auxilio_transporte,
+        'bonos': bonos,
+        'deducciones': deducciones,
+        'total_nomina': np.where(errores, np.nan, total_nomina),
+        'codigo_error': codigos_error
+    }
+    return resultados, errores
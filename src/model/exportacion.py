@@ -0,0 +1,143 @@
+import sys
+import os
+import argparse
+import time
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+try:
+    import openpyxl
+except ImportError:  # openpyxl solo es necesario para exportar a Excel
+    openpyxl = None
+from model.neon_db import conexion, iterar_consulta
+
+# Encabezados de las columnas exportadas, en el orden del SELECT
+COLUMNAS_LIQUIDACION = ['id', 'empleado_id', 'fecha_liquidacion', 'salario_base', 'horas_diurnas',
+                        'horas_nocturnas', 'bonos_extra', 'deduccion_adicional', 'auxilio_transporte',
+                        'total_nomina']
+COLUMNAS_EMPLEADO = ['nombre', 'documento']
+
+FORMATOS = ('csv', 'xlsx')
+
+def _consulta_exportacion(desde=None, hasta=None, empleado_id=None, incluir_empleado=True):
+    """Arma el SELECT de la exportación y sus parámetros"""
+    columnas = [f"l.{columna}" for columna in COLUMNAS_LIQUIDACION]
+    desde_tabla = "liquidaciones l"
+    if incluir_empleado:
+        columnas += [f"e.{columna}" for columna in COLUMNAS_EMPLEADO]
+        desde_tabla += " LEFT JOIN empleados e ON e.id = l.empleado_id"
+
+    condiciones = []
+    parametros = []
+    if desde is not None:
+        condiciones.append("l.fecha_liquidacion >= %s")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append("l.fecha_liquidacion <= %s")
+        parametros.append(hasta)
+    if empleado_id is not None:
+        condiciones.append("l.empleado_id = %s")
+        parametros.append(empleado_id)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    consulta = f"""
+        SELECT {', '.join(columnas)}
+        FROM {desde_tabla}
+        {where}
+        ORDER BY l.fecha_liquidacion, l.id
+    """
+    return consulta, parametros
+
+def _encabezados(incluir_empleado):
+    return COLUMNAS_LIQUIDACION + (COLUMNAS_EMPLEADO if incluir_empleado else [])
+
+def _resumen(filas, inicio):
+    segundos = time.perf_counter() - inicio
+    return {
+        'filas': filas,
+        'segundos': segundos,
+        'filas_por_segundo': filas / segundos if segundos > 0 else 0.0
+    }
+
+class _DestinoContado:
+    """Pasa a un archivo binario lo que escribe COPY, contando las filas.
+
+    PostgreSQL envía cada fila de COPY ... TO STDOUT en un mensaje propio, así que
+    cada llamada a write es una fila (o el encabezado).
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.mensajes = 0
+
+    def write(self, datos):
+        self.archivo.write(datos)
+        self.mensajes += 1
+
+def exportar_csv(archivo, desde=None, hasta=None, empleado_id=None, incluir_empleado=True):
+    """Exporta liquidaciones a CSV con COPY ... TO STDOUT.
+
+    archivo es un archivo abierto en modo binario ('wb'). El servidor genera el CSV
+    y cada fila se escribe en cuanto llega, así que la memoria usada no depende de
+    la cantidad de filas. Devuelve un resumen con filas, segundos y filas_por_segundo.
+    """
+    consulta, parametros = _consulta_exportacion(desde, hasta, empleado_id, incluir_empleado)
+    destino = _DestinoContado(archivo)
+    inicio = time.perf_counter()
+    with conexion() as conn, conn.cursor() as cursor:
+        consulta = cursor.mogrify(consulta, parametros)
+        cursor.copy_expert(b"COPY (" + consulta + b") TO STDOUT WITH (FORMAT csv, HEADER)", destino)
+    # El primer mensaje es la fila de encabezados
+    return _resumen(max(destino.mensajes - 1, 0), inicio)
+
+def exportar_xlsx(archivo, desde=None, hasta=None, empleado_id=None, incluir_empleado=True, itersize=None):
+    """Exporta liquidaciones a un libro de Excel en modo de solo escritura.
+
+    Las filas se leen con un cursor del lado del servidor y openpyxl las escribe
+    a disco a medida que se agregan, así que la memoria usada no depende de la
+    cantidad de filas. archivo puede ser una ruta o un archivo binario.
+    Devuelve un resumen con filas, segundos y filas_por_segundo.
+    """
+    if openpyxl is None:
+        raise ImportError("La exportación a Excel requiere openpyxl (pip install openpyxl)")
+    consulta, parametros = _consulta_exportacion(desde, hasta, empleado_id, incluir_empleado)
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet("Liquidaciones")
+    hoja.append(_encabezados(incluir_empleado))
+
+    inicio = time.perf_counter()
+    filas = 0
+    for fila in iterar_consulta(consulta, parametros, itersize=itersize):
+        hoja.append(fila)
+        filas += 1
+    libro.save(archivo)
+    return _resumen(filas, inicio)
+
+def exportar(ruta, formato=None, desde=None, hasta=None, empleado_id=None, incluir_empleado=True):
+    """Exporta liquidaciones a la ruta indicada; el formato se deduce de la extensión si no se da"""
+    formato = formato or os.path.splitext(ruta)[1].lstrip('.').lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato} (use {' o '.join(FORMATOS)})")
+    if formato == 'xlsx' and openpyxl is None:
+        raise ImportError("La exportación a Excel requiere openpyxl (pip install openpyxl)")
+    with open(ruta, 'wb') as archivo:
+        if formato == 'csv':
+            return exportar_csv(archivo, desde, hasta, empleado_id, incluir_empleado)
+        return exportar_xlsx(archivo, desde, hasta, empleado_id, incluir_empleado)
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Exporta las liquidaciones de nómina a CSV o Excel")
+    parser.add_argument('ruta', help="Archivo de salida (.csv o .xlsx)")
+    parser.add_argument('--formato', choices=FORMATOS, help="Formato de salida; por defecto según la extensión")
+    parser.add_argument('--desde', type=date.fromisoformat, help="Fecha inicial YYYY-MM-DD (inclusiva)")
+    parser.add_argument('--hasta', type=date.fromisoformat, help="Fecha final YYYY-MM-DD (inclusiva)")
+    parser.add_argument('--empleado', type=int, help="Exportar solo las liquidaciones de este ID de empleado")
+    parser.add_argument('--sin-empleado', action='store_true', help="No incluir el nombre y documento del empleado")
+    args = parser.parse_args(argumentos)
+
+    resumen = exportar(args.ruta, args.formato, args.desde, args.hasta, args.empleado, not args.sin_empleado)
+    print(f"{resumen['filas']} liquidaciones exportadas a {args.ruta} en {resumen['segundos']:.2f} s "
+          f"({resumen['filas_por_segundo']:.0f} filas/s)")
+
+if __name__ == "__main__":
+    main()
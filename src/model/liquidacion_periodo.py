@@ -0,0 +1,230 @@
+import sys
+import os
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from model.calculo_total import ParametrosNomina, calculo_desglose
+from model.neon_db import (iterar_consulta, registrar_liquidaciones, transaccion, conexion, bloqueo_consultivo,
+                           crear_corrida, iniciar_corrida, registrar_bloque_corrida, finalizar_corrida,
+                           encolar_tareas, reintentar_tareas)
+
+# Empleados que se envían juntos a un proceso
+TAMANO_BLOQUE_PERIODO = 500
+
+# Llave del bloqueo consultivo que impide ejecutar la misma corrida en dos procesos
+LLAVE_BLOQUEO_CORRIDAS = 20250002
+
+# Instantánea de configuración de cada proceso del pool; la recibe una sola vez al iniciar
+_parametros_proceso = None
+
+def _inicializar_proceso(parametros):
+    global _parametros_proceso
+    _parametros_proceso = parametros
+
+def liquidar_bloque(empleados, fecha, parametros=None):
+    """Calcula la liquidación de un bloque de empleados sin usar la base de datos.
+
+    empleados es una lista de (empleado_id, salario_base, horas_diurnas, horas_nocturnas,
+    bonos_extra, deduccion_adicional). Devuelve (filas, errores): las filas tienen el
+    formato de registrar_liquidaciones y errores es una lista de (empleado_id, mensaje)
+    de los empleados que no pasan las validaciones de calculo_total.
+    """
+    parametros = parametros or _parametros_proceso or ParametrosNomina.cargar()
+    filas = []
+    errores = []
+    for empleado_id, salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional in empleados:
+        try:
+            desglose = calculo_desglose(salario_base, horas_diurnas, horas_nocturnas,
+                                        bonos_extra, deduccion_adicional, parametros)
+        except Exception as e:
+            errores.append((empleado_id, str(e)))
+            continue
+        filas.append((empleado_id, fecha, salario_base, horas_diurnas, horas_nocturnas, bonos_extra,
+                      deduccion_adicional, desglose.auxilio_transporte, desglose.total_nomina))
+    return filas, errores
+
+def _con_novedades(empleado_id, salario_base, novedades):
+    horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional = novedades.get(empleado_id, (0, 0, 0, 0))
+    return (empleado_id, salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
+
+def _bloques_empleados(novedades, tamano_bloque):
+    """Recorre los empleados en bloques con sus novedades del periodo (cero si no tienen)"""
+    bloque = []
+    for empleado_id, salario_base in iterar_consulta("SELECT id, salario_base FROM empleados ORDER BY id"):
+        bloque.append(_con_novedades(empleado_id, salario_base, novedades))
+        if len(bloque) >= tamano_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+def _bloques_desde(desde_id, novedades, tamano_bloque):
+    """Recorre en bloques los empleados con ID mayor que desde_id.
+
+    Cada bloque es una consulta corta por rango de IDs, así que no queda ninguna
+    transacción abierta mientras se calcula y el recorrido puede retomarse desde
+    cualquier ID.
+    """
+    while True:
+        with conexion() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT id, salario_base FROM empleados WHERE id > %s ORDER BY id LIMIT %s",
+                           (desde_id, tamano_bloque))
+            filas = cursor.fetchall()
+        if not filas:
+            return
+        yield [_con_novedades(empleado_id, salario_base, novedades) for empleado_id, salario_base in filas]
+        desde_id = filas[-1][0]
+
+def _liquidar_en_paralelo(bloques, fecha, parametros, workers, guardar):
+    """Calcula los bloques en un pool de procesos y llama guardar(bloque, filas, errores) en orden"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_proceso,
+                             initargs=(parametros,)) as pool:
+        # Pocos bloques en vuelo a la vez para que la memoria no dependa de la cantidad de empleados
+        pendientes = deque()
+        for bloque in bloques:
+            pendientes.append((bloque, pool.submit(liquidar_bloque, bloque, fecha)))
+            if len(pendientes) >= 2 * workers:
+                bloque_listo, futuro = pendientes.popleft()
+                guardar(bloque_listo, *futuro.result())
+        while pendientes:
+            bloque_listo, futuro = pendientes.popleft()
+            guardar(bloque_listo, *futuro.result())
+
+def liquidar_periodo(fecha=None, workers=None, novedades=None, tamano_bloque=TAMANO_BLOQUE_PERIODO):
+    """Liquida la nómina de todos los empleados repartiendo el cálculo entre varios procesos.
+
+    La configuración se lee una sola vez y cada proceso recibe la misma instantánea.
+    novedades es un diccionario opcional {empleado_id: (horas_diurnas, horas_nocturnas,
+    bonos_extra, deduccion_adicional)}. El proceso principal guarda los resultados por
+    lotes a medida que llegan, todos en una sola transacción. workers es la cantidad de
+    procesos (por defecto, uno por núcleo).
+
+    Devuelve un resumen con liquidados, errores (lista de (empleado_id, mensaje)) y segundos.
+    """
+    fecha = fecha or date.today()
+    novedades = novedades or {}
+    workers = workers or os.cpu_count() or 1
+    parametros = ParametrosNomina.cargar()
+    inicio = time.perf_counter()
+    resumen = {'liquidados': 0, 'errores': []}
+
+    def guardar(bloque, filas, errores):
+        registrar_liquidaciones(filas)
+        resumen['liquidados'] += len(filas)
+        resumen['errores'].extend(errores)
+
+    with transaccion():
+        _liquidar_en_paralelo(_bloques_empleados(novedades, tamano_bloque), fecha, parametros, workers, guardar)
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    return resumen
+
+def nueva_corrida(fecha=None):
+    """Registra una corrida de nómina pendiente con la configuración actual y devuelve su ID"""
+    return crear_corrida(fecha or date.today(), ParametrosNomina.cargar().como_dict())
+
+def encolar_corrida(fecha=None, tamano_bloque=TAMANO_BLOQUE_PERIODO):
+    """Registra una corrida y la divide en tareas para los workers distribuidos (src/worker.py).
+
+    Devuelve (corrida_id, cantidad de tareas).
+    """
+    corrida_id = nueva_corrida(fecha)
+    return corrida_id, encolar_tareas(corrida_id, tamano_bloque)
+
+def reintentar_corrida(corrida_id):
+    """Vuelve a encolar las tareas fallidas de una corrida repartida entre workers.
+
+    Devuelve la cantidad de tareas reencoladas. Lanza ValueError si la corrida no
+    tiene tareas; una corrida de un solo proceso se reanuda con ejecutar_corrida.
+    """
+    tareas = reintentar_tareas(corrida_id)
+    if tareas is None:
+        raise ValueError(f"La corrida {corrida_id} no existe o no se reparte entre workers")
+    return tareas
+
+def ejecutar_corrida(corrida_id, workers=None, novedades=None, tamano_bloque=TAMANO_BLOQUE_PERIODO):
+    """Ejecuta una corrida de nómina, o la reanuda desde su último punto de control.
+
+    Cada bloque se guarda junto con el avance de la corrida en su propia transacción,
+    así que si el proceso se cae basta con volver a ejecutar la misma corrida: sigue
+    con el empleado siguiente al último bloque confirmado, con la fecha y los
+    parámetros guardados al crearla, sin recalcular ni duplicar liquidaciones. El
+    avance se puede consultar mientras corre con CorridaNomina.get_by_id. Si algo
+    falla la corrida queda como fallida con el mensaje del error y la excepción se
+    propaga. Lanza ValueError si la corrida no existe, ya está completada o se
+    reparte entre workers, y RuntimeError si otro proceso la está ejecutando.
+
+    Devuelve un resumen de esta ejecución con corrida_id, liquidados, errores y segundos.
+    """
+    novedades = novedades or {}
+    workers = workers or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    resumen = {'corrida_id': corrida_id, 'liquidados': 0, 'errores': []}
+
+    with bloqueo_consultivo(LLAVE_BLOQUEO_CORRIDAS, corrida_id):
+        datos = iniciar_corrida(corrida_id)
+        if datos is None:
+            raise ValueError(f"La corrida {corrida_id} no existe, ya está completada o la ejecutan los workers")
+        fecha, parametros, ultimo_empleado_id = datos
+
+        def guardar(bloque, filas, errores):
+            resumen['liquidados'] += registrar_bloque_corrida(corrida_id, filas, len(errores), bloque[-1][0])
+            resumen['errores'].extend(errores)
+
+        try:
+            _liquidar_en_paralelo(_bloques_desde(ultimo_empleado_id, novedades, tamano_bloque),
+                                  fecha, ParametrosNomina(**parametros), workers, guardar)
+        except BaseException as e:
+            try:
+                finalizar_corrida(corrida_id, 'fallida', str(e) or type(e).__name__)
+            except Exception:
+                pass  # Sin base de datos queda en proceso y se puede reanudar igual
+            raise
+        finalizar_corrida(corrida_id, 'completada')
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    return resumen
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Liquida la nómina de todos los empleados")
+    parser.add_argument('--fecha', type=date.fromisoformat, help="Fecha de la liquidación YYYY-MM-DD (por defecto hoy)")
+    parser.add_argument('--workers', type=int, help="Procesos de cálculo (por defecto uno por núcleo)")
+    parser.add_argument('--corrida', action='store_true',
+                        help="Registrar la liquidación como una corrida reanudable con su avance")
+    parser.add_argument('--reanudar', type=int, metavar='ID', help="Reanudar la corrida con este ID")
+    parser.add_argument('--encolar', action='store_true',
+                        help="Solo crear la corrida y sus tareas para que la calculen los workers")
+    parser.add_argument('--reintentar', type=int, metavar='ID',
+                        help="Volver a encolar las tareas fallidas de la corrida repartida con este ID")
+    args = parser.parse_args(argumentos)
+
+    if args.reintentar:
+        try:
+            tareas = reintentar_corrida(args.reintentar)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Corrida {args.reintentar}: {tareas} tareas fallidas de nuevo en cola")
+        return
+    if args.encolar:
+        corrida_id, tareas = encolar_corrida(args.fecha)
+        print(f"Corrida {corrida_id}: {tareas} tareas en cola (python src/worker.py --corrida {corrida_id})")
+        return
+    if args.reanudar or args.corrida:
+        corrida_id = args.reanudar or nueva_corrida(args.fecha)
+        print(f"Corrida {corrida_id}")
+        try:
+            resumen = ejecutar_corrida(corrida_id, args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        resumen = liquidar_periodo(args.fecha, args.workers)
+    print(f"{resumen['liquidados']} liquidaciones registradas en {resumen['segundos']:.2f} s")
+    for empleado_id, mensaje in resumen['errores']:
+        print(f"  Empleado {empleado_id}: {mensaje}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from psycopg2 import errors
+from model.neon_db import conexion
+
+# Llave del bloqueo consultivo que serializa las migraciones entre procesos
+LLAVE_BLOQUEO_MIGRACIONES = 20250001
+
+# Migraciones del esquema en orden: (versión, descripción, sentencias).
+# Una migración ya publicada no se modifica; los cambios nuevos van en una versión nueva.
+MIGRACIONES = [
+    (1, "Tablas base y parámetros iniciales", [
+        '''
+        CREATE TABLE IF NOT EXISTS empleados (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            documento VARCHAR(20) UNIQUE NOT NULL,
+            salario_base FLOAT NOT NULL,
+            fecha_ingreso DATE NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS liquidaciones (
+            id SERIAL PRIMARY KEY,
+            empleado_id INTEGER REFERENCES empleados(id),
+            fecha_liquidacion DATE NOT NULL,
+            salario_base FLOAT NOT NULL,
+            horas_diurnas INTEGER NOT NULL,
+            horas_nocturnas INTEGER NOT NULL,
+            bonos_extra FLOAT NOT NULL,
+            deduccion_adicional FLOAT NOT NULL,
+            auxilio_transporte FLOAT NOT NULL,
+            total_nomina FLOAT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS configuracion (
+            id SERIAL PRIMARY KEY,
+            nombre_parametro VARCHAR(50) UNIQUE NOT NULL,
+            valor FLOAT NOT NULL,
+            descripcion TEXT,
+            fecha_actualizacion DATE NOT NULL
+        )
+        ''',
+        '''
+        INSERT INTO configuracion (nombre_parametro, valor, descripcion, fecha_actualizacion)
+        VALUES
+            ('valor_hora_extra', 6189, 'Valor actual de la hora extra en Colombia', CURRENT_DATE),
+            ('porcentaje_hora_diurna', 0.25, 'Multiplicador para horas extras diurnas', CURRENT_DATE),
+            ('porcentaje_hora_nocturna', 0.75, 'Multiplicador para horas extras nocturnas', CURRENT_DATE),
+            ('salario_minimo', 1300000, 'Salario mínimo mensual legal vigente', CURRENT_DATE),
+            ('auxilio_transporte', 162000, 'Valor del auxilio de transporte', CURRENT_DATE),
+            ('limite_smmlv_auxilio', 2, 'Límite en SMMLV para recibir auxilio de transporte', CURRENT_DATE),
+            ('porcentaje_deducciones', 0.08, 'Porcentaje base de deducciones', CURRENT_DATE),
+            ('limite_horas_extra', 90, 'Límite máximo de horas extra permitidas', CURRENT_DATE),
+            ('porcentaje_maximo_deducciones', 0.4, 'Porcentaje máximo permitido de deducciones', CURRENT_DATE)
+        ON CONFLICT (nombre_parametro) DO NOTHING
+        ''',
+    ]),
+    (2, "Índices para liquidaciones por empleado, por fecha y empleados por nombre", [
+        # get_by_empleado, el JOIN de obtener_liquidacion y la paginación por empleado
+        '''
+        CREATE INDEX IF NOT EXISTS idx_liquidaciones_empleado_fecha
+        ON liquidaciones (empleado_id, fecha_liquidacion DESC, id DESC)
+        ''',
+        # get_all y la paginación general de liquidaciones
+        '''
+        CREATE INDEX IF NOT EXISTS idx_liquidaciones_fecha
+        ON liquidaciones (fecha_liquidacion DESC, id DESC)
+        ''',
+        # Listados y paginación de empleados ordenados por nombre
+        '''
+        CREATE INDEX IF NOT EXISTS idx_empleados_nombre
+        ON empleados (nombre, id)
+        ''',
+    ]),
+    (3, "Búsqueda de empleados por nombre sin tildes con trigramas", [
+        # Si el rol no puede crear las extensiones la migración se registra igual
+        # y Empleado.search usa la búsqueda en memoria de model.busqueda
+        '''
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS unaccent;
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            -- unaccent() no es IMMUTABLE y no puede usarse en un índice directamente
+            CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+                LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+                AS 'SELECT public.unaccent(''public.unaccent''::regdictionary, $1)';
+            CREATE INDEX IF NOT EXISTS idx_empleados_nombre_trgm
+                ON empleados USING gin (f_unaccent(lower(nombre)) gin_trgm_ops);
+        EXCEPTION WHEN insufficient_privilege OR undefined_file OR feature_not_supported THEN
+            RAISE NOTICE 'Búsqueda con trigramas no disponible: %', SQLERRM;
+        END
+        $$
+        ''',
+    ]),
+    (4, "Corridas de nómina reanudables", [
+        '''
+        CREATE TABLE IF NOT EXISTS corridas_nomina (
+            id SERIAL PRIMARY KEY,
+            fecha_liquidacion DATE NOT NULL,
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente'
+                CHECK (estado IN ('pendiente', 'en_proceso', 'completada', 'fallida')),
+            parametros JSONB NOT NULL,
+            total_empleados INTEGER NOT NULL DEFAULT 0,
+            procesados INTEGER NOT NULL DEFAULT 0,
+            liquidados INTEGER NOT NULL DEFAULT 0,
+            errores INTEGER NOT NULL DEFAULT 0,
+            ultimo_empleado_id INTEGER NOT NULL DEFAULT 0,
+            mensaje TEXT,
+            fecha_creacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        ALTER TABLE liquidaciones ADD COLUMN IF NOT EXISTS corrida_id INTEGER REFERENCES corridas_nomina(id)
+        ''',
+        # Una corrida nunca registra dos liquidaciones para el mismo empleado
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_liquidaciones_corrida_empleado
+        ON liquidaciones (corrida_id, empleado_id) WHERE corrida_id IS NOT NULL
+        ''',
+    ]),
+    (5, "Cola de tareas de nómina para workers distribuidos", [
+        # Cada tarea es un rango de IDs de empleados [desde, hasta) de una corrida. No hay
+        # estado "en proceso": la tarea que un worker está calculando queda bloqueada por
+        # su transacción y los demás la saltan con SKIP LOCKED.
+        '''
+        CREATE TABLE IF NOT EXISTS tareas_nomina (
+            id SERIAL PRIMARY KEY,
+            corrida_id INTEGER NOT NULL REFERENCES corridas_nomina(id),
+            desde_empleado_id INTEGER NOT NULL,
+            hasta_empleado_id INTEGER NOT NULL,
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente'
+                CHECK (estado IN ('pendiente', 'completada', 'fallida')),
+            intentos INTEGER NOT NULL DEFAULT 0,
+            worker VARCHAR(100),
+            mensaje TEXT,
+            fecha_fin TIMESTAMP,
+            UNIQUE (corrida_id, desde_empleado_id)
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_tareas_nomina_pendientes
+        ON tareas_nomina (id) WHERE estado = 'pendiente'
+        ''',
+    ]),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+def version_esquema():
+    """Devuelve la versión del esquema aplicada en la base de datos (0 si nunca se migró)"""
+    with conexion() as conn, conn.cursor() as cursor:
+        try:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            return cursor.fetchone()[0]
+        except errors.UndefinedTable:
+            conn.rollback()
+            return 0
+
+def aplicar_migraciones():
+    """Aplica en una sola transacción las migraciones pendientes y devuelve cuántas se aplicaron.
+
+    Si el esquema ya está al día solo se hace una consulta, sin DDL. Un bloqueo
+    consultivo evita que dos procesos migren a la vez.
+    """
+    if version_esquema() >= VERSION_ACTUAL:
+        return 0
+
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (LLAVE_BLOQUEO_MIGRACIONES,))
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            fecha_aplicacion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        # Otro proceso pudo migrar mientras se esperaba el bloqueo
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        version = cursor.fetchone()[0]
+
+        aplicadas = 0
+        for numero, descripcion, sentencias in MIGRACIONES:
+            if numero <= version:
+                continue
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+            cursor.execute(
+                "INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                (numero, descripcion)
+            )
+            print(f"Migración {numero} aplicada: {descripcion}")
+            aplicadas += 1
+        conn.commit()
+        return aplicadas
+
+if __name__ == "__main__":
+    aplicar_migraciones()
+    print(f"Esquema en la versión {version_esquema()}")
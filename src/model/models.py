@@ -1,11 +1,168 @@
 import sys
 import os
+import copy
+import threading
+from contextlib import contextmanager
+from functools import partial
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from model.neon_db import obtener_conexion, liberar_conexion
+from model.neon_db import (conexion, transaccion, TransaccionRevertida, despues_de_confirmar,
+                           despues_de_revertir, iterar_consulta, leer_columnas, obtener_filas_configuracion,
+                           invalidar_cache_configuracion, registrar_liquidaciones,
+                           sincronizar_empleados, obtener_corrida, listar_corridas)
+from model.migraciones import aplicar_migraciones
+from model.busqueda import IndiceEmpleados
+from psycopg2 import errors
 from datetime import date
 
+# Registros por página en los listados paginados
+TAMANO_PAGINA = 20
+
+_sesion_local = threading.local()
+
+class ErrorDuplicado(Exception):
+    """Se intentó guardar en una columna única un valor que ya usa otro registro"""
+    
+    def __init__(self, campo):
+        super().__init__(f"Ya existe un registro con el mismo valor de {campo}")
+        self.campo = campo
+
+class Sesion:
+    """Mapa de identidad de una unidad de trabajo.
+
+    Dentro de una sesión cada registro se carga una sola vez: consultarlo de nuevo por su
+    ID o por una clave única devuelve la misma instancia sin ir a la base de datos.
+    """
+    
+    def __init__(self):
+        self._objetos = {}    # (clase, campo, valor) -> instancia
+        self._claves = {}     # (clase, id) -> claves registradas para esa instancia
+    
+    def obtener(self, cls, campo, valor):
+        """Devuelve la instancia cargada para ese campo y valor, o None"""
+        return self._objetos.get((cls, campo, valor))
+    
+    def registrar(self, instancia):
+        """Registra una instancia recién leída y devuelve la que queda en el mapa.
+
+        Si el registro ya estaba cargado se devuelve la instancia existente.
+        """
+        cls = type(instancia)
+        existente = self._objetos.get((cls, 'id', instancia.id))
+        if existente is not None:
+            return existente
+        self._agregar(instancia)
+        return instancia
+    
+    def reemplazar(self, instancia):
+        """Registra una instancia recién guardada, descartando lo que hubiera para su ID"""
+        self.quitar(type(instancia), instancia.id)
+        self._agregar(instancia)
+    
+    def quitar(self, cls, id):
+        """Invalida el registro con ese ID y todas sus claves"""
+        for clave in self._claves.pop((cls, id), ()):
+            self._objetos.pop(clave, None)
+    
+    def limpiar(self):
+        """Invalida todos los registros de la sesión"""
+        self._objetos.clear()
+        self._claves.clear()
+    
+    def _agregar(self, instancia):
+        cls = type(instancia)
+        claves = [(cls, 'id', instancia.id)]
+        claves.extend((cls, campo, getattr(instancia, campo)) for campo in cls._claves_unicas)
+        for clave in claves:
+            self._objetos[clave] = instancia
+        self._claves[(cls, instancia.id)] = claves
+
+@contextmanager
+def sesion():
+    """Abre una sesión con mapa de identidad para el hilo actual.
+
+    Si ya hay una abierta se reutiliza, así que las sesiones pueden anidarse.
+    Fuera de una sesión los modelos consultan siempre la base de datos.
+    """
+    actual = getattr(_sesion_local, 'sesion', None)
+    if actual is not None:
+        yield actual
+        return
+    _sesion_local.sesion = Sesion()
+    try:
+        yield _sesion_local.sesion
+    finally:
+        _sesion_local.sesion = None
+
+def sesion_actual():
+    """Devuelve la sesión abierta en el hilo actual o None"""
+    return getattr(_sesion_local, 'sesion', None)
+
+class UnidadDeTrabajo:
+    """Operaciones de varios modelos que se confirman juntas o no se confirman.
+
+    Se obtiene con unidad_de_trabajo(). guardar y eliminar lanzan TransaccionRevertida
+    en cuanto una operación falla, así el bloque se interrumpe y nada queda guardado.
+    """
+    
+    def __init__(self, sesion):
+        self.sesion = sesion
+    
+    def guardar(self, *instancias):
+        """Guarda (inserta o actualiza) las instancias dentro de la transacción"""
+        for instancia in instancias:
+            if not instancia.save():
+                raise TransaccionRevertida(f"No se pudo guardar {type(instancia).__name__}")
+    
+    def eliminar(self, *instancias):
+        """Elimina las instancias dentro de la transacción"""
+        for instancia in instancias:
+            if not instancia.delete():
+                raise TransaccionRevertida(f"No se pudo eliminar {type(instancia).__name__}")
+
+@contextmanager
+def unidad_de_trabajo():
+    """Abre una sesión y una transacción que comparten todos los modelos del bloque.
+
+    Cualquier save o delete del bloque, también los que hagan los controladores,
+    usa la misma conexión y un solo commit al salir; si algo falla se revierte todo.
+    """
+    with sesion() as actual, transaccion():
+        yield UnidadDeTrabajo(actual)
+
 class Model:
-    """Clase base para los modelos de la aplicación"""
+    """Clase base para los modelos de la aplicación.
+
+    Los modelos declaran __slots__ con sus columnas: las instancias no tienen __dict__,
+    lo que reduce la memoria por fila al cargar historiales grandes.
+    """
+    
+    __slots__ = ()
+    
+    # Columnas de valor único por las que también se busca en la sesión
+    _claves_unicas = ()
+    
+    @classmethod
+    def _de_sesion(cls, campo, valor):
+        """Devuelve la instancia ya cargada en la sesión actual, si hay una"""
+        actual = sesion_actual()
+        return actual.obtener(cls, campo, valor) if actual is not None else None
+    
+    def _en_sesion(self):
+        """Registra la instancia en la sesión actual y devuelve la que queda en el mapa"""
+        actual = sesion_actual()
+        return actual.registrar(self) if actual is not None else self
+    
+    def _actualizar_sesion(self, eliminada=False):
+        """Refleja en la sesión actual un guardado o una eliminación de la instancia"""
+        actual = sesion_actual()
+        if actual is None:
+            return
+        if eliminada:
+            actual.quitar(type(self), self.id)
+        else:
+            actual.reemplazar(self)
+            # Si la transacción se revierte, lo guardado en la sesión ya no es válido
+            despues_de_revertir(actual.limpiar)
     
     @classmethod
     def create_table(cls):
@@ -33,6 +190,10 @@ class Model:
 class Empleado(Model):
     """Modelo para la tabla empleados"""
     
+    __slots__ = ('id', 'nombre', 'documento', 'salario_base', 'fecha_ingreso')
+    
+    _claves_unicas = ('documento',)
+    
     def __init__(self, nombre, documento, salario_base, fecha_ingreso, id=None):
         self.id = id
         self.nombre = nombre
@@ -43,164 +204,326 @@ class Empleado(Model):
     @classmethod
     def create_table(cls):
         """Crea la tabla empleados en la base de datos"""
-        conn = None
-        cursor = None
-        try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS empleados (
-                id SERIAL PRIMARY KEY,
-                nombre VARCHAR(100) NOT NULL,
-                documento VARCHAR(20) UNIQUE NOT NULL,
-                salario_base FLOAT NOT NULL,
-                fecha_ingreso DATE NOT NULL
-            )
-            ''')
-            conn.commit()
-            return True
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS empleados (
+                    id SERIAL PRIMARY KEY,
+                    nombre VARCHAR(100) NOT NULL,
+                    documento VARCHAR(20) UNIQUE NOT NULL,
+                    salario_base FLOAT NOT NULL,
+                    fecha_ingreso DATE NOT NULL
+                )
+                ''')
+                conn.commit()
+                return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al crear tabla empleados: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
     def get_all(cls):
         """Obtiene todos los empleados de la base de datos"""
-        conn = None
-        cursor = None
-        try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados ORDER BY nombre")
-            empleados = []
-            for row in cursor.fetchall():
-                id, nombre, documento, salario_base, fecha_ingreso = row
-                empleados.append(cls(nombre, documento, salario_base, fecha_ingreso, id))
-            return empleados
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados ORDER BY nombre")
+                return [cls._desde_fila(row) for row in cursor]
         except Exception as e:
             print(f"Error al obtener empleados: {e}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
+    
+    @classmethod
+    def get_pagina(cls, despues_de=None, limite=TAMANO_PAGINA):
+        """Obtiene una página de empleados ordenados por nombre usando paginación por clave.
+
+        despues_de es la clave (nombre, id) devuelta por la página anterior. Devuelve
+        (empleados, siguiente), donde siguiente es None cuando no hay más páginas.
+        """
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                if despues_de is None:
+                    cursor.execute("""
+                        SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados
+                        ORDER BY nombre, id LIMIT %s
+                    """, (limite + 1,))
+                else:
+                    cursor.execute("""
+                        SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados
+                        WHERE (nombre, id) > (%s, %s)
+                        ORDER BY nombre, id LIMIT %s
+                    """, (despues_de[0], despues_de[1], limite + 1))
+                empleados = [cls._desde_fila(row)._en_sesion() for row in cursor.fetchall()]
+            # Se pide una fila de más solo para saber si existe otra página
+            if len(empleados) > limite:
+                empleados = empleados[:limite]
+                ultimo = empleados[-1]
+                return empleados, (ultimo.nombre, ultimo.id)
+            return empleados, None
+        except Exception as e:
+            print(f"Error al obtener página de empleados: {e}")
+            return [], None
+    
+    @classmethod
+    def iter_all(cls, itersize=None):
+        """Recorre todos los empleados con un cursor del lado del servidor, sin cargarlos en memoria.
+
+        Si la base de datos falla a mitad del recorrido la excepción se propaga.
+        """
+        try:
+            for row in iterar_consulta(
+                "SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados ORDER BY nombre, id",
+                itersize=itersize
+            ):
+                yield cls._desde_fila(row)
+        except Exception as e:
+            print(f"Error al recorrer empleados: {e}")
+            raise
+    
+    # Se vuelve False si la base de datos no tiene f_unaccent/pg_trgm (ver migración 3)
+    _busqueda_sql_disponible = True
+    
+    # Índice en memoria para autocompletar; se construye en el primer uso de indice()
+    _indice = None
+    
+    @classmethod
+    def indice(cls, recargar=False):
+        """Devuelve el índice en memoria de empleados, cargándolo de la base de datos en el primer uso.
+
+        save() y delete() lo mantienen al día en este proceso; recargar=True lo reconstruye
+        para ver cambios hechos por otros procesos. Devuelve None si no se pudo cargar.
+        """
+        if cls._indice is None or recargar:
+            try:
+                cls._indice = IndiceEmpleados(cls._desde_fila(row) for row in iterar_consulta(
+                    "SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados"
+                ))
+            except Exception as e:
+                print(f"Error al cargar el índice de empleados: {e}")
+                return None
+        return cls._indice
+    
+    @classmethod
+    def search(cls, texto, limit=20):
+        """Busca empleados por nombre sin distinguir mayúsculas ni tildes.
+
+        Acepta nombres que contienen el texto o que se le parecen por trigramas, ordenados
+        de mayor a menor similitud. Usa unaccent y pg_trgm en PostgreSQL y, si no están
+        disponibles, un índice de trigramas en memoria.
+        """
+        if cls._busqueda_sql_disponible:
+            try:
+                return cls._search_sql(texto, limit)
+            except (errors.UndefinedFunction, errors.UndefinedObject):
+                cls._busqueda_sql_disponible = False
+            except Exception as e:
+                print(f"Error al buscar empleados: {e}")
+                return []
+        try:
+            return cls._search_memoria(texto, limit)
+        except Exception as e:
+            print(f"Error al buscar empleados: {e}")
+            return []
+    
+    @classmethod
+    def _search_sql(cls, texto, limit):
+        """Búsqueda por trigramas resuelta con el índice GIN de la base de datos"""
+        # Se escapan los comodines de LIKE que pueda traer el texto
+        patron = "%" + texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with conexion() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados
+                WHERE f_unaccent(lower(nombre)) LIKE f_unaccent(lower(%s))
+                   OR f_unaccent(lower(nombre)) %% f_unaccent(lower(%s))
+                ORDER BY similarity(f_unaccent(lower(nombre)), f_unaccent(lower(%s))) DESC, nombre, id
+                LIMIT %s
+            """, (patron, texto, texto, limit))
+            return [cls._desde_fila(row) for row in cursor.fetchall()]
+    
+    @classmethod
+    def _search_memoria(cls, texto, limit):
+        """Búsqueda por trigramas en Python para bases de datos sin unaccent/pg_trgm.
+
+        Usa el índice en memoria de indice(), que se carga una vez y se mantiene al día.
+        """
+        indice = cls.indice()
+        if indice is None:
+            return []
+        return indice.buscar_similares(texto, limit)
+    
+    @classmethod
+    def _desde_fila(cls, row):
+        """Construye un empleado a partir de una fila (id, nombre, documento, salario_base, fecha_ingreso).
+
+        No pasa por __init__: la fecha ya viene como date desde la base de datos.
+        """
+        empleado = object.__new__(cls)
+        empleado.id, empleado.nombre, empleado.documento, empleado.salario_base, empleado.fecha_ingreso = row
+        return empleado
     
     @classmethod
     def get_by_id(cls, id):
         """Obtiene un empleado por su ID"""
-        conn = None
-        cursor = None
+        empleado = cls._de_sesion('id', id)
+        if empleado is not None:
+            return empleado
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados WHERE id = %s", (id,))
-            row = cursor.fetchone()
-            if row:
-                id, nombre, documento, salario_base, fecha_ingreso = row
-                return cls(nombre, documento, salario_base, fecha_ingreso, id)
-            return None
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados WHERE id = %s", (id,))
+                row = cursor.fetchone()
+                if row:
+                    return cls._desde_fila(row)._en_sesion()
+                return None
         except Exception as e:
             print(f"Error al obtener empleado: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
     def get_by_documento(cls, documento):
         """Obtiene un empleado por su documento"""
-        conn = None
-        cursor = None
+        empleado = cls._de_sesion('documento', documento)
+        if empleado is not None:
+            return empleado
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados WHERE documento = %s", (documento,))
-            row = cursor.fetchone()
-            if row:
-                id, nombre, documento, salario_base, fecha_ingreso = row
-                return cls(nombre, documento, salario_base, fecha_ingreso, id)
-            return None
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT id, nombre, documento, salario_base, fecha_ingreso FROM empleados WHERE documento = %s", (documento,))
+                row = cursor.fetchone()
+                if row:
+                    return cls._desde_fila(row)._en_sesion()
+                return None
         except Exception as e:
             print(f"Error al obtener empleado por documento: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
-    def save(self):
-        """Guarda o actualiza un empleado en la base de datos"""
-        conn = None
-        cursor = None
+    def insertar(self):
+        """Inserta el empleado con una sola sentencia.
+
+        La restricción única de documento decide si ya existe: en ese caso se lanza
+        ErrorDuplicado sin consultar antes. Devuelve False si hubo un error de base de datos.
+        """
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            
-            if self.id:
-                # Actualizar un empleado existente
+            with conexion() as conn, conn.cursor() as cursor:
                 cursor.execute(
-                    "UPDATE empleados SET nombre = %s, documento = %s, salario_base = %s, fecha_ingreso = %s WHERE id = %s",
-                    (self.nombre, self.documento, self.salario_base, self.fecha_ingreso, self.id)
+                    """INSERT INTO empleados (nombre, documento, salario_base, fecha_ingreso)
+                       VALUES (%s, %s, %s, %s)
+                       ON CONFLICT (documento) DO NOTHING
+                       RETURNING id""",
+                    (self.nombre, self.documento, self.salario_base, self.fecha_ingreso)
                 )
-            else:
-                # Insertar un nuevo empleado
+                row = cursor.fetchone()
+                conn.commit()
+        except Exception as e:
+            print(f"Error al insertar empleado: {e}")
+            return False
+        if row is None:
+            raise ErrorDuplicado('documento')
+        self.id = row[0]
+        self._guardado()
+        return True
+    
+    def actualizar(self):
+        """Actualiza el empleado con una sola sentencia.
+
+        Devuelve True si se actualizó, None si no existe un empleado con ese ID y False
+        si hubo un error de base de datos. Si el documento ya pertenece a otro empleado
+        se lanza ErrorDuplicado.
+        """
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
                 cursor.execute(
-                    "INSERT INTO empleados (nombre, documento, salario_base, fecha_ingreso) VALUES (%s, %s, %s, %s) RETURNING id",
-                    (self.nombre, self.documento, self.salario_base, self.fecha_ingreso)
+                    """UPDATE empleados SET nombre = %s, documento = %s, salario_base = %s, fecha_ingreso = %s
+                       WHERE id = %s
+                       RETURNING id""",
+                    (self.nombre, self.documento, self.salario_base, self.fecha_ingreso, self.id)
                 )
-                self.id = cursor.fetchone()[0]
-            
-            conn.commit()
-            return True
+                row = cursor.fetchone()
+                conn.commit()
+        except errors.UniqueViolation:
+            self._actualizar_sesion(eliminada=True)
+            raise ErrorDuplicado('documento')
         except Exception as e:
-            if conn:
-                conn.rollback()
+            print(f"Error al actualizar empleado: {e}")
+            # La instancia en memoria ya no coincide con la base de datos
+            self._actualizar_sesion(eliminada=True)
+            return False
+        if row is None:
+            self._actualizar_sesion(eliminada=True)
+            return None
+        self._guardado()
+        return True
+    
+    def _guardado(self):
+        """Refleja un guardado exitoso en el índice en memoria y en la sesión"""
+        if Empleado._indice is not None:
+            # El índice es compartido entre hilos: solo recibe cambios confirmados
+            despues_de_confirmar(partial(Empleado._indice.agregar, copy.copy(self)))
+        self._actualizar_sesion()
+    
+    def save(self):
+        """Guarda o actualiza un empleado en la base de datos"""
+        try:
+            guardado = self.actualizar() if self.id else self.insertar()
+        except ErrorDuplicado as e:
             print(f"Error al guardar empleado: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
+        return bool(guardado)
+    
+    @classmethod
+    def upsert_many(cls, empleados):
+        """Inserta o actualiza por documento muchos empleados con sentencias por lotes.
+
+        Los documentos no deben repetirse. Asigna el ID a los empleados guardados y
+        devuelve (insertados, actualizados); los que no cambiaron no cuentan en
+        ninguno. Devuelve None si hubo un error de base de datos.
+        """
+        por_documento = {empleado.documento: empleado for empleado in empleados}
+        try:
+            resultado = sincronizar_empleados(
+                (e.nombre, e.documento, e.salario_base, e.fecha_ingreso) for e in por_documento.values()
+            )
+        except Exception as e:
+            print(f"Error al guardar empleados: {e}")
+            return None
+
+        insertados = 0
+        actual = sesion_actual()
+        for id, documento, insertado in resultado:
+            por_documento[documento].id = id
+            insertados += insertado
+            if actual is not None:
+                actual.quitar(cls, id)
+        if resultado and cls._indice is not None:
+            # Se reconstruye en el próximo uso de indice()
+            despues_de_confirmar(cls._descartar_indice)
+        return insertados, len(resultado) - insertados
+    
+    @classmethod
+    def _descartar_indice(cls):
+        cls._indice = None
     
     def delete(self):
         """Elimina un empleado de la base de datos"""
         if not self.id:
             return False
         
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM empleados WHERE id = %s", (self.id,))
-            conn.commit()
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM empleados WHERE id = %s", (self.id,))
+                conn.commit()
+            if Empleado._indice is not None:
+                despues_de_confirmar(partial(Empleado._indice.quitar, self.id))
+            self._actualizar_sesion(eliminada=True)
             return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al eliminar empleado: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
 
 class Liquidacion(Model):
     """Modelo para la tabla liquidaciones"""
     
+    __slots__ = ('id', 'empleado_id', 'fecha_liquidacion', 'salario_base', 'horas_diurnas',
+                 'horas_nocturnas', 'bonos_extra', 'deduccion_adicional', 'auxilio_transporte',
+                 'total_nomina', 'empleado')
+    
     def __init__(self, empleado_id, salario_base, horas_diurnas, horas_nocturnas, 
                  bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina, 
                  fecha_liquidacion=None, id=None):
@@ -214,219 +537,323 @@ class Liquidacion(Model):
         self.deduccion_adicional = deduccion_adicional
         self.auxilio_transporte = auxilio_transporte
         self.total_nomina = total_nomina
+        # Empleado relacionado; solo se llena al consultar con incluir_empleado=True
+        self.empleado = None
     
     @classmethod
     def create_table(cls):
         """Crea la tabla liquidaciones en la base de datos"""
-        conn = None
-        cursor = None
-        try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS liquidaciones (
-                id SERIAL PRIMARY KEY,
-                empleado_id INTEGER REFERENCES empleados(id),
-                fecha_liquidacion DATE NOT NULL,
-                salario_base FLOAT NOT NULL,
-                horas_diurnas INTEGER NOT NULL,
-                horas_nocturnas INTEGER NOT NULL,
-                bonos_extra FLOAT NOT NULL,
-                deduccion_adicional FLOAT NOT NULL,
-                auxilio_transporte FLOAT NOT NULL,
-                total_nomina FLOAT NOT NULL
-            )
-            ''')
-            conn.commit()
-            return True
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS liquidaciones (
+                    id SERIAL PRIMARY KEY,
+                    empleado_id INTEGER REFERENCES empleados(id),
+                    fecha_liquidacion DATE NOT NULL,
+                    salario_base FLOAT NOT NULL,
+                    horas_diurnas INTEGER NOT NULL,
+                    horas_nocturnas INTEGER NOT NULL,
+                    bonos_extra FLOAT NOT NULL,
+                    deduccion_adicional FLOAT NOT NULL,
+                    auxilio_transporte FLOAT NOT NULL,
+                    total_nomina FLOAT NOT NULL
+                )
+                ''')
+                conn.commit()
+                return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al crear tabla liquidaciones: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
+    
+    # Columnas de liquidaciones (alias l) y del empleado relacionado (alias e)
+    _COLUMNAS = """l.id, l.empleado_id, l.fecha_liquidacion, l.salario_base, l.horas_diurnas, 
+                   l.horas_nocturnas, l.bonos_extra, l.deduccion_adicional, l.auxilio_transporte, l.total_nomina"""
+    _COLUMNAS_EMPLEADO = "e.id, e.nombre, e.documento, e.salario_base, e.fecha_ingreso"
     
     @classmethod
-    def get_all(cls):
-        """Obtiene todas las liquidaciones de la base de datos"""
-        conn = None
-        cursor = None
+    def _select(cls, incluir_empleado=False):
+        """Arma el SELECT ... FROM de las consultas, con el JOIN a empleados si se pide"""
+        if incluir_empleado:
+            return f"""SELECT {cls._COLUMNAS}, {cls._COLUMNAS_EMPLEADO}
+                FROM liquidaciones l LEFT JOIN empleados e ON e.id = l.empleado_id"""
+        return f"SELECT {cls._COLUMNAS} FROM liquidaciones l"
+    
+    @classmethod
+    def get_all(cls, incluir_empleado=False):
+        """Obtiene todas las liquidaciones de la base de datos.
+
+        Con incluir_empleado=True cada liquidación trae su Empleado en el atributo
+        empleado, cargado en la misma consulta.
+        """
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                       horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina 
-                FROM liquidaciones 
-                ORDER BY fecha_liquidacion DESC
-            """)
-            liquidaciones = []
-            for row in cursor.fetchall():
-                (id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                 horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina) = row
-                liquidaciones.append(cls(
-                    empleado_id, salario_base, horas_diurnas, horas_nocturnas, 
-                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina, 
-                    fecha_liquidacion, id
-                ))
-            return liquidaciones
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
+                    {cls._select(incluir_empleado)}
+                    ORDER BY l.fecha_liquidacion DESC, l.id DESC
+                """)
+                return list(cls._desde_filas(cursor.fetchall(), incluir_empleado))
         except Exception as e:
             print(f"Error al obtener liquidaciones: {e}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
-    def get_by_id(cls, id):
-        """Obtiene una liquidación por su ID"""
-        conn = None
-        cursor = None
+    def get_pagina(cls, despues_de=None, limite=TAMANO_PAGINA, empleado_id=None, incluir_empleado=False):
+        """Obtiene una página de liquidaciones, de la más reciente a la más antigua.
+
+        Usa paginación por clave sobre (fecha_liquidacion, id): despues_de es la clave
+        devuelta por la página anterior. Si se indica empleado_id solo se listan las
+        de ese empleado. Devuelve (liquidaciones, siguiente); siguiente es None en la última página.
+        """
+        condiciones = []
+        parametros = []
+        if empleado_id is not None:
+            condiciones.append("l.empleado_id = %s")
+            parametros.append(empleado_id)
+        if despues_de is not None:
+            condiciones.append("(l.fecha_liquidacion, l.id) < (%s, %s)")
+            parametros.extend(despues_de)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        parametros.append(limite + 1)
+
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                       horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina 
-                FROM liquidaciones 
-                WHERE id = %s
-            """, (id,))
-            row = cursor.fetchone()
-            if row:
-                (id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                 horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina) = row
-                return cls(
-                    empleado_id, salario_base, horas_diurnas, horas_nocturnas, 
-                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina, 
-                    fecha_liquidacion, id
-                )
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
+                    {cls._select(incluir_empleado)}
+                    {where}
+                    ORDER BY l.fecha_liquidacion DESC, l.id DESC
+                    LIMIT %s
+                """, parametros)
+                liquidaciones = list(cls._desde_filas(cursor.fetchall(), incluir_empleado))
+            if len(liquidaciones) > limite:
+                liquidaciones = liquidaciones[:limite]
+                ultima = liquidaciones[-1]
+                return liquidaciones, (ultima.fecha_liquidacion, ultima.id)
+            return liquidaciones, None
+        except Exception as e:
+            print(f"Error al obtener página de liquidaciones: {e}")
+            return [], None
+    
+    @classmethod
+    def iter_all(cls, itersize=None, incluir_empleado=False):
+        """Recorre todas las liquidaciones con un cursor del lado del servidor, sin cargarlas en memoria.
+
+        Si la base de datos falla a mitad del recorrido la excepción se propaga.
+        """
+        try:
+            yield from cls._desde_filas(iterar_consulta(f"""
+                {cls._select(incluir_empleado)}
+                ORDER BY l.fecha_liquidacion DESC, l.id DESC
+            """, itersize=itersize), incluir_empleado, en_sesion=False)
+        except Exception as e:
+            print(f"Error al recorrer liquidaciones: {e}")
+            raise
+    
+    @classmethod
+    def iter_by_empleado(cls, empleado_id, itersize=None, incluir_empleado=False):
+        """Recorre las liquidaciones de un empleado con un cursor del lado del servidor.
+
+        Si la base de datos falla a mitad del recorrido la excepción se propaga.
+        """
+        try:
+            yield from cls._desde_filas(iterar_consulta(f"""
+                {cls._select(incluir_empleado)}
+                WHERE l.empleado_id = %s
+                ORDER BY l.fecha_liquidacion DESC, l.id DESC
+            """, (empleado_id,), itersize=itersize), incluir_empleado, en_sesion=False)
+        except Exception as e:
+            print(f"Error al recorrer liquidaciones por empleado: {e}")
+            raise
+    
+    # Columnas de fetch_columns con el tipo en que llegan por COPY binario
+    _COLUMNAS_ARREGLOS = [
+        ('id', 'int8'), ('empleado_id', 'int8'), ('fecha_liquidacion', 'date'),
+        ('salario_base', 'float8'), ('horas_diurnas', 'int4'), ('horas_nocturnas', 'int4'),
+        ('bonos_extra', 'float8'), ('deduccion_adicional', 'float8'),
+        ('auxilio_transporte', 'float8'), ('total_nomina', 'float8'),
+    ]
+    _FILTROS_ARREGLOS = {
+        'empleado_id': "l.empleado_id = %s",
+        'fecha_desde': "l.fecha_liquidacion >= %s",
+        'fecha_hasta': "l.fecha_liquidacion <= %s",
+    }
+    
+    @classmethod
+    def fetch_columns(cls, filtros=None):
+        """Obtiene las liquidaciones como columnas de NumPy, sin crear un objeto por fila.
+
+        filtros admite empleado_id, fecha_desde y fecha_hasta (inclusivas). Devuelve un
+        diccionario {columna: arreglo} ordenado por fecha e id: ids en int64 (empleado_id
+        vale 0 si la liquidación no tiene empleado), fechas en datetime64[D], horas en
+        int32 y valores en float64, listos para calculo_total_lote. Requiere NumPy.
+        """
+        filtros = filtros or {}
+        desconocidos = set(filtros) - set(cls._FILTROS_ARREGLOS)
+        if desconocidos:
+            raise ValueError(f"Filtros no soportados: {', '.join(sorted(desconocidos))}")
+        condiciones = [cls._FILTROS_ARREGLOS[nombre] for nombre in filtros]
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        try:
+            return leer_columnas(f"""
+                SELECT l.id::int8, COALESCE(l.empleado_id, 0)::int8, l.fecha_liquidacion,
+                       l.salario_base, l.horas_diurnas, l.horas_nocturnas, l.bonos_extra,
+                       l.deduccion_adicional, l.auxilio_transporte, l.total_nomina
+                FROM liquidaciones l
+                {where}
+                ORDER BY l.fecha_liquidacion, l.id
+            """, list(filtros.values()), cls._COLUMNAS_ARREGLOS)
+        except Exception as e:
+            print(f"Error al obtener columnas de liquidaciones: {e}")
             return None
+    
+    @classmethod
+    def _desde_fila(cls, row):
+        """Construye una liquidación a partir de una fila con las columnas en el orden de la tabla"""
+        liquidacion = object.__new__(cls)
+        (liquidacion.id, liquidacion.empleado_id, liquidacion.fecha_liquidacion, liquidacion.salario_base,
+         liquidacion.horas_diurnas, liquidacion.horas_nocturnas, liquidacion.bonos_extra,
+         liquidacion.deduccion_adicional, liquidacion.auxilio_transporte, liquidacion.total_nomina) = row
+        liquidacion.empleado = None
+        return liquidacion
+    
+    @classmethod
+    def _desde_filas(cls, rows, incluir_empleado=False, en_sesion=True):
+        """Construye las liquidaciones de un resultado y, si se pidió, su empleado.
+
+        Las liquidaciones de un mismo empleado comparten la instancia de Empleado.
+        """
+        empleados = {}
+        for row in rows:
+            liquidacion = cls._desde_fila(row[:10])
+            if en_sesion:
+                liquidacion = liquidacion._en_sesion()
+            if incluir_empleado and row[10] is not None:
+                empleado = empleados.get(row[10])
+                if empleado is None:
+                    empleado = Empleado._desde_fila(row[10:])
+                    if en_sesion:
+                        empleado = empleado._en_sesion()
+                    empleados[row[10]] = empleado
+                liquidacion.empleado = empleado
+            yield liquidacion
+    
+    @classmethod
+    def get_by_id(cls, id, incluir_empleado=False):
+        """Obtiene una liquidación por su ID, con su empleado si incluir_empleado=True"""
+        liquidacion = cls._de_sesion('id', id)
+        if liquidacion is not None:
+            if incluir_empleado and liquidacion.empleado is None and liquidacion.empleado_id is not None:
+                liquidacion.empleado = Empleado.get_by_id(liquidacion.empleado_id)
+            return liquidacion
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
+                    {cls._select(incluir_empleado)}
+                    WHERE l.id = %s
+                """, (id,))
+                row = cursor.fetchone()
+                if row:
+                    return next(cls._desde_filas([row], incluir_empleado))
+                return None
         except Exception as e:
             print(f"Error al obtener liquidación: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
-    def get_by_empleado(cls, empleado_id):
+    def get_by_empleado(cls, empleado_id, incluir_empleado=False):
         """Obtiene las liquidaciones de un empleado"""
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                       horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina 
-                FROM liquidaciones 
-                WHERE empleado_id = %s
-                ORDER BY fecha_liquidacion DESC
-            """, (empleado_id,))
-            liquidaciones = []
-            for row in cursor.fetchall():
-                (id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, 
-                 horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina) = row
-                liquidaciones.append(cls(
-                    empleado_id, salario_base, horas_diurnas, horas_nocturnas, 
-                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina, 
-                    fecha_liquidacion, id
-                ))
-            return liquidaciones
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
+                    {cls._select(incluir_empleado)}
+                    WHERE l.empleado_id = %s
+                    ORDER BY l.fecha_liquidacion DESC, l.id DESC
+                """, (empleado_id,))
+                return list(cls._desde_filas(cursor.fetchall(), incluir_empleado))
         except Exception as e:
             print(f"Error al obtener liquidaciones por empleado: {e}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     def save(self):
         """Guarda o actualiza una liquidación en la base de datos"""
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            
-            if self.id:
-                # Actualizar una liquidación existente
-                cursor.execute("""
-                    UPDATE liquidaciones 
-                    SET empleado_id = %s, fecha_liquidacion = %s, salario_base = %s, 
-                        horas_diurnas = %s, horas_nocturnas = %s, bonos_extra = %s, 
-                        deduccion_adicional = %s, auxilio_transporte = %s, total_nomina = %s
-                    WHERE id = %s
-                """, (
-                    self.empleado_id, self.fecha_liquidacion, self.salario_base, 
-                    self.horas_diurnas, self.horas_nocturnas, self.bonos_extra, 
-                    self.deduccion_adicional, self.auxilio_transporte, self.total_nomina,
-                    self.id
-                ))
-            else:
-                # Insertar una nueva liquidación
-                cursor.execute("""
-                    INSERT INTO liquidaciones 
-                    (empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas, 
-                     bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    self.empleado_id, self.fecha_liquidacion, self.salario_base, 
-                    self.horas_diurnas, self.horas_nocturnas, self.bonos_extra, 
-                    self.deduccion_adicional, self.auxilio_transporte, self.total_nomina
-                ))
-                self.id = cursor.fetchone()[0]
-            
-            conn.commit()
+            with conexion() as conn, conn.cursor() as cursor:
+
+                if self.id:
+                    # Actualizar una liquidación existente
+                    cursor.execute("""
+                        UPDATE liquidaciones 
+                        SET empleado_id = %s, fecha_liquidacion = %s, salario_base = %s, 
+                            horas_diurnas = %s, horas_nocturnas = %s, bonos_extra = %s, 
+                            deduccion_adicional = %s, auxilio_transporte = %s, total_nomina = %s
+                        WHERE id = %s
+                    """, (
+                        self.empleado_id, self.fecha_liquidacion, self.salario_base, 
+                        self.horas_diurnas, self.horas_nocturnas, self.bonos_extra, 
+                        self.deduccion_adicional, self.auxilio_transporte, self.total_nomina,
+                        self.id
+                    ))
+                else:
+                    # Insertar una nueva liquidación
+                    cursor.execute("""
+                        INSERT INTO liquidaciones 
+                        (empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas, 
+                         bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                    """, (
+                        self.empleado_id, self.fecha_liquidacion, self.salario_base, 
+                        self.horas_diurnas, self.horas_nocturnas, self.bonos_extra, 
+                        self.deduccion_adicional, self.auxilio_transporte, self.total_nomina
+                    ))
+                    self.id = cursor.fetchone()[0]
+
+                conn.commit()
+            self._actualizar_sesion()
             return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al guardar liquidación: {e}")
+            if self.id:
+                self._actualizar_sesion(eliminada=True)
+            return False
+    
+    @classmethod
+    def save_many(cls, liquidaciones):
+        """Inserta muchas liquidaciones nuevas en una sola transacción y asigna sus IDs"""
+        liquidaciones = list(liquidaciones)
+        try:
+            ids = registrar_liquidaciones(
+                (l.empleado_id, l.fecha_liquidacion, l.salario_base, l.horas_diurnas, l.horas_nocturnas,
+                 l.bonos_extra, l.deduccion_adicional, l.auxilio_transporte, l.total_nomina)
+                for l in liquidaciones
+            )
+            for liquidacion, id in zip(liquidaciones, ids):
+                liquidacion.id = id
+            return True
+        except Exception as e:
+            print(f"Error al guardar liquidaciones: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     def delete(self):
         """Elimina una liquidación de la base de datos"""
         if not self.id:
             return False
         
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM liquidaciones WHERE id = %s", (self.id,))
-            conn.commit()
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM liquidaciones WHERE id = %s", (self.id,))
+                conn.commit()
+            self._actualizar_sesion(eliminada=True)
             return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al eliminar liquidación: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
 
 class Configuracion(Model):
     """Modelo para la tabla configuracion"""
     
+    __slots__ = ('id', 'nombre_parametro', 'valor', 'descripcion', 'fecha_actualizacion')
+    
     def __init__(self, nombre_parametro, valor, descripcion=None, fecha_actualizacion=None, id=None):
         self.id = id
         self.nombre_parametro = nombre_parametro
@@ -437,205 +864,273 @@ class Configuracion(Model):
     @classmethod
     def create_table(cls):
         """Crea la tabla configuración en la base de datos"""
-        conn = None
-        cursor = None
-        try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS configuracion (
-                id SERIAL PRIMARY KEY,
-                nombre_parametro VARCHAR(50) UNIQUE NOT NULL,
-                valor FLOAT NOT NULL,
-                descripcion TEXT,
-                fecha_actualizacion DATE NOT NULL
-            )
-            ''')
-            
-            # Insertar configuraciones iniciales
-            parametros_iniciales = [
-                ('valor_hora_extra', 6189, 'Valor actual de la hora extra en Colombia'),
-                ('porcentaje_hora_diurna', 0.25, 'Multiplicador para horas extras diurnas'),
-                ('porcentaje_hora_nocturna', 0.75, 'Multiplicador para horas extras nocturnas'),
-                ('salario_minimo', 1300000, 'Salario mínimo mensual legal vigente'),
-                ('auxilio_transporte', 162000, 'Valor del auxilio de transporte'),
-                ('limite_smmlv_auxilio', 2, 'Límite en SMMLV para recibir auxilio de transporte'),
-                ('porcentaje_deducciones', 0.08, 'Porcentaje base de deducciones'),
-                ('limite_horas_extra', 90, 'Límite máximo de horas extra permitidas'),
-                ('porcentaje_maximo_deducciones', 0.4, 'Porcentaje máximo permitido de deducciones')
-            ]
-            
-            for param in parametros_iniciales:
-                nombre, valor, descripcion = param
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
                 cursor.execute('''
-                INSERT INTO configuracion (nombre_parametro, valor, descripcion, fecha_actualizacion)
-                VALUES (%s, %s, %s, CURRENT_DATE)
-                ON CONFLICT (nombre_parametro) DO NOTHING
-                ''', (nombre, valor, descripcion))
-            
-            conn.commit()
-            return True
+                CREATE TABLE IF NOT EXISTS configuracion (
+                    id SERIAL PRIMARY KEY,
+                    nombre_parametro VARCHAR(50) UNIQUE NOT NULL,
+                    valor FLOAT NOT NULL,
+                    descripcion TEXT,
+                    fecha_actualizacion DATE NOT NULL
+                )
+                ''')
+
+                # Insertar configuraciones iniciales
+                parametros_iniciales = [
+                    ('valor_hora_extra', 6189, 'Valor actual de la hora extra en Colombia'),
+                    ('porcentaje_hora_diurna', 0.25, 'Multiplicador para horas extras diurnas'),
+                    ('porcentaje_hora_nocturna', 0.75, 'Multiplicador para horas extras nocturnas'),
+                    ('salario_minimo', 1300000, 'Salario mínimo mensual legal vigente'),
+                    ('auxilio_transporte', 162000, 'Valor del auxilio de transporte'),
+                    ('limite_smmlv_auxilio', 2, 'Límite en SMMLV para recibir auxilio de transporte'),
+                    ('porcentaje_deducciones', 0.08, 'Porcentaje base de deducciones'),
+                    ('limite_horas_extra', 90, 'Límite máximo de horas extra permitidas'),
+                    ('porcentaje_maximo_deducciones', 0.4, 'Porcentaje máximo permitido de deducciones')
+                ]
+
+                for param in parametros_iniciales:
+                    nombre, valor, descripcion = param
+                    cursor.execute('''
+                    INSERT INTO configuracion (nombre_parametro, valor, descripcion, fecha_actualizacion)
+                    VALUES (%s, %s, %s, CURRENT_DATE)
+                    ON CONFLICT (nombre_parametro) DO NOTHING
+                    ''', (nombre, valor, descripcion))
+
+                conn.commit()
+                invalidar_cache_configuracion()
+                return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al crear tabla configuracion: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
+    
+    @classmethod
+    def _desde_fila(cls, row):
+        """Construye un parámetro a partir de una fila (id, nombre, valor, descripción, fecha)"""
+        config = object.__new__(cls)
+        config.id, config.nombre_parametro, config.valor, config.descripcion, config.fecha_actualizacion = row
+        return config
     
     @classmethod
     def get_all(cls):
         """Obtiene todos los parámetros de configuración"""
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, nombre_parametro, valor, descripcion, fecha_actualizacion 
-                FROM configuracion 
-                ORDER BY nombre_parametro
-            """)
+            filas = obtener_filas_configuracion()
             configuraciones = []
-            for row in cursor.fetchall():
-                id, nombre_parametro, valor, descripcion, fecha_actualizacion = row
-                configuraciones.append(cls(nombre_parametro, valor, descripcion, fecha_actualizacion, id))
+            for nombre in sorted(filas):
+                configuraciones.append(cls._desde_fila(filas[nombre]))
             return configuraciones
         except Exception as e:
             print(f"Error al obtener configuraciones: {e}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
     def get_by_nombre(cls, nombre_parametro):
         """Obtiene un parámetro de configuración por su nombre"""
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, nombre_parametro, valor, descripcion, fecha_actualizacion 
-                FROM configuracion 
-                WHERE nombre_parametro = %s
-            """, (nombre_parametro,))
-            row = cursor.fetchone()
-            if row:
-                id, nombre_parametro, valor, descripcion, fecha_actualizacion = row
-                return cls(nombre_parametro, valor, descripcion, fecha_actualizacion, id)
+            fila = obtener_filas_configuracion().get(nombre_parametro)
+            if fila:
+                return cls._desde_fila(fila)
             return None
         except Exception as e:
             print(f"Error al obtener configuración por nombre: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     @classmethod
     def get_by_id(cls, id):
         """Obtiene un parámetro de configuración por su ID"""
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, nombre_parametro, valor, descripcion, fecha_actualizacion 
-                FROM configuracion 
-                WHERE id = %s
-            """, (id,))
-            row = cursor.fetchone()
-            if row:
-                id, nombre_parametro, valor, descripcion, fecha_actualizacion = row
-                return cls(nombre_parametro, valor, descripcion, fecha_actualizacion, id)
-            return None
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, nombre_parametro, valor, descripcion, fecha_actualizacion 
+                    FROM configuracion 
+                    WHERE id = %s
+                """, (id,))
+                row = cursor.fetchone()
+                if row:
+                    return cls._desde_fila(row)
+                return None
         except Exception as e:
             print(f"Error al obtener configuración: {e}")
             return None
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
-    def save(self):
-        """Guarda o actualiza un parámetro de configuración"""
-        conn = None
-        cursor = None
+    def insertar(self):
+        """Inserta el parámetro con una sola sentencia.
+
+        A diferencia de save, no sobrescribe un parámetro existente: si el nombre ya
+        está en uso lanza ErrorDuplicado. Devuelve False si hubo un error de base de datos.
+        """
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            
-            if self.id:
-                # Actualizar un parámetro existente
-                cursor.execute("""
-                    UPDATE configuracion 
-                    SET nombre_parametro = %s, valor = %s, descripcion = %s, fecha_actualizacion = CURRENT_DATE
-                    WHERE id = %s
-                """, (self.nombre_parametro, self.valor, self.descripcion, self.id))
-            else:
-                # Insertar un nuevo parámetro
+            with conexion() as conn, conn.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO configuracion (nombre_parametro, valor, descripcion, fecha_actualizacion)
                     VALUES (%s, %s, %s, CURRENT_DATE)
-                    ON CONFLICT (nombre_parametro) DO UPDATE 
-                    SET valor = EXCLUDED.valor, descripcion = EXCLUDED.descripcion, fecha_actualizacion = CURRENT_DATE
-                    RETURNING id
+                    ON CONFLICT (nombre_parametro) DO NOTHING
+                    RETURNING id, fecha_actualizacion
                 """, (self.nombre_parametro, self.valor, self.descripcion))
-                self.id = cursor.fetchone()[0]
-            
-            conn.commit()
-            return True
+                row = cursor.fetchone()
+                conn.commit()
+        except Exception as e:
+            print(f"Error al insertar configuración: {e}")
+            return False
+        if row is None:
+            raise ErrorDuplicado('nombre_parametro')
+        self.id, self.fecha_actualizacion = row
+        invalidar_cache_configuracion()
+        return True
+    
+    # Columnas que puede cambiar actualizar_parcial
+    _CAMPOS_ACTUALIZABLES = ('nombre_parametro', 'valor', 'descripcion')
+    
+    @classmethod
+    def actualizar_parcial(cls, id=None, nombre_parametro=None, **cambios):
+        """Actualiza solo los campos indicados de un parámetro, buscado por ID o por nombre.
+
+        Es una sola sentencia UPDATE ... RETURNING: devuelve el parámetro ya actualizado,
+        None si no existe y False si hubo un error de base de datos. Si el nuevo nombre
+        ya está en uso se lanza ErrorDuplicado.
+        """
+        desconocidos = set(cambios) - set(cls._CAMPOS_ACTUALIZABLES)
+        if desconocidos:
+            raise ValueError(f"Campos no actualizables: {', '.join(sorted(desconocidos))}")
+        if id is None and nombre_parametro is None:
+            raise ValueError("Debe proporcionar un ID o un nombre de parámetro")
+        asignaciones = [f"{campo} = %s" for campo in cambios] + ["fecha_actualizacion = CURRENT_DATE"]
+        parametros = list(cambios.values())
+        if id is not None:
+            where = "id = %s"
+            parametros.append(id)
+        else:
+            where = "nombre_parametro = %s"
+            parametros.append(nombre_parametro)
+
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE configuracion SET {', '.join(asignaciones)}
+                    WHERE {where}
+                    RETURNING id, nombre_parametro, valor, descripcion, fecha_actualizacion
+                """, parametros)
+                row = cursor.fetchone()
+                conn.commit()
+        except errors.UniqueViolation:
+            raise ErrorDuplicado('nombre_parametro')
+        except Exception as e:
+            print(f"Error al actualizar configuración: {e}")
+            return False
+        if row is None:
+            return None
+        invalidar_cache_configuracion()
+        return cls._desde_fila(row)
+    
+    def save(self):
+        """Guarda o actualiza un parámetro de configuración"""
+        try:
+            with conexion() as conn, conn.cursor() as cursor:
+
+                if self.id:
+                    # Actualizar un parámetro existente
+                    cursor.execute("""
+                        UPDATE configuracion 
+                        SET nombre_parametro = %s, valor = %s, descripcion = %s, fecha_actualizacion = CURRENT_DATE
+                        WHERE id = %s
+                    """, (self.nombre_parametro, self.valor, self.descripcion, self.id))
+                else:
+                    # Insertar un nuevo parámetro
+                    cursor.execute("""
+                        INSERT INTO configuracion (nombre_parametro, valor, descripcion, fecha_actualizacion)
+                        VALUES (%s, %s, %s, CURRENT_DATE)
+                        ON CONFLICT (nombre_parametro) DO UPDATE 
+                        SET valor = EXCLUDED.valor, descripcion = EXCLUDED.descripcion, fecha_actualizacion = CURRENT_DATE
+                        RETURNING id
+                    """, (self.nombre_parametro, self.valor, self.descripcion))
+                    self.id = cursor.fetchone()[0]
+
+                conn.commit()
+                invalidar_cache_configuracion()
+                return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al guardar configuración: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
     
     def delete(self):
         """Elimina un parámetro de configuración"""
         if not self.id:
             return False
         
-        conn = None
-        cursor = None
         try:
-            conn = obtener_conexion()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM configuracion WHERE id = %s", (self.id,))
-            conn.commit()
-            return True
+            with conexion() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM configuracion WHERE id = %s", (self.id,))
+                conn.commit()
+                invalidar_cache_configuracion()
+                return True
         except Exception as e:
-            if conn:
-                conn.rollback()
             print(f"Error al eliminar configuración: {e}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                liberar_conexion(conn)
+
+class CorridaNomina(Model):
+    """Modelo de solo lectura para la tabla corridas_nomina.
+
+    Las corridas las crea y avanza model.liquidacion_periodo; el modelo sirve para
+    consultar su estado y su avance mientras se ejecutan.
+    """
+
+    __slots__ = ('id', 'fecha_liquidacion', 'estado', 'parametros', 'total_empleados', 'procesados',
+                 'liquidados', 'errores', 'ultimo_empleado_id', 'mensaje', 'fecha_creacion',
+                 'fecha_actualizacion')
+
+    @classmethod
+    def create_table(cls):
+        """La tabla se crea con las migraciones del esquema"""
+        try:
+            aplicar_migraciones()
+            return True
+        except Exception as e:
+            print(f"Error al crear tabla corridas_nomina: {e}")
+            return False
+
+    @classmethod
+    def _desde_fila(cls, row):
+        corrida = object.__new__(cls)
+        for campo, valor in zip(cls.__slots__, row):
+            setattr(corrida, campo, valor)
+        return corrida
+
+    @property
+    def progreso(self):
+        """Porcentaje de empleados procesados (los contratados durante la corrida también cuentan)"""
+        if self.estado == 'completada':
+            return 100.0
+        if not self.total_empleados:
+            return 0.0
+        return min(100.0, 100.0 * self.procesados / self.total_empleados)
+
+    @classmethod
+    def get_all(cls, limite=10):
+        """Obtiene las corridas más recientes"""
+        try:
+            return [cls._desde_fila(row) for row in listar_corridas(limite)]
+        except Exception as e:
+            print(f"Error al obtener corridas de nómina: {e}")
+            return []
+
+    @classmethod
+    def get_by_id(cls, id):
+        """Obtiene una corrida por su ID"""
+        try:
+            row = obtener_corrida(id)
+            if row:
+                return cls._desde_fila(row)
+            return None
+        except Exception as e:
+            print(f"Error al obtener corrida de nómina: {e}")
+            return None
 
 # Función para inicializar todas las tablas
 def inicializar_tablas():
-    """Crea todas las tablas en la base de datos"""
-    Empleado.create_table()
-    Liquidacion.create_table()
-    Configuracion.create_table()
+    """Lleva el esquema a la última versión; si ya está al día no ejecuta DDL ni inserciones"""
+    if aplicar_migraciones():
+        invalidar_cache_configuracion()
     print("Tablas inicializadas correctamente")
 
 if __name__ == "__main__":
@@ -1,6 +1,15 @@
 import psycopg2
 from psycopg2 import pool
+from psycopg2.extras import execute_values, Json
+try:
+    import numpy as np
+except ImportError:  # NumPy solo es necesario para leer_columnas
+    np = None
 import os
+import itertools
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date
 from config import secret_config
 
@@ -10,48 +19,345 @@ PGDATABASE=secret_config.PGDATABASE
 PGUSER=secret_config.PGUSER
 PGPASSWORD=secret_config.PGPASSWORD
 
-# Crear un pool de conexiones para mejor rendimiento
+# Pool de conexiones compartido por todos los hilos; se crea en el primer uso
 connection_pool = None
 
+# Tamaño del pool (configurable por variables de entorno)
+POOL_MIN_CONEXIONES = int(os.environ.get('NOMINA_POOL_MIN', 1))
+POOL_MAX_CONEXIONES = int(os.environ.get('NOMINA_POOL_MAX', 10))
+
+_pool_lock = threading.Lock()
+_pool_pid = None         # Proceso que creó el pool actual
+_pools_heredados = []    # Pools del proceso padre tras un fork; nunca se cierran en el hijo
+
+# Filas enviadas por sentencia en las inserciones masivas
+TAMANO_LOTE_INSERCION = 1000
+
+# Filas que trae cada ida al servidor al recorrer un cursor con nombre
+ITERSIZE = int(os.environ.get('NOMINA_ITERSIZE', 2000))
+
+_contador_cursores = itertools.count(1)
+
+# Transacción abierta con transaccion() en cada hilo
+_transaccion_local = threading.local()
+
+# Bytes de COPY binario que se acumulan antes de convertirlos a arreglos
+TAMANO_BLOQUE_COPY = 4 * 1024 * 1024
+
+# Tipos admitidos por leer_columnas: (formato big-endian en COPY binario, dtype del resultado)
+TIPOS_COLUMNA = {
+    'int4': ('>i4', 'int32'),
+    'int8': ('>i8', 'int64'),
+    'float8': ('>f8', 'float64'),
+    'date': ('>i4', 'datetime64[D]'),
+}
+
+_FIRMA_COPY_BINARIO = b'PGCOPY\n\xff\r\n\x00'
+_DIAS_EPOCA_POSTGRES = 10957  # Días entre 1970-01-01 y 2000-01-01, origen de las fechas en PostgreSQL
+
+# Caché en memoria de la tabla configuracion (segundos de vigencia)
+CONFIG_CACHE_TTL = float(os.environ.get('NOMINA_CONFIG_CACHE_TTL', 300))
+
+_cache_lock = threading.Lock()
+_cache_configuracion = {
+    'version': 0,            # Se incrementa con cada escritura sobre la tabla
+    'version_cargada': None,
+    'expira': 0.0,
+    'filas': None,
+    'aciertos': 0,
+    'fallos': 0
+}
+
 def inicializar_pool():
-    """Inicializa el pool de conexiones"""
-    global connection_pool
-    try:
-        connection_pool = pool.SimpleConnectionPool(
-            1, 10,  # min y max conexiones
-            host=PGHOST,
-            database=PGDATABASE,
-            user=PGUSER,
-            password=PGPASSWORD
-        )
-        print("Pool de conexiones inicializado correctamente")
-    except Exception as e:
-        print(f"Error al inicializar el pool de conexiones: {e}")
-        raise
+    """Inicializa el pool de conexiones si aún no existe en este proceso"""
+    global connection_pool, _pool_pid
+    with _pool_lock:
+        if connection_pool is not None and _pool_pid == os.getpid():
+            return connection_pool
+        try:
+            connection_pool = pool.ThreadedConnectionPool(
+                POOL_MIN_CONEXIONES, POOL_MAX_CONEXIONES,
+                host=PGHOST,
+                database=PGDATABASE,
+                user=PGUSER,
+                password=PGPASSWORD
+            )
+            _pool_pid = os.getpid()
+            print("Pool de conexiones inicializado correctamente")
+            return connection_pool
+        except Exception as e:
+            print(f"Error al inicializar el pool de conexiones: {e}")
+            raise
 
 def obtener_conexion():
-    """Obtiene una conexión del pool"""
-    if connection_pool is None:
-        inicializar_pool()
-    return connection_pool.getconn()
+    """Obtiene una conexión del pool, creándolo en el primer uso"""
+    pool_actual = connection_pool
+    if pool_actual is None or _pool_pid != os.getpid():
+        pool_actual = inicializar_pool()
+    return pool_actual.getconn()
 
 def liberar_conexion(conn):
     """Devuelve la conexión al pool"""
-    if connection_pool is not None:
+    # Una conexión heredada de otro proceso o de un pool ya cerrado no se devuelve
+    if connection_pool is not None and _pool_pid == os.getpid() and not connection_pool.closed:
         connection_pool.putconn(conn)
 
+class TransaccionRevertida(Exception):
+    """Una operación dentro de transaccion() falló y no se guardó ningún cambio del bloque"""
+
+class _ConexionCompartida:
+    """Conexión de una transacción abierta que usan todas las operaciones del bloque.
+
+    commit no hace nada, porque confirma transaccion() al salir; rollback marca la
+    transacción como fallida para revertirla completa al final.
+    """
+
+    def __init__(self, conn, estado):
+        self._conn = conn
+        self._estado = estado
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._estado['fallida'] = True
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+def _estado_transaccion():
+    return getattr(_transaccion_local, 'estado', None)
+
+def en_transaccion():
+    """Indica si el hilo actual está dentro de transaccion()"""
+    return _estado_transaccion() is not None
+
+@contextmanager
+def transaccion():
+    """Agrupa todas las operaciones de un bloque with en una sola transacción.
+
+    Dentro del bloque conexion() devuelve siempre la misma conexión y los commit de
+    las funciones y modelos no tienen efecto: se confirma una sola vez al salir. Si el
+    bloque lanza una excepción o alguna operación falló, se revierte todo (en el
+    segundo caso se lanza TransaccionRevertida). Los bloques anidados se unen al externo.
+    """
+    estado = _estado_transaccion()
+    if estado is not None:
+        try:
+            yield estado['conexion']
+        except BaseException:
+            estado['fallida'] = True
+            raise
+        return
+
+    conn = obtener_conexion()
+    estado = {'fallida': False, 'al_confirmar': [], 'al_revertir': []}
+    estado['conexion'] = _ConexionCompartida(conn, estado)
+    _transaccion_local.estado = estado
+    try:
+        try:
+            yield estado['conexion']
+            if estado['fallida']:
+                raise TransaccionRevertida("Una operación de la transacción falló; no se guardó ningún cambio")
+            conn.commit()
+        except BaseException:
+            _transaccion_local.estado = None
+            if not conn.closed:
+                conn.rollback()
+            for funcion in estado['al_revertir']:
+                funcion()
+            raise
+    finally:
+        _transaccion_local.estado = None
+        liberar_conexion(conn)
+    for funcion in estado['al_confirmar']:
+        funcion()
+
+def despues_de_confirmar(funcion):
+    """Ejecuta funcion cuando se confirme la transacción en curso, o ya si no hay una"""
+    estado = _estado_transaccion()
+    if estado is None:
+        funcion()
+    elif funcion not in estado['al_confirmar']:
+        estado['al_confirmar'].append(funcion)
+
+def despues_de_revertir(funcion):
+    """Ejecuta funcion si la transacción en curso se revierte; sin transacción no hace nada"""
+    estado = _estado_transaccion()
+    if estado is not None and funcion not in estado['al_revertir']:
+        estado['al_revertir'].append(funcion)
+
+@contextmanager
+def conexion():
+    """Presta una conexión del pool durante un bloque with.
+
+    Si el bloque lanza una excepción se hace rollback antes de propagarla;
+    la conexión siempre vuelve al pool. El commit queda a cargo del llamador.
+    Dentro de transaccion() se presta la conexión compartida de la transacción.
+    """
+    estado = _estado_transaccion()
+    if estado is not None:
+        conn = estado['conexion']
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        return
+
+    conn = obtener_conexion()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        liberar_conexion(conn)
+
 def cerrar_pool():
     """Cierra el pool de conexiones"""
+    global connection_pool, _pool_pid
+    with _pool_lock:
+        if connection_pool is not None and _pool_pid == os.getpid():
+            connection_pool.closeall()
+            print("Pool de conexiones cerrado")
+        connection_pool = None
+        _pool_pid = None
+
+def _reiniciar_pool_en_hijo():
+    """Descarta el pool heredado tras un fork para que el hijo cree el suyo.
+
+    Los sockets heredados pertenecen a las sesiones del padre: cerrarlos desde el
+    hijo las terminaría, por eso solo se conservan referenciados sin usarlos.
+    """
+    global connection_pool, _pool_pid, _pool_lock, _cache_lock
+    # Un lock tomado por otro hilo del padre quedaría tomado para siempre en el hijo
+    _pool_lock = threading.Lock()
+    _cache_lock = threading.Lock()
+    # Una transacción abierta en el padre no continúa en el hijo
+    _transaccion_local.estado = None
     if connection_pool is not None:
-        connection_pool.closeall()
-        print("Pool de conexiones cerrado")
+        _pools_heredados.append(connection_pool)
+    connection_pool = None
+    _pool_pid = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_pool_en_hijo)
+
+def iterar_consulta(consulta, parametros=None, itersize=None):
+    """Recorre el resultado de una consulta con un cursor del lado del servidor.
+
+    Las filas se traen en bloques de itersize (ITERSIZE por defecto), así que la
+    memoria usada no depende del tamaño de la tabla. La conexión queda prestada
+    hasta que el generador se agota o se cierra.
+    """
+    with conexion() as conn, conn.cursor(name=f"nomina_cursor_{next(_contador_cursores)}") as cursor:
+        cursor.itersize = itersize or ITERSIZE
+        cursor.execute(consulta, parametros)
+        yield from cursor
+
+class _LectorCopyBinario:
+    """Convierte la salida de COPY ... TO STDOUT (FORMAT binary) en arreglos de NumPy.
+
+    Se usa como archivo destino de copy_expert. Como todas las columnas tienen
+    ancho fijo y no admiten NULL, cada fila ocupa los mismos bytes y un bloque
+    completo se interpreta de una vez con un dtype estructurado, sin crear un
+    objeto de Python por fila.
+    """
+
+    def __init__(self, columnas):
+        self.columnas = columnas
+        campos = [('cantidad_campos', '>i2')]
+        for nombre, tipo in columnas:
+            formato = TIPOS_COLUMNA[tipo][0]
+            campos.append((f'_largo_{nombre}', '>i4'))
+            campos.append((nombre, formato))
+        self.estructura = np.dtype(campos)
+        self.anchos = [np.dtype(TIPOS_COLUMNA[tipo][0]).itemsize for _, tipo in columnas]
+        self.bloques = {nombre: [] for nombre, _ in columnas}
+        self.buffer = bytearray()
+        self.encabezado_leido = False
+
+    def write(self, datos):
+        self.buffer += datos
+        if len(self.buffer) >= TAMANO_BLOQUE_COPY:
+            self._procesar()
+
+    def _leer_encabezado(self):
+        # Firma (11 bytes), banderas (4) y largo de la extensión del encabezado (4)
+        if len(self.buffer) < 19:
+            return False
+        if bytes(self.buffer[:11]) != _FIRMA_COPY_BINARIO:
+            raise ValueError("La salida de COPY no está en formato binario")
+        extension = int.from_bytes(self.buffer[15:19], 'big')
+        if len(self.buffer) < 19 + extension:
+            return False
+        del self.buffer[:19 + extension]
+        self.encabezado_leido = True
+        return True
+
+    def _procesar(self):
+        if not self.encabezado_leido and not self._leer_encabezado():
+            return
+        cantidad = len(self.buffer) // self.estructura.itemsize
+        if cantidad == 0:
+            return
+        # La vista sobre el buffer solo vive dentro de _convertir, antes de recortarlo
+        self._convertir(np.frombuffer(self.buffer, dtype=self.estructura, count=cantidad))
+        del self.buffer[:cantidad * self.estructura.itemsize]
+
+    def _convertir(self, filas):
+        if (filas['cantidad_campos'] != len(self.columnas)).any():
+            raise ValueError("El resultado de COPY no tiene las columnas esperadas")
+        for (nombre, tipo), ancho in zip(self.columnas, self.anchos):
+            if (filas[f'_largo_{nombre}'] != ancho).any():
+                raise ValueError(f"La columna {nombre} tiene valores NULL o de otro tipo")
+            valores = filas[nombre]
+            if tipo == 'date':
+                valores = valores.astype(np.int64) + _DIAS_EPOCA_POSTGRES
+            self.bloques[nombre].append(valores.astype(TIPOS_COLUMNA[tipo][1]))
+
+    def resultado(self):
+        self._procesar()
+        # Lo único que puede quedar es el final del COPY: un entero de 16 bits igual a -1
+        if not self.encabezado_leido or bytes(self.buffer) != b'\xff\xff':
+            raise ValueError("La salida de COPY binario está incompleta")
+        columnas = {}
+        for nombre, tipo in self.columnas:
+            bloques = self.bloques.pop(nombre)
+            if not bloques:
+                columnas[nombre] = np.empty(0, dtype=TIPOS_COLUMNA[tipo][1])
+            elif len(bloques) == 1:
+                columnas[nombre] = bloques[0]
+            else:
+                columnas[nombre] = np.concatenate(bloques)
+        return columnas
+
+def leer_columnas(consulta, parametros, columnas):
+    """Ejecuta una consulta y devuelve su resultado por columnas como arreglos de NumPy.
+
+    columnas es una lista de (nombre, tipo) en el orden del SELECT, con tipos de
+    TIPOS_COLUMNA; la consulta debe devolver exactamente esos tipos y ningún NULL
+    (usar casts y COALESCE). Los datos llegan con COPY binario y se convierten por
+    bloques de TAMANO_BLOQUE_COPY bytes, así que nunca hay un objeto de Python por
+    fila. Devuelve un diccionario {nombre: arreglo}.
+    """
+    if np is None:
+        raise ImportError("La lectura por columnas requiere NumPy (pip install numpy)")
+    for nombre, tipo in columnas:
+        if tipo not in TIPOS_COLUMNA:
+            raise ValueError(f"Tipo de columna no soportado para {nombre}: {tipo}")
+    lector = _LectorCopyBinario(columnas)
+    with conexion() as conn, conn.cursor() as cursor:
+        consulta = cursor.mogrify(consulta, parametros)
+        cursor.copy_expert(b"COPY (" + consulta + b") TO STDOUT WITH (FORMAT binary)", lector)
+        return lector.resultado()
 
 # Funciones CRUD para empleados
 def registrar_empleado(nombre, documento, salario_base, fecha_ingreso):
     """Registra un nuevo empleado en la base de datos"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    with conexion() as conn, conn.cursor() as cursor:
         cursor.execute(
             "INSERT INTO empleados (nombre, documento, salario_base, fecha_ingreso) VALUES (%s, %s, %s, %s) RETURNING id",
             (nombre, documento, salario_base, fecha_ingreso)
@@ -59,61 +365,63 @@ def registrar_empleado(nombre, documento, salario_base, fecha_ingreso):
         id_empleado = cursor.fetchone()[0]
         conn.commit()
         return id_empleado
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
 
 def obtener_empleado(id_empleado=None, documento=None):
     """Obtiene información de un empleado por ID o documento"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    if not id_empleado and not documento:
+        raise ValueError("Debe proporcionar un ID o documento")
+    with conexion() as conn, conn.cursor() as cursor:
         if id_empleado:
             cursor.execute("SELECT * FROM empleados WHERE id = %s", (id_empleado,))
-        elif documento:
-            cursor.execute("SELECT * FROM empleados WHERE documento = %s", (documento,))
         else:
-            raise ValueError("Debe proporcionar un ID o documento")
-        
-        empleado = cursor.fetchone()
-        return empleado
-    except Exception as e:
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+            cursor.execute("SELECT * FROM empleados WHERE documento = %s", (documento,))
+        return cursor.fetchone()
 
 def listar_empleados():
     """Lista todos los empleados registrados"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    with conexion() as conn, conn.cursor() as cursor:
         cursor.execute("SELECT * FROM empleados ORDER BY nombre")
-        empleados = cursor.fetchall()
-        return empleados
-    except Exception as e:
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+        return cursor.fetchall()
+
+def iterar_empleados(itersize=None):
+    """Recorre todos los empleados registrados sin cargarlos todos en memoria"""
+    return iterar_consulta("SELECT * FROM empleados ORDER BY nombre, id", itersize=itersize)
+
+def sincronizar_empleados(empleados):
+    """Inserta o actualiza muchos empleados por documento, en sentencias de TAMANO_LOTE_INSERCION filas.
+
+    Cada elemento es una tupla (nombre, documento, salario_base, fecha_ingreso); un
+    documento no debe repetirse en la misma llamada. Los empleados que ya existen con
+    los mismos datos no se modifican. Devuelve (id, documento, insertado) de cada
+    empleado insertado o actualizado.
+    """
+    filas = list(empleados)
+    if not filas:
+        return []
+
+    with conexion() as conn, conn.cursor() as cursor:
+        resultado = execute_values(
+            cursor,
+            """INSERT INTO empleados (nombre, documento, salario_base, fecha_ingreso)
+               VALUES %s
+               ON CONFLICT (documento) DO UPDATE
+               SET nombre = EXCLUDED.nombre, salario_base = EXCLUDED.salario_base,
+                   fecha_ingreso = EXCLUDED.fecha_ingreso
+               WHERE (empleados.nombre, empleados.salario_base, empleados.fecha_ingreso)
+                     IS DISTINCT FROM (EXCLUDED.nombre, EXCLUDED.salario_base, EXCLUDED.fecha_ingreso)
+               RETURNING id, documento, (xmax = 0) AS insertado""",
+            filas,
+            page_size=TAMANO_LOTE_INSERCION,
+            fetch=True
+        )
+        conn.commit()
+        return resultado
 
 # Funciones para liquidaciones
 def registrar_liquidacion(empleado_id, salario_base, horas_diurnas, horas_nocturnas, 
                          bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina):
     """Registra una nueva liquidación de nómina"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    with conexion() as conn, conn.cursor() as cursor:
         cursor.execute(
             """INSERT INTO liquidaciones 
                (empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas, 
@@ -125,82 +433,405 @@ def registrar_liquidacion(empleado_id, salario_base, horas_diurnas, horas_noctur
         id_liquidacion = cursor.fetchone()[0]
         conn.commit()
         return id_liquidacion
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+
+def registrar_liquidaciones(liquidaciones):
+    """Registra muchas liquidaciones en una sola transacción.
+
+    Cada elemento es una tupla (empleado_id, fecha_liquidacion, salario_base, horas_diurnas,
+    horas_nocturnas, bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina);
+    si fecha_liquidacion es None se usa la fecha actual. Devuelve los IDs generados en el
+    mismo orden de entrada.
+    """
+    hoy = date.today()
+    filas = [(fila[0], fila[1] or hoy) + tuple(fila[2:]) for fila in liquidaciones]
+    if not filas:
+        return []
+
+    with conexion() as conn, conn.cursor() as cursor:
+        resultado = execute_values(
+            cursor,
+            """INSERT INTO liquidaciones 
+               (empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas, 
+                bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina) 
+               VALUES %s RETURNING id""",
+            filas,
+            page_size=TAMANO_LOTE_INSERCION,
+            fetch=True
+        )
+        conn.commit()
+        return [fila[0] for fila in resultado]
 
 def obtener_liquidacion(id_liquidacion):
     """Obtiene información de una liquidación por ID"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    with conexion() as conn, conn.cursor() as cursor:
         cursor.execute("""
-            SELECT l.*, e.nombre, e.documento 
+            SELECT l.id, l.empleado_id, l.fecha_liquidacion, l.salario_base, l.horas_diurnas, l.horas_nocturnas,
+                   l.bonos_extra, l.deduccion_adicional, l.auxilio_transporte, l.total_nomina,
+                   e.nombre, e.documento
             FROM liquidaciones l
             JOIN empleados e ON l.empleado_id = e.id
             WHERE l.id = %s
         """, (id_liquidacion,))
-        liquidacion = cursor.fetchone()
-        return liquidacion
-    except Exception as e:
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+        return cursor.fetchone()
 
 def listar_liquidaciones_empleado(empleado_id):
     """Lista todas las liquidaciones de un empleado"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
+    with conexion() as conn, conn.cursor() as cursor:
         cursor.execute("""
-            SELECT * FROM liquidaciones 
+            SELECT id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas,
+                   bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina
+            FROM liquidaciones
             WHERE empleado_id = %s
             ORDER BY fecha_liquidacion DESC
         """, (empleado_id,))
-        liquidaciones = cursor.fetchall()
-        return liquidaciones
-    except Exception as e:
-        raise e
+        return cursor.fetchall()
+
+# Funciones para las corridas de nómina
+_COLUMNAS_CORRIDA = """id, fecha_liquidacion, estado, parametros, total_empleados, procesados, liquidados,
+                       errores, ultimo_empleado_id, mensaje, fecha_creacion, fecha_actualizacion"""
+
+def crear_corrida(fecha_liquidacion, parametros):
+    """Registra una corrida pendiente con la instantánea de parámetros y el total de empleados actual"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """INSERT INTO corridas_nomina (fecha_liquidacion, parametros, total_empleados)
+               SELECT %s, %s, COUNT(*) FROM empleados RETURNING id""",
+            (fecha_liquidacion, Json(parametros))
+        )
+        corrida_id = cursor.fetchone()[0]
+        conn.commit()
+        return corrida_id
+
+def obtener_corrida(corrida_id):
+    """Obtiene una corrida de nómina por ID"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT {_COLUMNAS_CORRIDA} FROM corridas_nomina WHERE id = %s", (corrida_id,))
+        return cursor.fetchone()
+
+def listar_corridas(limite=10):
+    """Lista las corridas de nómina más recientes"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT {_COLUMNAS_CORRIDA} FROM corridas_nomina ORDER BY id DESC LIMIT %s", (limite,))
+        return cursor.fetchall()
+
+def iniciar_corrida(corrida_id):
+    """Marca una corrida como en proceso y devuelve (fecha_liquidacion, parametros, ultimo_empleado_id).
+
+    Devuelve None si la corrida no existe, ya está completada o se reparte entre
+    workers con la cola de tareas.
+    """
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET estado = 'en_proceso', mensaje = NULL, fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s AND estado <> 'completada'
+                 AND NOT EXISTS (SELECT 1 FROM tareas_nomina t WHERE t.corrida_id = corridas_nomina.id)
+               RETURNING fecha_liquidacion, parametros, ultimo_empleado_id""",
+            (corrida_id,)
+        )
+        fila = cursor.fetchone()
+        conn.commit()
+        return fila
+
+def registrar_bloque_corrida(corrida_id, filas, errores, ultimo_empleado_id):
+    """Guarda las liquidaciones de un bloque y avanza el punto de control de la corrida.
+
+    Ambas cosas se confirman en la misma transacción: si el proceso se cae, o el
+    bloque quedó completo con su punto de control o no quedó nada. filas tiene el
+    formato de registrar_liquidaciones y errores es la cantidad de empleados del
+    bloque que no se pudieron liquidar. Un empleado que ya tiene liquidación en la
+    corrida no se inserta de nuevo. Devuelve cuántas liquidaciones se insertaron.
+    """
+    hoy = date.today()
+    filas = [(corrida_id, fila[0], fila[1] or hoy) + tuple(fila[2:]) for fila in filas]
+
+    with conexion() as conn, conn.cursor() as cursor:
+        insertadas = 0
+        if filas:
+            insertadas = len(execute_values(
+                cursor,
+                """INSERT INTO liquidaciones
+                   (corrida_id, empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas,
+                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina)
+                   VALUES %s
+                   ON CONFLICT (corrida_id, empleado_id) WHERE corrida_id IS NOT NULL DO NOTHING
+                   RETURNING id""",
+                filas,
+                page_size=TAMANO_LOTE_INSERCION,
+                fetch=True
+            ))
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET procesados = procesados + %s, liquidados = liquidados + %s, errores = errores + %s,
+                   ultimo_empleado_id = GREATEST(ultimo_empleado_id, %s),
+                   fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s""",
+            (len(filas) + errores, insertadas, errores, ultimo_empleado_id, corrida_id)
+        )
+        conn.commit()
+        return insertadas
+
+def finalizar_corrida(corrida_id, estado, mensaje=None):
+    """Deja una corrida como completada o fallida"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET estado = %s, mensaje = %s, fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s""",
+            (estado, mensaje, corrida_id)
+        )
+        conn.commit()
+
+def empleados_en_rango(desde_id, hasta_id):
+    """Obtiene (id, salario_base) de los empleados con desde_id <= id < hasta_id"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, salario_base FROM empleados WHERE id >= %s AND id < %s ORDER BY id",
+            (desde_id, hasta_id)
+        )
+        return cursor.fetchall()
+
+# Funciones para la cola de tareas de nómina
+def encolar_tareas(corrida_id, tamano_bloque):
+    """Divide los empleados actuales en tareas de hasta tamano_bloque empleados para una corrida.
+
+    Deja la corrida en proceso (o completada si no hay empleados) y devuelve la
+    cantidad de tareas creadas.
+    """
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """INSERT INTO tareas_nomina (corrida_id, desde_empleado_id, hasta_empleado_id)
+               SELECT %s, MIN(id), MAX(id) + 1
+               FROM (SELECT id, (ROW_NUMBER() OVER (ORDER BY id) - 1) / %s AS bloque FROM empleados) e
+               GROUP BY bloque
+               ON CONFLICT (corrida_id, desde_empleado_id) DO NOTHING""",
+            (corrida_id, tamano_bloque)
+        )
+        tareas = cursor.rowcount
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET estado = CASE WHEN EXISTS (SELECT 1 FROM tareas_nomina WHERE corrida_id = %s)
+                                 THEN 'en_proceso' ELSE 'completada' END,
+                   fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s""",
+            (corrida_id, corrida_id)
+        )
+        conn.commit()
+        return tareas
+
+def tomar_tarea(corrida_id=None):
+    """Bloquea la siguiente tarea pendiente que ningún otro worker tenga tomada.
+
+    Devuelve (tarea_id, corrida_id, desde_empleado_id, hasta_empleado_id,
+    fecha_liquidacion, parametros) o None si no quedan tareas libres. Debe llamarse
+    dentro de transaccion(): la tarea queda bloqueada hasta que la transacción
+    termine, y si el worker se cae el bloqueo se libera y otro la vuelve a tomar.
+    """
+    if not en_transaccion():
+        raise RuntimeError("tomar_tarea debe llamarse dentro de transaccion()")
+    filtro = "AND t.corrida_id = %s" if corrida_id is not None else ""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT t.id, t.corrida_id, t.desde_empleado_id, t.hasta_empleado_id,
+                       c.fecha_liquidacion, c.parametros
+                FROM tareas_nomina t
+                JOIN corridas_nomina c ON c.id = t.corrida_id
+                WHERE t.estado = 'pendiente' {filtro}
+                ORDER BY t.id
+                LIMIT 1
+                FOR UPDATE OF t SKIP LOCKED""",
+            (corrida_id,) if corrida_id is not None else None
+        )
+        return cursor.fetchone()
+
+def completar_tarea(tarea_id, corrida_id, worker):
+    """Marca una tarea como completada y, si era la última, también su corrida.
+
+    Se llama en la transacción de la tarea después de registrar_bloque_corrida,
+    que ya bloqueó la fila de la corrida: así dos workers no pueden terminar a la
+    vez sin ver cada uno la tarea del otro.
+    """
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """UPDATE tareas_nomina
+               SET estado = 'completada', worker = %s, mensaje = NULL, fecha_fin = CURRENT_TIMESTAMP
+               WHERE id = %s""",
+            (worker, tarea_id)
+        )
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET estado = 'completada', fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s AND estado = 'en_proceso'
+                 AND NOT EXISTS (SELECT 1 FROM tareas_nomina t
+                                 WHERE t.corrida_id = corridas_nomina.id AND t.estado <> 'completada')""",
+            (corrida_id,)
+        )
+        conn.commit()
+
+def fallar_tarea(tarea_id, worker, mensaje, max_intentos):
+    """Registra un intento fallido de una tarea.
+
+    La tarea vuelve a la cola hasta agotar max_intentos; entonces queda fallida y
+    su corrida también. Devuelve el nuevo estado de la tarea.
+    """
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """UPDATE tareas_nomina
+               SET intentos = intentos + 1, worker = %s, mensaje = %s,
+                   estado = CASE WHEN intentos + 1 >= %s THEN 'fallida' ELSE 'pendiente' END
+               WHERE id = %s
+               RETURNING estado, corrida_id""",
+            (worker, mensaje, max_intentos, tarea_id)
+        )
+        estado, corrida_id = cursor.fetchone()
+        if estado == 'fallida':
+            cursor.execute(
+                """UPDATE corridas_nomina
+                   SET estado = 'fallida', mensaje = %s, fecha_actualizacion = CURRENT_TIMESTAMP
+                   WHERE id = %s""",
+                (f"Tarea {tarea_id}: {mensaje}", corrida_id)
+            )
+        conn.commit()
+        return estado
+
+def reintentar_tareas(corrida_id):
+    """Devuelve a la cola las tareas fallidas de una corrida con sus intentos en cero.
+
+    La corrida vuelve a quedar en proceso (o completada si ya no le quedan tareas
+    pendientes). Devuelve la cantidad de tareas reencoladas, o None si la corrida no
+    se reparte con la cola de tareas.
+    """
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM tareas_nomina WHERE corrida_id = %s LIMIT 1", (corrida_id,))
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            """UPDATE tareas_nomina
+               SET estado = 'pendiente', intentos = 0, mensaje = NULL
+               WHERE corrida_id = %s AND estado = 'fallida'""",
+            (corrida_id,)
+        )
+        tareas = cursor.rowcount
+        cursor.execute(
+            """UPDATE corridas_nomina
+               SET estado = CASE WHEN EXISTS (SELECT 1 FROM tareas_nomina t
+                                              WHERE t.corrida_id = corridas_nomina.id AND t.estado <> 'completada')
+                                 THEN 'en_proceso' ELSE 'completada' END,
+                   mensaje = NULL, fecha_actualizacion = CURRENT_TIMESTAMP
+               WHERE id = %s AND estado = 'fallida'""",
+            (corrida_id,)
+        )
+        conn.commit()
+        return tareas
+
+@contextmanager
+def bloqueo_consultivo(llave, id_recurso):
+    """Mantiene un bloqueo consultivo de sesión sobre (llave, id_recurso) durante el bloque.
+
+    Lanza RuntimeError si otra sesión ya lo tiene. El bloqueo usa una conexión
+    propia que queda fuera de transacción; si el proceso muere, PostgreSQL lo
+    libera al cerrarse la sesión.
+    """
+    conn = obtener_conexion()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", (llave, id_recurso))
+            obtenido = cursor.fetchone()[0]
+            conn.commit()
+        if not obtenido:
+            raise RuntimeError(f"El recurso {id_recurso} ya está en uso por otro proceso")
+        try:
+            yield
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", (llave, id_recurso))
+            conn.commit()
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+        liberar_conexion(conn)
 
 # Funciones para la configuración
+def _consultar_filas_configuracion():
+    """Consulta la tabla configuracion completa en una sola ida a la base de datos"""
+    with conexion() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT id, nombre_parametro, valor, descripcion, fecha_actualizacion FROM configuracion")
+        return {fila[1]: fila for fila in cursor.fetchall()}
+
+def obtener_filas_configuracion():
+    """Obtiene las filas de configuración (id, nombre, valor, descripción, fecha) indexadas por nombre.
+
+    Usa la caché del proceso mientras no venza su TTL ni cambie la versión.
+    El diccionario devuelto es compartido y no debe modificarse.
+    """
+    estado = _estado_transaccion()
+    if estado is not None and estado.get('configuracion_modificada'):
+        # La transacción cambió la tabla: sus datos aún no confirmados no van a la caché
+        return _consultar_filas_configuracion()
+
+    with _cache_lock:
+        cache = _cache_configuracion
+        if (cache['filas'] is not None and cache['version_cargada'] == cache['version']
+                and time.monotonic() < cache['expira']):
+            cache['aciertos'] += 1
+            return cache['filas']
+        cache['fallos'] += 1
+        version = cache['version']
+
+    filas = _consultar_filas_configuracion()
+
+    with _cache_lock:
+        # Si hubo una escritura mientras se consultaba, no guardar datos posiblemente viejos
+        if cache['version'] == version:
+            cache['filas'] = filas
+            cache['version_cargada'] = version
+            cache['expira'] = time.monotonic() + CONFIG_CACHE_TTL
+    return filas
+
+def invalidar_cache_configuracion():
+    """Invalida la caché de configuración incrementando su versión.
+
+    Dentro de transaccion() la invalidación espera al commit; mientras tanto las
+    lecturas de la transacción consultan la tabla sin pasar por la caché.
+    """
+    estado = _estado_transaccion()
+    if estado is not None:
+        estado['configuracion_modificada'] = True
+        despues_de_confirmar(invalidar_cache_configuracion)
+        return
+    with _cache_lock:
+        _cache_configuracion['version'] += 1
+
+def version_configuracion():
+    """Devuelve la versión actual de la configuración en este proceso"""
+    return _cache_configuracion['version']
+
+def estadisticas_cache_configuracion():
+    """Devuelve los contadores de aciertos y fallos de la caché de configuración"""
+    with _cache_lock:
+        aciertos = _cache_configuracion['aciertos']
+        fallos = _cache_configuracion['fallos']
+        version = _cache_configuracion['version']
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': aciertos / total if total else 0.0,
+        'version': version
+    }
+
 def obtener_configuracion(nombre_parametro):
     """Obtiene el valor de un parámetro de configuración"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
-        cursor.execute("SELECT valor FROM configuracion WHERE nombre_parametro = %s", (nombre_parametro,))
-        resultado = cursor.fetchone()
-        if resultado:
-            return resultado[0]
-        return None
-    except Exception as e:
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
+    fila = obtener_filas_configuracion().get(nombre_parametro)
+    if fila:
+        return fila[2]
+    return None
+
+def obtener_configuraciones():
+    """Obtiene todos los parámetros de configuración en una sola consulta"""
+    return {nombre: fila[2] for nombre, fila in obtener_filas_configuracion().items()}
 
 def actualizar_configuracion(nombre_parametro, valor, descripcion=None):
     """Actualiza un parámetro de configuración"""
-    try:
-        conn = obtener_conexion()
-        cursor = conn.cursor()
-        
+    with conexion() as conn, conn.cursor() as cursor:
         if descripcion:
             cursor.execute(
                 """UPDATE configuracion 
@@ -217,19 +848,5 @@ def actualizar_configuracion(nombre_parametro, valor, descripcion=None):
             )
         
         conn.commit()
-        return True
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        raise e
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            liberar_conexion(conn)
-
-# Inicializa el pool al importar el módulo
-try:
-    inicializar_pool()
-except Exception:
-    print("No se pudo inicializar la conexión a la base de datos al cargar el módulo")
+    invalidar_cache_configuracion()
+    return True
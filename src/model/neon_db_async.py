@@ -0,0 +1,107 @@
+import sys
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+try:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:  # psycopg 3 solo es necesario para el acceso asíncrono
+    psycopg = None
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from config import secret_config
+
+# Versión asíncrona (psycopg 3) de las funciones de neon_db que usa el pipeline de nómina.
+# Mismas consultas y mismos valores de retorno; cada función se usa con await.
+
+# Tamaño del pool asíncrono (mismas variables de entorno que el pool de neon_db)
+POOL_MIN_CONEXIONES = int(os.environ.get('NOMINA_POOL_MIN', 1))
+POOL_MAX_CONEXIONES = int(os.environ.get('NOMINA_POOL_MAX', 10))
+
+# Pool asíncrono; se crea en el primer uso dentro del ciclo de eventos
+connection_pool = None
+
+async def inicializar_pool():
+    """Abre el pool asíncrono de conexiones si aún no existe"""
+    global connection_pool
+    if psycopg is None:
+        raise ImportError("El acceso asíncrono requiere psycopg 3 (pip install \"psycopg[binary,pool]\")")
+    if connection_pool is None:
+        pool_nuevo = AsyncConnectionPool(
+            psycopg.conninfo.make_conninfo(
+                host=secret_config.PGHOST,
+                dbname=secret_config.PGDATABASE,
+                user=secret_config.PGUSER,
+                password=secret_config.PGPASSWORD
+            ),
+            min_size=POOL_MIN_CONEXIONES,
+            max_size=POOL_MAX_CONEXIONES,
+            open=False
+        )
+        await pool_nuevo.open()
+        connection_pool = pool_nuevo
+    return connection_pool
+
+async def cerrar_pool():
+    """Cierra el pool asíncrono de conexiones"""
+    global connection_pool
+    if connection_pool is not None:
+        await connection_pool.close()
+        connection_pool = None
+
+@asynccontextmanager
+async def conexion():
+    """Presta una conexión del pool durante un bloque async with.
+
+    Si el bloque termina sin errores se hace commit; si lanza una excepción,
+    rollback. La conexión siempre vuelve al pool.
+    """
+    pool_actual = connection_pool or await inicializar_pool()
+    async with pool_actual.connection() as conn:
+        yield conn
+
+# Funciones para empleados
+async def empleados_desde(desde_id, limite):
+    """Obtiene (id, salario_base) de hasta limite empleados con ID mayor que desde_id, en orden de ID"""
+    async with conexion() as conn:
+        cursor = await conn.execute(
+            "SELECT id, salario_base FROM empleados WHERE id > %s ORDER BY id LIMIT %s",
+            (desde_id, limite)
+        )
+        return await cursor.fetchall()
+
+# Funciones para liquidaciones
+async def registrar_liquidaciones(liquidaciones):
+    """Registra muchas liquidaciones en una sola transacción.
+
+    Recibe las mismas tuplas que neon_db.registrar_liquidaciones y devuelve los IDs
+    generados en el orden de entrada. psycopg envía todas las filas en modo pipeline,
+    sin esperar la respuesta de cada una.
+    """
+    hoy = date.today()
+    filas = [(fila[0], fila[1] or hoy) + tuple(fila[2:]) for fila in liquidaciones]
+    if not filas:
+        return []
+
+    async with conexion() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.executemany(
+                """INSERT INTO liquidaciones
+                   (empleado_id, fecha_liquidacion, salario_base, horas_diurnas, horas_nocturnas,
+                    bonos_extra, deduccion_adicional, auxilio_transporte, total_nomina)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
+                filas,
+                returning=True
+            )
+            ids = []
+            while True:
+                ids.append((await cursor.fetchone())[0])
+                if not cursor.nextset():
+                    break
+            return ids
+
+# Funciones para la configuración
+async def obtener_configuraciones():
+    """Obtiene todos los parámetros de configuración en una sola consulta"""
+    async with conexion() as conn:
+        cursor = await conn.execute("SELECT nombre_parametro, valor FROM configuracion")
+        return {nombre: valor for nombre, valor in await cursor.fetchall()}
@@ -0,0 +1,155 @@
+import sys
+import os
+import argparse
+import asyncio
+import time
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from model.calculo_total import ParametrosNomina
+from model.liquidacion_periodo import liquidar_bloque
+from model import neon_db_async
+
+# Empleados por página leída y liquidaciones por lote escrito
+TAMANO_PAGINA_PIPELINE = 500
+TAMANO_LOTE_PIPELINE = 1000
+
+# Elementos que puede acumular cada cola antes de frenar a la etapa anterior
+CAPACIDAD_COLAS = 4
+
+_FIN = object()  # Marca de fin de trabajo en las colas
+
+async def _paginas_empleados(tamano_pagina):
+    """Recorre los empleados por páginas con ID mayor que el último leído, como _bloques_desde"""
+    desde_id = 0
+    while True:
+        filas = await neon_db_async.empleados_desde(desde_id, tamano_pagina)
+        if not filas:
+            return
+        yield filas
+        desde_id = filas[-1][0]
+
+async def _leer_paginas(paginas, turno, cola_paginas, novedades):
+    """Etapa 1: trae páginas de empleados y las deja en la cola con sus novedades.
+
+    Cada página empieza donde terminó la anterior, así que los lectores las piden
+    de a una (turno); mientras uno espera espacio en la cola otro ya lee la siguiente.
+    """
+    while True:
+        async with turno:
+            try:
+                filas = await paginas.__anext__()
+            except StopAsyncIteration:
+                return
+        await cola_paginas.put([
+            (empleado_id, salario_base) + tuple(novedades.get(empleado_id, (0, 0, 0, 0)))
+            for empleado_id, salario_base in filas
+        ])
+
+async def _calcular(cola_paginas, cola_resultados, fecha, parametros, executor, resumen):
+    """Etapa 2: calcula cada página fuera del ciclo de eventos para no frenar la E/S"""
+    loop = asyncio.get_running_loop()
+    while True:
+        pagina = await cola_paginas.get()
+        if pagina is _FIN:
+            return
+        filas, errores = await loop.run_in_executor(executor, liquidar_bloque, pagina, fecha, parametros)
+        resumen['errores'].extend(errores)
+        if filas:
+            await cola_resultados.put(filas)
+
+async def _escribir(cola_resultados, tamano_lote, resumen):
+    """Etapa 3: agrupa los resultados y los guarda por lotes"""
+    lote = []
+    while True:
+        filas = await cola_resultados.get()
+        if filas is not _FIN:
+            lote.extend(filas)
+        if lote and (filas is _FIN or len(lote) >= tamano_lote):
+            await neon_db_async.registrar_liquidaciones(lote)
+            resumen['liquidados'] += len(lote)
+            lote = []
+        if filas is _FIN:
+            return
+
+async def _esperar_etapa(tareas, cola_siguiente, consumidores):
+    """Espera a que termine una etapa y avisa el fin a cada consumidor de la siguiente"""
+    await asyncio.gather(*tareas)
+    for _ in range(consumidores):
+        await cola_siguiente.put(_FIN)
+
+async def liquidar_periodo_async(fecha=None, novedades=None, lectores=2, calculadores=2, escritores=2,
+                                 executor=None, tamano_pagina=TAMANO_PAGINA_PIPELINE,
+                                 tamano_lote=TAMANO_LOTE_PIPELINE):
+    """Liquida la nómina de todos los empleados con un pipeline asíncrono de tres etapas.
+
+    Lectura de páginas de empleados, cálculo y escritura de lotes de liquidaciones
+    corren a la vez, unidas por colas acotadas: mientras una página espera a la base
+    de datos otra se calcula y otro lote se guarda. lectores, calculadores y
+    escritores son las tareas de cada etapa. El cálculo usa executor (por defecto
+    el de hilos del ciclo de eventos; un ProcessPoolExecutor reparte entre núcleos).
+    Cada lote se confirma por separado y el avance no queda registrado: si el
+    proceso se interrumpe, volver a ejecutarlo duplica las liquidaciones ya
+    guardadas (para una corrida reanudable use liquidacion_periodo.py --corrida).
+    Devuelve un resumen con liquidados, errores y segundos, como liquidar_periodo.
+    """
+    fecha = fecha or date.today()
+    novedades = novedades or {}
+    inicio = time.perf_counter()
+    resumen = {'liquidados': 0, 'errores': []}
+
+    parametros = ParametrosNomina(**await neon_db_async.obtener_configuraciones())
+    paginas = _paginas_empleados(tamano_pagina)
+    turno = asyncio.Lock()
+    cola_paginas = asyncio.Queue(maxsize=CAPACIDAD_COLAS)
+    cola_resultados = asyncio.Queue(maxsize=CAPACIDAD_COLAS)
+
+    # Los lectores comparten el recorrido de páginas: cada página la toma uno solo
+    etapas = [
+        _esperar_etapa([_leer_paginas(paginas, turno, cola_paginas, novedades) for _ in range(lectores)],
+                       cola_paginas, calculadores),
+        _esperar_etapa([_calcular(cola_paginas, cola_resultados, fecha, parametros, executor, resumen)
+                        for _ in range(calculadores)],
+                       cola_resultados, escritores),
+        *(_escribir(cola_resultados, tamano_lote, resumen) for _ in range(escritores)),
+    ]
+    tareas = [asyncio.ensure_future(etapa) for etapa in etapas]
+    try:
+        await asyncio.gather(*tareas)
+    except BaseException:
+        # Si una etapa falla las demás se detienen en lugar de quedar esperando en las colas
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        raise
+    finally:
+        await paginas.aclose()
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    return resumen
+
+async def _main_async(args):
+    try:
+        return await liquidar_periodo_async(args.fecha, lectores=args.lectores,
+                                            calculadores=args.calculadores, escritores=args.escritores)
+    finally:
+        await neon_db_async.cerrar_pool()
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Liquida la nómina de todos los empleados con un pipeline asíncrono")
+    parser.add_argument('--fecha', type=date.fromisoformat, help="Fecha de la liquidación YYYY-MM-DD (por defecto hoy)")
+    parser.add_argument('--lectores', type=int, default=2, help="Tareas que leen páginas de empleados")
+    parser.add_argument('--calculadores', type=int, default=2, help="Tareas que calculan la nómina")
+    parser.add_argument('--escritores', type=int, default=2, help="Tareas que guardan las liquidaciones")
+    args = parser.parse_args(argumentos)
+
+    # psycopg no funciona con el ciclo de eventos por defecto de Windows
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    resumen = asyncio.run(_main_async(args))
+    print(f"{resumen['liquidados']} liquidaciones registradas en {resumen['segundos']:.2f} s")
+    for empleado_id, mensaje in resumen['errores']:
+        print(f"  Empleado {empleado_id}: {mensaje}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import threading
 
 # os.environ['KIVY_GL_BACKEND'] = 'angle_sdl2'
 os.environ["PATH"] += os.pathsep + r"D:\share\glew\bin"
@@ -36,6 +37,9 @@ class NominaApp(BoxLayout):
         # Inicializa el diseño vertical
         super().__init__(orientation='vertical', padding=20, spacing=15, **kwargs)
 
+        # Campo opcional para tomar el salario de un empleado registrado
+        self.agregar_campo_empleado()
+
         # Agrega los campos necesarios con sus textos guía (hint_text)
         self.agregar_campo("Salario Base", "Ingrese su salario (Ej: 100000)", 'salario_input')
         self.agregar_campo("Horas Extra Diurnas", "Ej: 2", 'horas_diurnas_input')
@@ -59,6 +63,13 @@ class NominaApp(BoxLayout):
         )
         self.add_widget(self.result_label)
 
+        # Etiqueta para mostrar el desglose del cálculo
+        self.detalle_label = Label(
+            text='', color=(0.3, 0.3, 0.3, 1),
+            font_size='14sp', size_hint_y=None, height=30
+        )
+        self.add_widget(self.detalle_label)
+
         # Muestra mensaje de bienvenida al iniciar
         Clock.schedule_once(lambda dt: self.mostrar_bienvenida(), 0.1)
 
@@ -81,6 +92,63 @@ class NominaApp(BoxLayout):
         self.add_widget(campo)
         self.add_widget(error_label)
 
+    def agregar_campo_empleado(self):
+        # Crea el campo con autocompletado y la fila donde se muestran las sugerencias
+        self.add_widget(Label(text="Empleado (opcional)", size_hint_y=None, height=30, color=(0, 0, 0, 1)))
+        self.empleado_input = TextInput(hint_text="Nombre, apellido o documento", multiline=False, size_hint_y=None, height=40)
+        self.empleado_input.bind(text=self.on_texto_empleado, focus=self.on_focus_empleado)
+        self.add_widget(self.empleado_input)
+
+        self.sugerencias_layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=None, height=0)
+        self.add_widget(self.sugerencias_layout)
+
+        # El índice de empleados se carga de la base de datos solo si se usa el campo
+        self.indice_empleados = None
+        self.cargando_indice = False
+
+    def on_focus_empleado(self, instance, value):
+        # Al entrar al campo por primera vez se carga el índice sin bloquear la interfaz
+        if value and self.indice_empleados is None and not self.cargando_indice:
+            self.cargando_indice = True
+            self.empleado_input.hint_text = "Cargando empleados..."
+            threading.Thread(target=self.cargar_indice_empleados, daemon=True).start()
+
+    def cargar_indice_empleados(self):
+        # Se ejecuta en un hilo aparte; la calculadora sigue funcionando sin base de datos
+        try:
+            from model.models import Empleado
+            indice = Empleado.indice()
+        except Exception:
+            indice = None
+        Clock.schedule_once(lambda dt: self.indice_cargado(indice))
+
+    def indice_cargado(self, indice):
+        self.cargando_indice = False
+        self.indice_empleados = indice
+        if indice is None:
+            self.empleado_input.hint_text = "Sin conexión a la base de datos"
+        else:
+            self.empleado_input.hint_text = "Nombre, apellido o documento"
+            self.on_texto_empleado(self.empleado_input, self.empleado_input.text)
+
+    def on_texto_empleado(self, instance, value):
+        # Muestra hasta 5 empleados cuyo nombre, apellido o documento empieza por el texto
+        self.sugerencias_layout.clear_widgets()
+        empleados = self.indice_empleados.buscar(value, 5) if self.indice_empleados and value.strip() else []
+        for empleado in empleados:
+            boton = Button(text=empleado.nombre, background_color=(0.8, 0.8, 0.8, 1))
+            boton.bind(on_press=lambda _, e=empleado: self.seleccionar_empleado(e))
+            self.sugerencias_layout.add_widget(boton)
+        self.sugerencias_layout.height = 40 if empleados else 0
+
+    def seleccionar_empleado(self, empleado):
+        # Llena el salario base con el del empleado elegido
+        self.empleado_input.text = empleado.nombre
+        self.salario_input.text = f"{empleado.salario_base:.0f}"
+        self.salario_input_error.text = ""
+        self.sugerencias_layout.clear_widgets()
+        self.sugerencias_layout.height = 0
+
     def on_focus(self, instance, value):
         # Valida el campo al perder el foco (cuando value es False)
         if not value:
@@ -140,6 +208,9 @@ class NominaApp(BoxLayout):
         if error_found:
             return
 
+        # Limpia el desglose anterior por si el nuevo cálculo falla
+        self.detalle_label.text = ''
+
         try:
             # Se convierten los valores ingresados
             salario_base = float(self.salario_input.text)
@@ -148,9 +219,13 @@ class NominaApp(BoxLayout):
             bonos_extra = float(self.bonos_input.text)
             deduccion_adicional = float(self.deduccion_input.text)
 
-            # Se llama a la función de cálculo
-            resultado = calculo_total(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
-            self.result_label.text = f'El valor total de su nómina es {resultado:.2f}'
+            # Se llama a la función de cálculo, que devuelve todos los componentes
+            desglose = calculo_desglose(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
+            self.result_label.text = f'El valor total de su nómina es {desglose.total_nomina:.2f}'
+            self.detalle_label.text = (
+                f'Horas extra: {desglose.horas_extra:.2f}  |  Auxilio de transporte: {desglose.auxilio_transporte:.2f}  |  '
+                f'Bonos: {desglose.bonos:.2f}  |  Deducciones: {desglose.deducciones:.2f}'
+            )
 
         # Captura de errores personalizados definidos en model.Calculo_Total
         except ErrorSalarioN as ex:
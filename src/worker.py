@@ -0,0 +1,100 @@
+import sys
+import os
+import argparse
+import socket
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model.calculo_total import ParametrosNomina
+from model.liquidacion_periodo import liquidar_bloque
+from model.neon_db import (transaccion, tomar_tarea, empleados_en_rango, registrar_bloque_corrida,
+                           completar_tarea, fallar_tarea, cerrar_pool)
+
+# Intentos de una tarea antes de darla por fallida
+MAX_INTENTOS = 3
+
+# Segundos de espera tras un error antes de volver a tomar tareas
+ESPERA_ERROR = 5
+
+def nombre_worker():
+    """Identifica al worker en las tareas que procesa"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def procesar_tarea(worker, corrida_id=None):
+    """Toma una tarea de la cola, la calcula y guarda sus liquidaciones.
+
+    Todo ocurre en la transacción que bloquea la tarea: si el worker se cae a mitad
+    de camino no queda nada guardado y otro worker toma la tarea de nuevo. Si la
+    tarea falla se registra el intento y la excepción se propaga. Devuelve
+    (tarea_id, liquidados, errores) o None si no hay tareas libres.
+    """
+    tarea_id = None
+    try:
+        with transaccion():
+            tarea = tomar_tarea(corrida_id)
+            if tarea is None:
+                return None
+            tarea_id, corrida_tarea, desde_id, hasta_id, fecha, parametros = tarea
+            empleados = [(empleado_id, salario_base, 0, 0, 0, 0)
+                         for empleado_id, salario_base in empleados_en_rango(desde_id, hasta_id)]
+            filas, errores = liquidar_bloque(empleados, fecha, ParametrosNomina(**parametros))
+            liquidados = registrar_bloque_corrida(corrida_tarea, filas, len(errores), hasta_id - 1)
+            completar_tarea(tarea_id, corrida_tarea, worker)
+    except Exception as e:
+        if tarea_id is not None:
+            fallar_tarea(tarea_id, worker, str(e) or type(e).__name__, MAX_INTENTOS)
+        raise
+    return tarea_id, liquidados, errores
+
+def ejecutar(corrida_id=None, espera=0):
+    """Procesa tareas hasta vaciar la cola.
+
+    Con espera > 0 el worker no termina: revisa la cola cada espera segundos.
+    Se detiene si fallan MAX_INTENTOS tareas seguidas. Devuelve un resumen con
+    tareas, liquidados, errores y segundos.
+    """
+    worker = nombre_worker()
+    inicio = time.perf_counter()
+    resumen = {'tareas': 0, 'liquidados': 0, 'errores': []}
+    fallos_seguidos = 0
+
+    while fallos_seguidos < MAX_INTENTOS:
+        try:
+            resultado = procesar_tarea(worker, corrida_id)
+        except Exception as e:
+            fallos_seguidos += 1
+            print(f"Error procesando tarea: {e}")
+            time.sleep(ESPERA_ERROR)
+            continue
+        fallos_seguidos = 0
+        if resultado is None:
+            if not espera:
+                break
+            time.sleep(espera)
+            continue
+        tarea_id, liquidados, errores = resultado
+        resumen['tareas'] += 1
+        resumen['liquidados'] += liquidados
+        resumen['errores'].extend(errores)
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    return resumen
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Worker de nómina: calcula tareas de la cola de corridas")
+    parser.add_argument('--corrida', type=int, help="Procesar solo las tareas de esta corrida")
+    parser.add_argument('--espera', type=float, default=0,
+                        help="Segundos entre revisiones de la cola vacía; con 0 termina al vaciarla")
+    args = parser.parse_args(argumentos)
+
+    try:
+        resumen = ejecutar(args.corrida, args.espera)
+    finally:
+        cerrar_pool()
+    print(f"{resumen['tareas']} tareas, {resumen['liquidados']} liquidaciones registradas "
+          f"en {resumen['segundos']:.2f} s")
+    for empleado_id, mensaje in resumen['errores']:
+        print(f"  Empleado {empleado_id}: {mensaje}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,16 @@
 import unittest
 import sys
+import os
+import signal
+import threading
 sys.path.append("src")
 from src.model.calculo_total import *
+from src.model import calculo_total as modulo_calculo
+from src.model.liquidacion_periodo import liquidar_bloque
+from model.neon_db import invalidar_cache_configuracion
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 
 class TestLiquidadorNomina(unittest.TestCase):
 
@@ -133,8 +142,150 @@ class TestLiquidadorNomina(unittest.TestCase):
         with self.assertRaises (Exception):
             
             result = calculo_total(salario_base, horas_diurnas, horas_nocturnas, bonos_extra, deduccion_adicional)
-        
-        
+
+    def test_parametros_explicitos(self):
+        parametros = ParametrosNomina()
+
+        result = calculo_total(1500000, 2, 1, 0, 0, parametros=parametros)
+
+        self.assertAlmostEqual(1536157.35, result, 2)
+
+    def test_parametros_personalizados(self):
+        parametros = ParametrosNomina(auxilio_transporte=200000)
+
+        result = calculo_total(2000000, 0, 0, 0, 0, parametros=parametros)
+
+        self.assertAlmostEqual(2000000 + 200000 - (2200000 * 0.08), result, 2)
+
+    def test_parametros_inmutables(self):
+        parametros = ParametrosNomina()
+
+        with self.assertRaises(AttributeError):
+            parametros.salario_minimo = 0
+
+    def test_desglose(self):
+        desglose = calculo_desglose(1500000, 2, 1, 100000, 20000, parametros=ParametrosNomina())
+
+        self.assertAlmostEqual(7736.25, desglose.horas_extra, 2)
+        self.assertEqual(162000, desglose.auxilio_transporte)
+        self.assertEqual(262000, desglose.bonos)
+        self.assertAlmostEqual((1500000 + 7736.25 + 262000) * 0.08 + 20000, desglose.deducciones, 2)
+        self.assertEqual(calculo_total(1500000, 2, 1, 100000, 20000, parametros=ParametrosNomina()), desglose.total_nomina)
+        with self.assertRaises(AttributeError):
+            desglose.total_nomina = 0
+
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_lote_igual_a_calculo_individual(self):
+        parametros = ParametrosNomina()
+        casos = [
+            (2000000, 0, 0, 0, 0),
+            (1500000, 2, 1, 0, 0),
+            (1300000, 36, 15, 100000, 0),
+            (1700000, 14, 19, 200000, 0),
+            (-1500000, 0, 0, 0, 0),
+            (3500000, 12, 12, 300000, 1400000),
+            (5000000, 43, 47, 0, 0),
+        ]
+        columnas = list(zip(*casos))
+
+        resultados, errores = calculo_total_lote(*columnas, parametros=parametros)
+
+        self.assertEqual([False, False, False, False, True, True, True], errores.tolist())
+        for i, caso in enumerate(casos[:4]):
+            self.assertEqual(calculo_total(*caso, parametros=parametros), resultados['total_nomina'][i])
+
+    @unittest.skipIf(np is None, "NumPy no está instalado")
+    def test_validar_lote_codigos(self):
+        casos = [
+            (2000000, 0, 0, 0, 0),
+            (1500000, 0, 0, -1, 0),
+            (1500000, -2, 0, 0, 0),
+            (5000000, 43, 47, 0, 0),
+            (-1500000, 0, 0, 0, 0),
+            (1500000, 0, 0, 0, -1),
+            (3500000, 12, 12, 300000, 1400000),
+        ]
+
+        codigos = validar_lote(*zip(*casos), parametros=ParametrosNomina())
+
+        self.assertEqual([ERROR_NINGUNO, ERROR_BONOS_NEGATIVOS, ERROR_HORAS_NEGATIVAS, ERROR_HORAS_EXTRA,
+                          ERROR_SALARIO_NEGATIVO, ERROR_DEDUCCION_NEGATIVA, ERROR_DEDUCCIONES_MAXIMAS],
+                         codigos.tolist())
+        for caso, codigo in zip(casos[1:], codigos[1:]):
+            with self.assertRaises(EXCEPCIONES_POR_CODIGO[codigo]):
+                calculo_total(*caso, parametros=ParametrosNomina())
+
+
+    def test_parametros_pickle(self):
+        parametros = ParametrosNomina(auxilio_transporte=200000)
+
+        copia = pickle.loads(pickle.dumps(parametros))
+
+        self.assertEqual(parametros.como_dict(), copia.como_dict())
+        with self.assertRaises(AttributeError):
+            copia.auxilio_transporte = 0
+
+    def test_liquidar_bloque_en_otro_proceso(self):
+        empleados = [(1, 2000000, 0, 0, 0, 0), (2, 1500000, 2, 1, 0, 0), (3, -1500000, 0, 0, 0, 0)]
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            filas, errores = pool.submit(liquidar_bloque, empleados, date(2025, 1, 31), ParametrosNomina()).result()
+
+        self.assertEqual([fila[0] for fila in filas], [1, 2])
+        self.assertEqual(filas[0][1], date(2025, 1, 31))
+        self.assertAlmostEqual(filas[1][-1], 1536157.35, 2)
+        self.assertEqual([empleado_id for empleado_id, _ in errores], [3])
+
+    def test_memo_calculo(self):
+        limpiar_memo_calculo()
+        parametros = ParametrosNomina()
+
+        primero = calculo_desglose(1500000, 2, 1, 0, 0, parametros=parametros)
+        segundo = calculo_desglose(1500000, 2, 1, 0, 0, parametros=ParametrosNomina())
+        otro = calculo_desglose(1500000, 2, 1, 0, 0, parametros=ParametrosNomina(auxilio_transporte=200000))
+
+        self.assertIs(primero, segundo)
+        self.assertEqual(200000, otro.auxilio_transporte)
+        estadisticas = estadisticas_memo_calculo()
+        self.assertEqual((1, 2), (estadisticas['aciertos'], estadisticas['fallos']))
+        self.assertAlmostEqual(1 / 3, estadisticas['tasa_aciertos'])
+
+        # Un cambio en la configuración vacía la memoria
+        invalidar_cache_configuracion()
+        self.assertIsNot(primero, calculo_desglose(1500000, 2, 1, 0, 0, parametros=parametros))
+        self.assertEqual(1, estadisticas_memo_calculo()['entradas'])
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requiere os.fork")
+    def test_memo_calculo_tras_fork(self):
+        tomado = threading.Event()
+        soltar = threading.Event()
+
+        def ocupar_memo():
+            with modulo_calculo._memo_calculo._lock:
+                tomado.set()
+                soltar.wait()
+
+        hilo = threading.Thread(target=ocupar_memo)
+        hilo.start()
+        tomado.wait()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                # El hilo que tiene el lock no existe en el hijo: sin reiniciar la memoria se bloquearía
+                codigo = 1
+                try:
+                    signal.alarm(5)
+                    calculo_desglose(1500000, 2, 1, 0, 0, parametros=ParametrosNomina())
+                    codigo = 0
+                finally:
+                    os._exit(codigo)
+        finally:
+            soltar.set()
+            hilo.join()
+
+        _, estado = os.waitpid(pid, 0)
+        self.assertEqual(0, estado)
+
 if __name__ == '__main__':
     # print( Payment.calcularCuota.__doc__)
     unittest.main()
\ No newline at end of file
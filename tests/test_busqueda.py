@@ -0,0 +1,97 @@
+import unittest
+import sys
+from types import SimpleNamespace
+sys.path.append("src")
+from src.model.busqueda import normalizar_texto, IndiceTrigramas, IndiceEmpleados
+
+class TestBusqueda(unittest.TestCase):
+
+    def setUp(self):
+        self.indice = IndiceTrigramas([
+            (1, "Juan Pérez"),
+            (2, "María López García"),
+            (3, "Carlos Ramírez"),
+            (4, "Laura Gómez"),
+        ])
+
+    def test_normalizar_texto(self):
+        self.assertEqual("maria lopez", normalizar_texto("  MARÍA   López "))
+
+    def test_busqueda_sin_tildes(self):
+        self.assertEqual([1], self.indice.buscar("perez"))
+        self.assertEqual([1], self.indice.buscar("PÉREZ"))
+
+    def test_busqueda_parcial(self):
+        self.assertEqual([2], self.indice.buscar("lop"))
+        self.assertEqual([4], self.indice.buscar("go"))
+
+    def test_busqueda_aproximada(self):
+        # Un error de digitación sigue encontrando el nombre
+        self.assertEqual(3, self.indice.buscar("Carlos Ramires")[0])
+
+    def test_quitar_y_reemplazar(self):
+        self.indice.quitar(1)
+        self.assertEqual([], self.indice.buscar("perez"))
+
+        self.indice.agregar(4, "Laura Pérez")
+        self.assertEqual([4], self.indice.buscar("perez"))
+        self.assertEqual([], self.indice.buscar("gomez"))
+
+
+class TestIndiceEmpleados(unittest.TestCase):
+
+    def setUp(self):
+        self.juan = SimpleNamespace(id=1, nombre="Juan Pérez", documento="1234567890", salario_base=1500000)
+        self.maria = SimpleNamespace(id=2, nombre="María Pérez López", documento="1299999999", salario_base=1800000)
+        self.indice = IndiceEmpleados([self.juan, self.maria])
+
+    def test_buscar_por_prefijo(self):
+        self.assertEqual([2], [e.id for e in self.indice.buscar("mar")])
+        self.assertEqual([1, 2], sorted(e.id for e in self.indice.buscar("PER")))
+        self.assertEqual([2], [e.id for e in self.indice.buscar("lopez")])
+        self.assertEqual([1], [e.id for e in self.indice.buscar("1234")])
+        self.assertEqual([], self.indice.buscar("ez"))
+
+    def test_por_id_y_documento(self):
+        self.assertEqual("Juan Pérez", self.indice.por_id(1).nombre)
+        self.assertEqual(2, self.indice.por_documento("1299999999").id)
+        self.assertIsNone(self.indice.por_id(3))
+
+    def test_actualizacion_incremental(self):
+        self.juan.nombre = "Juan Gómez"
+        self.indice.agregar(self.juan)
+        self.indice.quitar(2)
+
+        self.assertEqual([], self.indice.buscar("perez"))
+        self.assertEqual([1], [e.id for e in self.indice.buscar("gomez")])
+        self.assertIsNone(self.indice.por_documento("1299999999"))
+        self.assertEqual(1, len(self.indice))
+
+    def test_modificar_resultado_no_desordena_indice(self):
+        # La consola modifica en el lugar el empleado que devuelve la búsqueda y luego lo guarda
+        empleado = self.indice.buscar("juan")[0]
+        empleado.nombre = "Juan Gómez"
+        empleado.documento = "5555555555"
+        self.indice.agregar(empleado)
+
+        self.assertEqual([2], [e.id for e in self.indice.buscar("perez")])
+        self.assertEqual([], self.indice.buscar("1234"))
+        self.assertEqual([1], [e.id for e in self.indice.buscar("gomez")])
+
+        self.indice.por_id(1).nombre = "Otro"
+        self.indice.quitar(1)
+        self.assertEqual([], self.indice.buscar("juan") + self.indice.buscar("5555"))
+
+    def test_buscar_similares(self):
+        self.assertEqual([1, 2], sorted(e.id for e in self.indice.buscar_similares("perez")))
+        self.assertEqual([2], [e.id for e in self.indice.buscar_similares("maria lopes")])
+
+        self.juan.nombre = "Juan Gómez"
+        self.indice.agregar(self.juan)
+        self.indice.quitar(2)
+        self.assertEqual([], self.indice.buscar_similares("perez"))
+        self.assertEqual([1], [e.id for e in self.indice.buscar_similares("gomez")])
+
+
+if __name__ == '__main__':
+    unittest.main()
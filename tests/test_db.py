@@ -1,12 +1,28 @@
 import unittest
 import sys
 import os
+import io
+import asyncio
+import signal
+import threading
+import tempfile
 from datetime import date, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Importar las clases de modelo
-from src.model.models import Empleado, Liquidacion, Configuracion, inicializar_tablas
-from src.model.neon_db import obtener_conexion, liberar_conexion, cerrar_pool
+from src.model.models import (Empleado, Liquidacion, Configuracion, CorridaNomina, inicializar_tablas, sesion,
+                              ErrorDuplicado, unidad_de_trabajo)
+from src.model.neon_db import obtener_conexion, liberar_conexion, cerrar_pool, registrar_bloque_corrida
+from src.model.liquidacion_periodo import (nueva_corrida, ejecutar_corrida, liquidar_bloque, encolar_corrida,
+                                          reintentar_corrida)
+from src.worker import procesar_tarea, MAX_INTENTOS
+from unittest import mock
+from src.model.migraciones import aplicar_migraciones, version_esquema, VERSION_ACTUAL
+from src.model.exportacion import exportar_csv
+from src.model import pipeline_nomina
+# La caché de configuración que usan los modelos es la del módulo model.neon_db
+from model import neon_db
+from src.controller.importacion_controller import ImportacionController
 
 class TestFixtures(unittest.TestCase):
     """Test fixtures para crear tablas y datos básicos para pruebas"""
@@ -27,6 +43,68 @@ class TestFixtures(unittest.TestCase):
         cerrar_pool()
         print("Entorno de pruebas limpiado correctamente")
 
+class TestMigraciones(unittest.TestCase):
+    """Pruebas para las migraciones del esquema"""
+    
+    def test_esquema_al_dia(self):
+        """Test para verificar que una segunda inicialización no vuelve a migrar"""
+        inicializar_tablas()
+        self.assertEqual(version_esquema(), VERSION_ACTUAL)
+        self.assertEqual(aplicar_migraciones(), 0)
+
+class TestPoolConexiones(unittest.TestCase):
+    """Pruebas para el pool de conexiones entre procesos"""
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requiere os.fork")
+    def test_hijo_crea_su_propio_pool(self):
+        """Test para que un proceso hijo no reutilice las conexiones ni los locks del padre"""
+        with neon_db.conexion() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            sesion_padre = cursor.fetchone()[0]
+
+        # Otro hilo tiene tomado el lock de la caché al momento del fork
+        tomado = threading.Event()
+        soltar = threading.Event()
+
+        def ocupar_cache():
+            with neon_db._cache_lock:
+                tomado.set()
+                soltar.wait()
+
+        hilo = threading.Thread(target=ocupar_cache)
+        hilo.start()
+        tomado.wait()
+        lectura, escritura = os.pipe()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                os.close(lectura)
+                codigo = 1
+                try:
+                    signal.alarm(10)
+                    neon_db.obtener_configuraciones()
+                    with neon_db.conexion() as conn, conn.cursor() as cursor:
+                        cursor.execute("SELECT pg_backend_pid()")
+                        os.write(escritura, str(cursor.fetchone()[0]).encode())
+                    codigo = 0
+                finally:
+                    os._exit(codigo)
+        finally:
+            soltar.set()
+            hilo.join()
+
+        os.close(escritura)
+        with os.fdopen(lectura) as salida:
+            sesion_hijo = salida.read()
+        _, estado = os.waitpid(pid, 0)
+
+        self.assertEqual(estado, 0)
+        self.assertNotEqual(int(sesion_hijo), sesion_padre)
+        # Las conexiones del padre siguen sirviendo después de que el hijo termina
+        with neon_db.conexion() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            self.assertEqual(cursor.fetchone()[0], sesion_padre)
+
 class TestEmpleado(unittest.TestCase):
     """Pruebas para operaciones CRUD de Empleado"""
     
@@ -65,6 +143,58 @@ class TestEmpleado(unittest.TestCase):
         self.assertEqual(empleado_db.documento, "1234567890")
         self.assertEqual(empleado_db.salario_base, 1500000)
     
+    def test_documento_duplicado(self):
+        """Test para detectar un documento repetido sin consultarlo antes"""
+        Empleado("Juan Pérez", "1234567890", 1500000, date.today()).insertar()
+
+        with self.assertRaises(ErrorDuplicado):
+            Empleado("Otro Juan", "1234567890", 1600000, date.today()).insertar()
+
+        otro = Empleado("Pedro Gómez", "999", 1600000, date.today())
+        otro.insertar()
+        otro.documento = "1234567890"
+        with self.assertRaises(ErrorDuplicado):
+            otro.actualizar()
+
+        # Actualizar un ID inexistente no es un error de base de datos
+        self.assertIsNone(Empleado("Nadie", "000", 1, date.today(), id=-1).actualizar())
+    
+    def test_unidad_de_trabajo(self):
+        """Test para guardar un empleado y su liquidación con un solo commit, o ninguno"""
+        empleado = Empleado("Luis Díaz", "55555", 1500000, date.today())
+        with unidad_de_trabajo() as unidad:
+            unidad.guardar(empleado)
+            unidad.guardar(Liquidacion(empleado.id, 1500000, 0, 0, 0, 0, 0, 1500000))
+        self.assertEqual(len(Liquidacion.get_by_empleado(empleado.id)), 1)
+
+        # Un error en el bloque revierte también lo que ya se había guardado
+        with self.assertRaises(ZeroDivisionError):
+            with unidad_de_trabajo() as unidad:
+                unidad.guardar(Empleado("Sin Guardar", "66666", 1500000, date.today()))
+                1 / 0
+        self.assertIsNone(Empleado.get_by_documento("66666"))
+    
+    def test_importar_nomina(self):
+        """Test para sincronizar los empleados con un archivo de nómina"""
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ruta = os.path.join(directorio.name, "nomina_prueba.csv")
+        def escribir(filas):
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write("nombre,documento,salario_base,fecha_ingreso\n")
+                archivo.writelines(f"{fila}\n" for fila in filas)
+
+        escribir(["Ana Gómez,111,1500000,2024-01-15", "Luis Ruiz,222,1800000,2023-06-01", "Sin Salario,333,,2024-01-01"])
+        resumen, errores = ImportacionController.importar(ruta)
+        self.assertEqual((resumen['insertados'], resumen['actualizados'], resumen['invalidos']), (2, 0, 1))
+        self.assertIn(4, errores)
+
+        # Solo se escribe el empleado que cambió
+        escribir(["Ana Gómez,111,1600000,2024-01-15", "Luis Ruiz,222,1800000,2023-06-01"])
+        resumen, errores = ImportacionController.importar(ruta)
+        self.assertEqual((resumen['insertados'], resumen['actualizados'], resumen['sin_cambios']), (0, 1, 1))
+        self.assertEqual(Empleado.get_by_documento("111").salario_base, 1600000)
+    
     def test_modificar_empleado(self):
         """Test para modificar un empleado en la base de datos"""
         # Crear un empleado de prueba
@@ -121,6 +251,80 @@ class TestEmpleado(unittest.TestCase):
         empleados = Empleado.get_all()
         self.assertEqual(len(empleados), 2)
 
+    def test_recorrer_empleados(self):
+        """Test para recorrer los empleados con un cursor del lado del servidor"""
+        for i in range(5):
+            Empleado(
+                nombre=f"Empleado {i}",
+                documento=f"900000000{i}",
+                salario_base=1500000,
+                fecha_ingreso=date.today()
+            ).save()
+
+        # Un itersize pequeño obliga a traer las filas en varios bloques
+        nombres = [empleado.nombre for empleado in Empleado.iter_all(itersize=2)]
+        self.assertEqual(nombres, [empleado.nombre for empleado in Empleado.get_all()])
+
+    def test_recorrido_cortado_lanza_error(self):
+        """Test para verificar que un error a mitad del recorrido no se confunde con el final"""
+        def consulta_cortada(*args, filas=(), **kwargs):
+            yield from filas
+            raise RuntimeError("se perdió la conexión")
+
+        fila = (1, "Ana", "1", 1500000, date(2024, 1, 1))
+        with mock.patch("src.model.models.iterar_consulta", lambda *a, **k: consulta_cortada(filas=[fila])):
+            recorrido = Empleado.iter_all()
+            self.assertEqual(next(recorrido).nombre, "Ana")
+            with self.assertRaises(RuntimeError):
+                next(recorrido)
+        with mock.patch("src.model.models.iterar_consulta", consulta_cortada):
+            with self.assertRaises(RuntimeError):
+                list(Liquidacion.iter_by_empleado(1))
+    
+    def test_paginar_empleados(self):
+        """Test para recorrer los empleados por páginas sin repetir ni omitir registros"""
+        for i in range(5):
+            Empleado(
+                nombre="Pedro Gómez" if i < 3 else f"Empleado {i}",
+                documento=f"800000000{i}",
+                salario_base=1500000,
+                fecha_ingreso=date.today()
+            ).save()
+
+        # Nombres repetidos en el borde de página se desempatan por ID
+        vistos = []
+        empleados, siguiente = Empleado.get_pagina(limite=2)
+        vistos.extend(empleados)
+        while siguiente is not None:
+            empleados, siguiente = Empleado.get_pagina(siguiente, limite=2)
+            vistos.extend(empleados)
+
+        self.assertEqual([e.id for e in vistos], [e.id for e in Empleado.iter_all()])
+
+    def test_sesion_mapa_identidad(self):
+        """Test para verificar que una sesión devuelve la misma instancia por ID y por documento"""
+        empleado = Empleado(
+            nombre="Sofía Rojas",
+            documento="4444444444",
+            salario_base=1600000,
+            fecha_ingreso=date.today()
+        )
+        empleado.save()
+
+        with sesion():
+            por_id = Empleado.get_by_id(empleado.id)
+            self.assertIs(por_id, Empleado.get_by_id(empleado.id))
+            self.assertIs(por_id, Empleado.get_by_documento("4444444444"))
+
+            # Al guardar se invalidan las claves anteriores
+            por_id.documento = "5555555555"
+            por_id.save()
+            self.assertIs(por_id, Empleado.get_by_documento("5555555555"))
+            self.assertIsNone(Empleado.get_by_documento("4444444444"))
+
+        # Fuera de la sesión cada consulta crea una instancia nueva
+        self.assertIsNot(Empleado.get_by_id(empleado.id), Empleado.get_by_id(empleado.id))
+
 class TestLiquidacion(unittest.TestCase):
     """Pruebas para operaciones CRUD de Liquidacion"""
     
@@ -237,6 +441,241 @@ class TestLiquidacion(unittest.TestCase):
         liquidaciones = Liquidacion.get_by_empleado(self.empleado.id)
         self.assertEqual(len(liquidaciones), 2)
 
+    def test_guardar_varias_liquidaciones(self):
+        """Test para insertar muchas liquidaciones en una sola transacción"""
+        liquidaciones = [
+            Liquidacion(
+                empleado_id=self.empleado.id,
+                salario_base=1900000,
+                horas_diurnas=i,
+                horas_nocturnas=0,
+                bonos_extra=0,
+                deduccion_adicional=0,
+                auxilio_transporte=0,
+                total_nomina=1900000 + i
+            )
+            for i in range(50)
+        ]
+
+        # Guardar todas las liquidaciones de una vez
+        resultado = Liquidacion.save_many(liquidaciones)
+
+        # Verificar que todas recibieron su ID en el orden de entrada
+        self.assertTrue(resultado)
+        self.assertTrue(all(l.id is not None for l in liquidaciones))
+        self.assertEqual(len(Liquidacion.get_by_empleado(self.empleado.id)), 50)
+        self.assertEqual(Liquidacion.get_by_id(liquidaciones[7].id).horas_diurnas, 7)
+
+    def test_recorrer_liquidaciones_empleado(self):
+        """Test para recorrer las liquidaciones de un empleado sin cargarlas todas"""
+        liquidaciones = [
+            Liquidacion(
+                empleado_id=self.empleado.id,
+                salario_base=1900000,
+                horas_diurnas=i,
+                horas_nocturnas=0,
+                bonos_extra=0,
+                deduccion_adicional=0,
+                auxilio_transporte=0,
+                total_nomina=1900000
+            )
+            for i in range(7)
+        ]
+        Liquidacion.save_many(liquidaciones)
+
+        recorridas = list(Liquidacion.iter_by_empleado(self.empleado.id, itersize=3))
+        self.assertEqual(len(recorridas), 7)
+        self.assertEqual({l.id for l in recorridas}, {l.id for l in liquidaciones})
+
+    def test_liquidacion_con_empleado(self):
+        """Test para cargar liquidaciones junto con su empleado en una sola consulta"""
+        liquidaciones = [
+            Liquidacion(
+                empleado_id=self.empleado.id,
+                salario_base=1900000,
+                horas_diurnas=0,
+                horas_nocturnas=0,
+                bonos_extra=0,
+                deduccion_adicional=0,
+                auxilio_transporte=0,
+                total_nomina=1900000
+            )
+            for _ in range(3)
+        ]
+        Liquidacion.save_many(liquidaciones)
+
+        liquidacion = Liquidacion.get_by_id(liquidaciones[0].id, incluir_empleado=True)
+        self.assertEqual(liquidacion.empleado.nombre, "Ana Martínez")
+
+        # Las liquidaciones de un mismo empleado comparten la instancia
+        cargadas = Liquidacion.get_by_empleado(self.empleado.id, incluir_empleado=True)
+        self.assertEqual(len(cargadas), 3)
+        self.assertTrue(all(l.empleado is cargadas[0].empleado for l in cargadas))
+        self.assertIsNone(Liquidacion.get_by_id(liquidaciones[0].id).empleado)
+
+    def test_columnas_liquidaciones(self):
+        """Test para obtener las liquidaciones de un empleado como columnas de NumPy"""
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("NumPy no está instalado")
+        liquidaciones = [
+            Liquidacion(
+                empleado_id=self.empleado.id,
+                salario_base=1900000,
+                horas_diurnas=i,
+                horas_nocturnas=1,
+                bonos_extra=0,
+                deduccion_adicional=0,
+                auxilio_transporte=0,
+                total_nomina=1900000 + i,
+                fecha_liquidacion=date(2025, 1, 1) + timedelta(days=i)
+            )
+            for i in range(5)
+        ]
+        Liquidacion.save_many(liquidaciones)
+
+        columnas = Liquidacion.fetch_columns({'empleado_id': self.empleado.id,
+                                              'fecha_desde': date(2025, 1, 2)})
+
+        self.assertEqual(columnas['id'].dtype, np.int64)
+        self.assertEqual(columnas['id'].tolist(), [l.id for l in liquidaciones[1:]])
+        self.assertEqual(columnas['fecha_liquidacion'][0], np.datetime64('2025-01-02'))
+        self.assertEqual(columnas['horas_diurnas'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(columnas['total_nomina'].sum(), 4 * 1900000 + 10)
+
+    def test_exportar_csv(self):
+        """Test para exportar las liquidaciones de un empleado a CSV con COPY"""
+        Liquidacion.save_many([
+            Liquidacion(self.empleado.id, 1900000, 0, 0, 0, 0, 0, 1900000) for _ in range(3)
+        ])
+        archivo = io.BytesIO()
+
+        resumen = exportar_csv(archivo, empleado_id=self.empleado.id)
+
+        lineas = archivo.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(resumen['filas'], 3)
+        self.assertEqual(len(lineas), 4)
+        self.assertTrue(lineas[0].startswith("id,empleado_id,fecha_liquidacion"))
+        self.assertIn("Ana Martínez", lineas[1])
+
+    @unittest.skipUnless(pipeline_nomina.neon_db_async.psycopg, "requiere psycopg 3")
+    def test_registrar_liquidaciones_asincrono(self):
+        """Test para guardar un lote de liquidaciones con psycopg 3"""
+        filas = [(self.empleado.id, date(2025, 1, 1) + timedelta(days=i), 1900000, i, 0, 0, 0, 0, 1900000 + i)
+                 for i in range(3)]
+
+        async def probar():
+            try:
+                return (await pipeline_nomina.neon_db_async.registrar_liquidaciones(filas),
+                        await pipeline_nomina.neon_db_async.registrar_liquidaciones([]))
+            finally:
+                await pipeline_nomina.neon_db_async.cerrar_pool()
+
+        ids, vacio = asyncio.run(probar())
+
+        self.assertEqual(vacio, [])
+        self.assertEqual([Liquidacion.get_by_id(id).horas_diurnas for id in ids], [0, 1, 2])
+        self.assertEqual(Liquidacion.get_by_id(ids[2]).fecha_liquidacion, date(2025, 1, 3))
+
+    @unittest.skipUnless(pipeline_nomina.neon_db_async.psycopg, "requiere psycopg 3")
+    def test_pipeline_asincrono(self):
+        """Test para liquidar todos los empleados con el pipeline asíncrono"""
+        otros = [Empleado(f"Empleado {i}", f"66666666{i}", 1500000, date(2024, 1, 1)) for i in range(4)]
+        for empleado in otros:
+            empleado.save()
+
+        async def probar():
+            try:
+                pagina = await pipeline_nomina.neon_db_async.empleados_desde(self.empleado.id, 2)
+                resumen = await pipeline_nomina.liquidar_periodo_async(date(2025, 6, 30), tamano_pagina=2,
+                                                                       tamano_lote=3)
+                return pagina, resumen
+            finally:
+                await pipeline_nomina.neon_db_async.cerrar_pool()
+
+        pagina, resumen = asyncio.run(probar())
+
+        self.assertEqual([empleado_id for empleado_id, _ in pagina], [e.id for e in otros[:2]])
+        self.assertEqual(resumen['liquidados'], 5)
+        for empleado in [self.empleado] + otros:
+            liquidaciones = Liquidacion.get_by_empleado(empleado.id)
+            self.assertEqual([l.fecha_liquidacion for l in liquidaciones], [date(2025, 6, 30)])
+
+    def test_reanudar_corrida(self):
+        """Test para reanudar una corrida interrumpida sin duplicar liquidaciones"""
+        otros = [Empleado(f"Empleado {i}", f"44444444{i}", 1500000, date(2024, 1, 1)) for i in range(2)]
+        for empleado in otros:
+            empleado.save()
+        corrida_id = nueva_corrida(date(2025, 3, 31))
+
+        # Simular que la corrida se cayó después de guardar el primer bloque
+        filas, errores = liquidar_bloque([(self.empleado.id, 1900000, 0, 0, 0, 0)], date(2025, 3, 31))
+        registrar_bloque_corrida(corrida_id, filas, len(errores), self.empleado.id)
+
+        resumen = ejecutar_corrida(corrida_id, workers=1, tamano_bloque=1)
+
+        corrida = CorridaNomina.get_by_id(corrida_id)
+        self.assertEqual(resumen['liquidados'], 2)
+        self.assertEqual(corrida.estado, 'completada')
+        self.assertEqual(corrida.liquidados, 3)
+        self.assertEqual(corrida.progreso, 100.0)
+        self.assertEqual(len(Liquidacion.get_by_empleado(self.empleado.id)), 1)
+        with self.assertRaises(ValueError):
+            ejecutar_corrida(corrida_id, workers=1)
+
+    def test_worker_cola_tareas(self):
+        """Test para repartir una corrida en tareas que los workers toman con SKIP LOCKED"""
+        for i in range(3):
+            Empleado(f"Empleado {i}", f"55555555{i}", 1500000, date(2024, 1, 1)).save()
+        corrida_id, tareas = encolar_corrida(date(2025, 4, 30), tamano_bloque=2)
+        self.assertEqual(tareas, 2)
+
+        # Otro worker tiene tomada la primera tarea: este debe saltarla
+        conn = obtener_conexion()
+        cursor = conn.cursor()
+        cursor.execute("""SELECT id FROM tareas_nomina WHERE corrida_id = %s
+                          ORDER BY id LIMIT 1 FOR UPDATE""", (corrida_id,))
+        tomada = cursor.fetchone()[0]
+        try:
+            tarea_id, liquidados, errores = procesar_tarea("prueba", corrida_id)
+            self.assertNotEqual(tarea_id, tomada)
+            self.assertEqual(liquidados, 2)
+            self.assertIsNone(procesar_tarea("prueba", corrida_id))
+        finally:
+            conn.rollback()
+            cursor.close()
+            liberar_conexion(conn)
+
+        tarea_id, liquidados, errores = procesar_tarea("prueba", corrida_id)
+        self.assertEqual(tarea_id, tomada)
+        corrida = CorridaNomina.get_by_id(corrida_id)
+        self.assertEqual(corrida.estado, 'completada')
+        self.assertEqual(corrida.liquidados, 4)
+        with self.assertRaises(ValueError):
+            ejecutar_corrida(corrida_id, workers=1)
+
+    def test_reintentar_corrida_fallida(self):
+        """Test para reencolar las tareas de una corrida que falló en los workers"""
+        corrida_id, tareas = encolar_corrida(date(2025, 5, 31))
+        self.assertEqual(tareas, 1)
+
+        # Un error pasajero que se repite hasta agotar los intentos
+        with mock.patch("src.worker.liquidar_bloque", side_effect=RuntimeError("sin conexión")):
+            for _ in range(MAX_INTENTOS):
+                with self.assertRaises(RuntimeError):
+                    procesar_tarea("prueba", corrida_id)
+        self.assertIsNone(procesar_tarea("prueba", corrida_id))
+        self.assertEqual(CorridaNomina.get_by_id(corrida_id).estado, 'fallida')
+
+        self.assertEqual(reintentar_corrida(corrida_id), 1)
+        self.assertEqual(CorridaNomina.get_by_id(corrida_id).estado, 'en_proceso')
+        self.assertIsNotNone(procesar_tarea("prueba", corrida_id))
+        corrida = CorridaNomina.get_by_id(corrida_id)
+        self.assertEqual((corrida.estado, corrida.liquidados), ('completada', 1))
+        with self.assertRaises(ValueError):
+            reintentar_corrida(nueva_corrida(date(2025, 5, 31)))
+
 class TestConfiguracion(unittest.TestCase):
     """Pruebas para operaciones CRUD de Configuracion"""
     
@@ -294,5 +733,75 @@ class TestConfiguracion(unittest.TestCase):
         # Debería haber al menos 9 parámetros de configuración
         self.assertGreaterEqual(len(configs), 9)
 
+    def test_cache_configuracion_aciertos(self):
+        """Test para contar aciertos y fallos de la caché de configuración"""
+        neon_db.invalidar_cache_configuracion()
+        antes = neon_db.estadisticas_cache_configuracion()
+
+        Configuracion.get_by_nombre('salario_minimo')
+        Configuracion.get_all()
+        Configuracion.get_by_nombre('auxilio_transporte')
+
+        despues = neon_db.estadisticas_cache_configuracion()
+        self.assertEqual(despues['fallos'] - antes['fallos'], 1)
+        self.assertEqual(despues['aciertos'] - antes['aciertos'], 2)
+        self.assertGreater(despues['tasa_aciertos'], 0)
+
+    def test_cache_configuracion_vence(self):
+        """Test para volver a consultar la tabla cuando vence el TTL de la caché"""
+        neon_db.invalidar_cache_configuracion()
+        with mock.patch.object(neon_db, 'CONFIG_CACHE_TTL', 0):
+            Configuracion.get_by_nombre('salario_minimo')
+            antes = neon_db.estadisticas_cache_configuracion()
+            Configuracion.get_by_nombre('salario_minimo')
+        self.assertEqual(neon_db.estadisticas_cache_configuracion()['fallos'], antes['fallos'] + 1)
+
+        Configuracion.get_by_nombre('salario_minimo')
+        antes = neon_db.estadisticas_cache_configuracion()
+        Configuracion.get_by_nombre('salario_minimo')
+        self.assertEqual(neon_db.estadisticas_cache_configuracion()['aciertos'], antes['aciertos'] + 1)
+
+    def test_cache_configuracion_se_invalida_al_escribir(self):
+        """Test para que save, actualizar_parcial y delete invaliden la caché"""
+        config = Configuracion('parametro_prueba_cache', 1.0, 'Parámetro temporal de la prueba')
+        self.assertIsNone(Configuracion.get_by_nombre('parametro_prueba_cache'))
+        try:
+            version = neon_db.version_configuracion()
+            self.assertTrue(config.save())
+            self.assertEqual(neon_db.version_configuracion(), version + 1)
+            self.assertEqual(Configuracion.get_by_nombre('parametro_prueba_cache').valor, 1.0)
+
+            Configuracion.actualizar_parcial(nombre_parametro='parametro_prueba_cache', valor=2.0)
+            self.assertEqual(neon_db.version_configuracion(), version + 2)
+            self.assertEqual(Configuracion.get_by_nombre('parametro_prueba_cache').valor, 2.0)
+
+            self.assertTrue(config.delete())
+            self.assertEqual(neon_db.version_configuracion(), version + 3)
+            self.assertIsNone(Configuracion.get_by_nombre('parametro_prueba_cache'))
+        finally:
+            config.delete()
+
+    def test_cache_configuracion_en_transaccion(self):
+        """Test para invalidar la caché solo cuando se confirma la transacción"""
+        valor_original = Configuracion.get_by_nombre('salario_minimo').valor
+        version = neon_db.version_configuracion()
+        try:
+            with self.assertRaises(RuntimeError):
+                with neon_db.transaccion():
+                    Configuracion.actualizar_parcial(nombre_parametro='salario_minimo', valor=1400000)
+                    raise RuntimeError("cancelar")
+            self.assertEqual(neon_db.version_configuracion(), version)
+            self.assertEqual(Configuracion.get_by_nombre('salario_minimo').valor, valor_original)
+
+            with neon_db.transaccion():
+                Configuracion.actualizar_parcial(nombre_parametro='salario_minimo', valor=1400000)
+                # Hasta el commit la versión no cambia, pero la transacción ya lee su propio cambio
+                self.assertEqual(neon_db.version_configuracion(), version)
+                self.assertEqual(Configuracion.get_by_nombre('salario_minimo').valor, 1400000)
+            self.assertEqual(neon_db.version_configuracion(), version + 1)
+            self.assertEqual(Configuracion.get_by_nombre('salario_minimo').valor, 1400000)
+        finally:
+            Configuracion.actualizar_parcial(nombre_parametro='salario_minimo', valor=valor_original)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
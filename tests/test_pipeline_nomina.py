@@ -0,0 +1,101 @@
+import unittest
+import sys
+import asyncio
+from unittest import mock
+from datetime import date
+sys.path.append("src")
+from src.model import pipeline_nomina
+from src.model.pipeline_nomina import liquidar_periodo_async, _esperar_etapa, _FIN
+
+class BaseDatosFalsa:
+    """Reemplaza las funciones de neon_db_async que usa el pipeline, sin psycopg 3"""
+
+    def __init__(self, empleados, falla_al_escribir=False):
+        self.empleados = empleados
+        self.falla_al_escribir = falla_al_escribir
+        self.paginas_leidas = 0
+        self.guardadas = []
+
+    async def obtener_configuraciones(self):
+        return {}
+
+    async def empleados_desde(self, desde_id, limite):
+        self.paginas_leidas += 1
+        await asyncio.sleep(0)
+        return [(id, salario) for id, salario in sorted(self.empleados.items()) if id > desde_id][:limite]
+
+    async def registrar_liquidaciones(self, lote):
+        await asyncio.sleep(0)
+        if self.falla_al_escribir:
+            raise RuntimeError("se perdió la conexión")
+        self.guardadas.extend(lote)
+        return list(range(len(lote)))
+
+    def parchear(self):
+        return mock.patch.multiple(pipeline_nomina.neon_db_async,
+                                   obtener_configuraciones=self.obtener_configuraciones,
+                                   empleados_desde=self.empleados_desde,
+                                   registrar_liquidaciones=self.registrar_liquidaciones)
+
+class TestPipelineNomina(unittest.TestCase):
+
+    def ejecutar(self, corutina):
+        # Si una etapa no recibe su fin el pipeline se queda esperando: el tiempo límite lo detecta
+        return asyncio.run(asyncio.wait_for(corutina, timeout=10))
+
+    def test_avisa_el_fin_a_cada_consumidor(self):
+        async def probar():
+            cola = asyncio.Queue()
+            await _esperar_etapa([asyncio.sleep(0), asyncio.sleep(0)], cola, 3)
+            return [cola.get_nowait() for _ in range(cola.qsize())]
+
+        self.assertEqual([_FIN, _FIN, _FIN], self.ejecutar(probar()))
+
+    def test_liquida_todos_los_empleados(self):
+        empleados = {id: 1500000.0 for id in range(1, 24)}
+        empleados[5] = -1.0  # No pasa las validaciones
+        base = BaseDatosFalsa(empleados)
+
+        with base.parchear():
+            resumen = self.ejecutar(liquidar_periodo_async(date(2025, 1, 31), lectores=3, calculadores=2,
+                                                           escritores=2, tamano_pagina=4, tamano_lote=5))
+
+        self.assertEqual(22, resumen['liquidados'])
+        self.assertEqual([5], [empleado_id for empleado_id, _ in resumen['errores']])
+        self.assertEqual(sorted(set(empleados) - {5}), sorted(fila[0] for fila in base.guardadas))
+        self.assertTrue(all(fila[1] == date(2025, 1, 31) for fila in base.guardadas))
+
+    def test_ids_dispersos_no_leen_paginas_vacias(self):
+        base = BaseDatosFalsa({id: 1500000.0 for id in (3, 500, 90000, 90001, 2000000)})
+
+        with base.parchear():
+            resumen = self.ejecutar(liquidar_periodo_async(lectores=2, tamano_pagina=2))
+
+        self.assertEqual(5, resumen['liquidados'])
+        # Tres páginas con empleados y la consulta vacía que cierra el recorrido
+        self.assertEqual(4, base.paginas_leidas)
+
+    def test_sin_empleados(self):
+        with BaseDatosFalsa({}).parchear():
+            resumen = self.ejecutar(liquidar_periodo_async())
+
+        self.assertEqual(0, resumen['liquidados'])
+
+    def test_error_al_escribir_cancela_las_demas_etapas(self):
+        base = BaseDatosFalsa({id: 1500000.0 for id in range(1, 1001)}, falla_al_escribir=True)
+
+        async def probar():
+            with self.assertRaises(RuntimeError):
+                await asyncio.wait_for(liquidar_periodo_async(tamano_pagina=10, tamano_lote=10), timeout=10)
+            return [tarea for tarea in asyncio.all_tasks()
+                    if tarea is not asyncio.current_task() and not tarea.done()]
+
+        with base.parchear():
+            pendientes = asyncio.run(probar())
+
+        self.assertEqual([], pendientes)
+        # Los lectores se detuvieron en lugar de recorrer las 100 páginas
+        self.assertLess(base.paginas_leidas, 100)
+
+if __name__ == '__main__':
+    unittest.main()